@@ -1,14 +1,26 @@
 import os
 import json
 import logging
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, stream_with_context
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import uuid
 from utils.db_models import db, AnalysisSession
 from utils.data_processor import process_data, chunk_process_data
-from utils.ai_helper import get_ai_insights
+from utils.dataset_cache import dataset_cache, DatasetEntry, DatasetLoadError
+from utils.dataset_registry import dataset_registry
+from utils.dataset_profile import profile_cache
+from utils.schema_inference import schema_cache
+from utils.json_provider import DataJSONProvider
+from utils.compaction import compact_dataframe
+from utils.row_pager import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, DEFAULT_STREAM_BATCH_SIZE,
+                             offset_page, keyset_page, iter_frame_batches,
+                             iter_csv_batches, iter_ndjson)
+from utils.columnar import (COLUMNAR_JSON_MIMETYPE, COLUMNAR_BINARY_MIMETYPE,
+                            encode_columnar, encode_columnar_binary, session_to_columnar)
+from utils.ai_helper import (create_visualization, get_ai_insights, prepare_ai_request,
+                              response_visualization, stream_openai_request)
 from utils.visualization_tool import create_visualization_code
 import asyncio
 from functools import wraps
@@ -20,18 +32,32 @@ logger = logging.getLogger(__name__)
 
 # Create the Flask app instance
 app = Flask(__name__)
+app.json = DataJSONProvider(app)
 
 # Configure PostgreSQL database
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SQLALCHEMY_ECHO'] = True  # Enable SQL query logging
 
+# Store cached datasets with categorical and downcast dtypes
+app.config['COMPACT_DATASETS'] = os.getenv('COMPACT_DATASETS', 'false').lower() == 'true'
+
 # Configure logging
 logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
 
 # Initialize the database with error handling
 db.init_app(app)
 
+# Fixed source file served by /upload and the row endpoints
+SOURCE_FILE_PATH = os.path.join('data', 'BankCustomerData2.csv')
+
+# Dataset wire formats, negotiated with ?format= or the Accept header
+DATASET_MIMETYPES = {
+    'rows': 'application/json',
+    'columnar': COLUMNAR_JSON_MIMETYPE,
+    'binary': COLUMNAR_BINARY_MIMETYPE
+}
+
 def is_endpoint_disabled_error(error):
     """Check if the error is due to disabled endpoint."""
     return isinstance(error, OperationalError) and "endpoint is disabled" in str(error)
@@ -65,16 +91,20 @@ def init_db():
 
     return False
 
+def thread_event_loop():
+    """Return this thread's event loop, creating it on first use."""
+    try:
+        return asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        return loop
+
 def async_route(f):
     """Decorator to handle async routes."""
     @wraps(f)
     def wrapper(*args, **kwargs):
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop.run_until_complete(f(*args, **kwargs))
+        return thread_event_loop().run_until_complete(f(*args, **kwargs))
     return wrapper
 
 @app.route('/')
@@ -82,51 +112,129 @@ def index():
     """Render the main page."""
     return render_template('index.html')
 
+def int_arg(name, default, minimum, maximum=None):
+    """Read a bounded integer query parameter."""
+    raw = request.args.get(name)
+    if raw is None or raw == '':
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"Parameter '{name}' must be an integer")
+    if value < minimum:
+        raise ValueError(f"Parameter '{name}' must be at least {minimum}")
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+def negotiate_format():
+    """Pick the dataset wire format from ?format= or the Accept header."""
+    requested = request.args.get('format')
+    if requested:
+        if requested not in DATASET_MIMETYPES:
+            raise ValueError(f"Unsupported format '{requested}'")
+        return requested
+    best = request.accept_mimetypes.best_match(
+        list(DATASET_MIMETYPES.values()), default='application/json')
+    return {mimetype: name for name, mimetype in DATASET_MIMETYPES.items()}[best]
+
+def encode_dataset(df, metadata, wire_format, page=None):
+    """Encode a dataset response body in the negotiated wire format."""
+    if wire_format == 'binary':
+        header = dict(metadata, page=page) if page else metadata
+        return encode_columnar_binary(df, header), DATASET_MIMETYPES['binary']
+
+    result = {'metadata': metadata}
+    if wire_format == 'columnar':
+        result['data'] = encode_columnar(df)
+    else:
+        result['data'] = df
+    if page:
+        result['page'] = page
+    body = app.json.dumps(result, separators=(',', ':')).encode('utf-8')
+    return body, DATASET_MIMETYPES[wire_format]
+
+def resolve_dataset(context):
+    """Look up the registered frame for a context's dataset_id.
+
+    Returns (dataset_id, df); df is None when the id is unknown or evicted.
+    """
+    dataset_id = context.get('dataset_id')
+    if not dataset_id:
+        return None, None
+
+    df = dataset_registry.get(dataset_id)
+    if df is None:
+        # The registry may have evicted a dataset the file cache still holds
+        entry = dataset_cache.get(dataset_id)
+        if entry is not None:
+            df = entry.df
+            dataset_registry.register(df, dataset_id)
+    return dataset_id, df
+
+def load_upload_dataset(file_path: str, fingerprint: str) -> DatasetEntry:
+    """Parse and validate the source file and pre-encode the /upload response."""
+    df = pd.read_csv(file_path, encoding='utf-8')
+
+    # Validate dataframe
+    if df.empty:
+        raise DatasetLoadError('The database source file is empty')
+
+    if len(df) < 2:
+        raise DatasetLoadError('The database source file must contain at least 2 rows of data')
+
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if len(numeric_cols) == 0:
+        raise DatasetLoadError('The database source file must contain at least one numeric column')
+
+    # Infer column types once per file version for later profiling and AI calls
+    schema_cache.get_or_infer(df, fingerprint)
+
+    compaction = None
+    if app.config['COMPACT_DATASETS']:
+        df, compaction = compact_dataframe(df)
+
+    stat = os.stat(file_path)
+    metadata = {
+        'dataset_id': fingerprint,
+        'filename': os.path.basename(file_path),
+        'rows': len(df),
+        'columns': len(df.columns),
+        'column_names': list(df.columns),
+        'numeric_columns': list(numeric_cols),
+        'categorical_columns': [col for col in df.columns if col not in set(numeric_cols)],
+        'file_size': stat.st_size,
+        'last_modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+    }
+    if compaction is not None:
+        metadata['memory_usage_before'] = compaction['memory_usage_before']
+        metadata['memory_usage_after'] = compaction['memory_usage_after']
+
+    # Create the response with both processed data and raw data, encoded once
+    result = {
+        'data': df,
+        'metadata': metadata
+    }
+    body = app.json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+    return DatasetEntry(fingerprint, file_path, df, metadata, body)
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    """Handle data loading from fixed file in data folder."""
+    """Handle data loading from fixed file in data folder.
+
+    Returns the metadata plus the first page of rows (``offset``/``limit``);
+    clients fetch later pages from /data/rows. ``all=true`` returns every row.
+    """
     try:
-        file_path = os.path.join('data', 'BankCustomerData2.csv')
+        file_path = SOURCE_FILE_PATH
         if not os.path.exists(file_path):
             return jsonify({'error': 'Database source file not found'}), 400
 
         try:
-            df = pd.read_csv(file_path, encoding='utf-8')
-            
-            # Get file stats
-            file_size = os.path.getsize(file_path)
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            
-            # Validate dataframe
-            if df.empty:
-                return jsonify({'error': 'The database source file is empty'}), 400
-            
-            if len(df) < 2:
-                return jsonify({'error': 'The database source file must contain at least 2 rows of data'}), 400
-
-            if len(numeric_cols) == 0:
-                return jsonify({'error': 'The database source file must contain at least one numeric column'}), 400
-
-            # Convert DataFrame to list of dictionaries for JSON serialization
-            data = df.to_dict('records')
-
-            # Create the response with both processed data and raw data
-            result = {
-                'data': data,
-                'metadata': {
-                    'filename': 'BankCustomerData2.csv',
-                    'rows': len(df),
-                    'columns': len(df.columns),
-                    'column_names': list(df.columns),
-                    'numeric_columns': list(numeric_cols),
-                    'categorical_columns': list(df.select_dtypes(exclude=[np.number]).columns),
-                    'file_size': file_size,
-                    'last_modified': datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d %H:%M:%S')
-                }
-            }
-            
-            return jsonify(result)
-
+            entry = dataset_cache.get_or_load(file_path, load_upload_dataset)
+        except DatasetLoadError as e:
+            return jsonify({'error': str(e)}), 400
         except pd.errors.EmptyDataError:
             return jsonify({'error': 'The database source file is empty'}), 400
         except pd.errors.ParserError:
@@ -135,45 +243,215 @@ def upload_file():
             logger.error(f"Error reading database source file: {str(e)}")
             return jsonify({'error': 'Error reading database source file'}), 400
 
+        # Keep the parsed frame addressable by id for the AI endpoints
+        dataset_registry.register(entry.df, entry.fingerprint)
+        # Profile every column once; prompts, charts and /profile read it back
+        profile_cache.get_or_build(entry.df, dataset_registry.fingerprint(entry.fingerprint),
+                                   schema_key=entry.fingerprint)
+
+        wire_format = negotiate_format()
+
+        # Metadata plus one page of rows unless the client opts out
+        paged = request.args.get('all', 'false').lower() != 'true'
+        etag = entry.etag if wire_format == 'rows' else f"{entry.etag}-{wire_format}"
+        if paged:
+            limit = int_arg('limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+            offset = int_arg('offset', 0, 0)
+            etag = f"{etag}-{offset}-{limit}"
+
+        # The client already holds this exact payload
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+
+        if paged:
+            frame = entry.df.iloc[offset:offset + limit]
+            page = offset_page(entry.df, offset, limit)['page']
+            body, mimetype = encode_dataset(frame, entry.metadata, wire_format, page)
+        elif wire_format == 'rows':
+            body, mimetype = entry.body, 'application/json'
+        else:
+            body = entry.encoded(wire_format, lambda: encode_dataset(
+                entry.df, entry.metadata, wire_format)[0])
+            mimetype = DATASET_MIMETYPES[wire_format]
+
+        response = app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.vary.add('Accept')
+        return response
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         logger.error(f"Error in file processing: {str(e)}")
         return jsonify({'error': 'Server error processing database source file'}), 500
 
+@app.route('/data/rows', methods=['GET'])
+def get_rows():
+    """Return a page of rows using offset/limit or keyset paging."""
+    try:
+        if not os.path.exists(SOURCE_FILE_PATH):
+            return jsonify({'error': 'Database source file not found'}), 400
+
+        entry = dataset_cache.get_or_load(SOURCE_FILE_PATH, load_upload_dataset)
+        limit = int_arg('limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+
+        key = request.args.get('key')
+        if key:
+            if key not in entry.df.columns:
+                return jsonify({'error': f'Unknown key column: {key}'}), 400
+            after_row = request.args.get('after_row')
+            page = keyset_page(entry.df, key, request.args.get('after'), limit,
+                               entry.sort_order(key),
+                               int_arg('after_row', 0, 0) if after_row else None)
+        else:
+            page = offset_page(entry.df, int_arg('offset', 0, 0), limit)
+
+        return jsonify(page)
+
+    except DatasetLoadError as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error paging rows: {str(e)}")
+        return jsonify({'error': 'Error reading rows'}), 500
+
+@app.route('/data/stream', methods=['GET'])
+def stream_rows():
+    """Stream every row as NDJSON in bounded batches."""
+    try:
+        if not os.path.exists(SOURCE_FILE_PATH):
+            return jsonify({'error': 'Database source file not found'}), 400
+
+        batch_size = int_arg('batch_size', DEFAULT_STREAM_BATCH_SIZE, 1, MAX_PAGE_SIZE)
+
+        # Reuse the parsed frame when it is already resident, otherwise read
+        # the file chunk by chunk so memory stays bounded by the batch size
+        entry = dataset_cache.get(dataset_cache.fingerprint(SOURCE_FILE_PATH))
+        if entry is not None:
+            batches = iter_frame_batches(entry.df, batch_size)
+        else:
+            batches = iter_csv_batches(SOURCE_FILE_PATH, batch_size)
+
+        return app.response_class(stream_with_context(iter_ndjson(batches)),
+                                  mimetype='application/x-ndjson')
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error streaming rows: {str(e)}")
+        return jsonify({'error': 'Error streaming rows'}), 500
+
+@app.route('/profile', methods=['GET'])
+def get_profile():
+    """Return the per-column profile of a dataset.
+
+    Profiles the registered dataset named by ``dataset_id``, or the source
+    file when none is given. ``columns`` (comma-separated) limits the
+    column entries returned. The ETag is the dataset's content fingerprint.
+    """
+    try:
+        dataset_id = request.args.get('dataset_id')
+        if dataset_id:
+            _, df = resolve_dataset({'dataset_id': dataset_id})
+            if df is None:
+                return jsonify({'error': 'Dataset expired, please reload the data'}), 410
+        else:
+            if not os.path.exists(SOURCE_FILE_PATH):
+                return jsonify({'error': 'Database source file not found'}), 400
+            entry = dataset_cache.get_or_load(SOURCE_FILE_PATH, load_upload_dataset)
+            dataset_id = entry.fingerprint
+            df = dataset_registry.get(dataset_id)
+            if df is None:
+                dataset_registry.register(entry.df, dataset_id)
+                df = entry.df
+
+        fingerprint = dataset_registry.fingerprint(dataset_id)
+        if fingerprint and request.if_none_match.contains(fingerprint):
+            response = app.response_class(status=304)
+            response.set_etag(fingerprint)
+            return response
+
+        profile = profile_cache.get_or_build(df, fingerprint, schema_key=dataset_id)
+        columns = request.args.get('columns')
+        if columns:
+            wanted = [column.strip() for column in columns.split(',') if column.strip()]
+            unknown = [column for column in wanted if column not in profile['column_descriptions']]
+            if unknown:
+                return jsonify({'error': f"Unknown columns: {', '.join(unknown)}"}), 400
+            profile = {**profile, 'column_descriptions': {
+                column: profile['column_descriptions'][column] for column in wanted}}
+
+        response = jsonify({'dataset_id': dataset_id, 'profile': profile})
+        if fingerprint:
+            response.set_etag(fingerprint)
+        return response
+
+    except DatasetLoadError as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error profiling dataset: {str(e)}")
+        return jsonify({'error': 'Error profiling dataset'}), 500
+
+def parse_analysis_request():
+    """Validate an analysis request body and resolve its dataset.
+
+    Returns (question, context, df, error); error is a (response, status)
+    pair to return as-is, and the other values are None when it is set.
+    """
+    data = request.get_json()
+    if not data:
+        return None, None, None, (jsonify({'error': 'No data provided'}), 400)
+
+    question = data.get('question', '').strip()
+    if not question:
+        return None, None, None, (jsonify({'error': 'No question provided'}), 400)
+
+    context = data.get('context', {})
+    if not isinstance(context, dict):
+        return None, None, None, (jsonify({'error': 'Invalid context format'}), 400)
+
+    dataset_id, df = resolve_dataset(context)
+    if dataset_id and df is None and not context.get('data'):
+        return None, None, None, (jsonify({'error': 'Dataset expired, please reload the data'}), 410)
+
+    logger.info(f"Received analysis request - Question: {question}")
+
+    # Initialize or update conversation history
+    conversation_history = context.get('conversation_history', [])
+
+    # Add the current question to history
+    conversation_history.append({
+        "role": "user",
+        "content": question
+    })
+
+    # Older turns are summarized or dropped by size when the prompt is built
+    context['conversation_history'] = conversation_history
+    return question, context, df, None
+
+def sse_event(event, payload):
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {app.json.dumps(payload, separators=(',', ':'))}\n\n"
+
 @app.route('/ai/analyze', methods=['POST'])
 @async_route
 async def analyze_data():
     """Analyze data using AI insights with conversation context."""
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-
-        question = data.get('question', '').strip()
-        if not question:
-            return jsonify({'error': 'No question provided'}), 400
-
-        context = data.get('context', {})
-        if not isinstance(context, dict):
-            return jsonify({'error': 'Invalid context format'}), 400
-        
-        logger.info(f"Received analysis request - Question: {question}")
-        
-        # Initialize or update conversation history
-        conversation_history = context.get('conversation_history', [])
-        
-        # Add the current question to history
-        conversation_history.append({
-            "role": "user",
-            "content": question
-        })
-        
-        # Keep only the last 10 messages to maintain context without overload
-        conversation_history = conversation_history[-10:]
-        context['conversation_history'] = conversation_history
+        question, context, df, error = parse_analysis_request()
+        if error:
+            return error
+        conversation_history = context['conversation_history']
 
         try:
             # Get AI insights with conversation context
-            result = await get_ai_insights(question, context)
+            result = await get_ai_insights(question, context, df)
             
             # Add AI response to conversation history
             if result and result.get('answer'):
@@ -199,10 +477,67 @@ async def analyze_data():
         logger.error(f"Error in analyze_data: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/ai/analyze/stream', methods=['POST'])
+def analyze_data_stream():
+    """Stream an AI answer as server-sent events.
+
+    Emits ``token`` events with pieces of the answer as the model produces
+    them, then one ``done`` event carrying the same response envelope as
+    /ai/analyze, or an ``error`` event if the stream fails part-way.
+    """
+    try:
+        question, context, df, error = parse_analysis_request()
+        if error:
+            return error
+        loop = thread_event_loop()
+        prepared = loop.run_until_complete(prepare_ai_request(question, context, df))
+    except Exception as e:
+        logger.error(f"Error in analyze_data_stream: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    def generate():
+        if 'request' not in prepared:
+            # Answered without the model: replay the envelope as one token
+            yield sse_event('token', {'content': prepared['answer']})
+            yield sse_event('done', {'response': prepared})
+            return
+
+        events = stream_openai_request(question, **prepared['request'])
+        try:
+            while True:
+                try:
+                    kind, value = loop.run_until_complete(events.__anext__())
+                except StopAsyncIteration:
+                    break
+                if kind == 'token':
+                    yield sse_event('token', {'content': value})
+                else:
+                    yield sse_event('done', {'response': {
+                        'answer': value.get('content') or '',
+                        'visualization': response_visualization(value),
+                        'web_search_used': False
+                    }})
+        except Exception as e:
+            logger.error(f"Error streaming analysis: {str(e)}")
+            yield sse_event('error', {'error': 'Error streaming analysis'})
+        finally:
+            # Also runs when the client disconnects, cancelling the upstream request
+            loop.run_until_complete(events.aclose())
+
+    response = app.response_class(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/visualize_data', methods=['POST'])
 @async_route
 async def visualize_data():
-    """Generate visualizations based on data and request."""
+    """Generate visualizations based on data and request.
+
+    With a ``spec`` (``create_visualization`` arguments such as chart_type,
+    x and y) the chart is built directly from the dataset named by
+    ``context.dataset_id``, without asking the model.
+    """
     try:
         data = request.get_json()
         if not data:
@@ -211,14 +546,31 @@ async def visualize_data():
         context = data.get('context', {})
         question = data.get('question', '')
 
-        if not context.get('data'):
+        dataset_id, df = resolve_dataset(context)
+        if dataset_id and df is None and not context.get('data'):
+            return jsonify({
+                'error': 'Dataset expired, please reload the data',
+                'answer': 'The loaded data has expired on the server. Please reload it.'
+            }), 410
+
+        if df is None and not context.get('data'):
             return jsonify({
                 'error': 'No data available for visualization',
                 'answer': 'Please load some data before requesting visualizations.'
             }), 400
 
+        # An explicit chart spec is drawn from the registered dataset without the model
+        spec = data.get('spec')
+        if spec:
+            if df is None:
+                return jsonify({'error': 'A chart spec needs a registered dataset_id'}), 400
+            fingerprint = dataset_registry.fingerprint(dataset_id)
+            profile = profile_cache.get_or_build(df, fingerprint, schema_key=dataset_id)
+            visualization = await create_visualization(spec, df, fingerprint, profile)
+            return jsonify({'answer': '', 'visualization': visualization})
+
         # Get AI insights first
-        result = await get_ai_insights(question, context)
+        result = await get_ai_insights(question, context, df)
         
         if result.get('visualization'):
             return jsonify(result)
@@ -298,8 +650,17 @@ def load_session(session_id):
         session = AnalysisSession.query.filter_by(session_id=session_id).first()
         if not session:
             return jsonify({'error': 'Session not found'}), 404
-            
-        return jsonify(session.to_dict())
+
+        payload = session.to_dict()
+        if negotiate_format() != 'rows':
+            # Sessions are JSON documents, so binary falls back to column arrays
+            payload['data'] = session_to_columnar(payload['data'])
+            response = jsonify(payload)
+            response.mimetype = COLUMNAR_JSON_MIMETYPE
+            response.vary.add('Accept')
+            return response
+
+        return jsonify(payload)
         
     except OperationalError as e:
         if is_endpoint_disabled_error(e):
@@ -310,6 +671,8 @@ def load_session(session_id):
     except SQLAlchemyError as e:
         logger.error(f"Database error in load_session: {str(e)}")
         return jsonify({'error': 'Database error'}), 500
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error loading session: {str(e)}")
         return jsonify({'error': 'Error loading session'}), 500
@@ -0,0 +1,52 @@
+"""Cache key cost vs dataset size: full-row JSON keys vs fingerprint keys.
+
+Usage: python -m benchmarks.bench_cache_key
+"""
+import hashlib
+import json
+import time
+
+from benchmarks.bench_parallel_profile import synthetic_frame
+from utils.cache_manager import OpenAICache
+from utils.fingerprint import dataframe_fingerprint
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+REPEATS = 200
+
+
+def legacy_key(prompt: str, **kwargs) -> str:
+    """The previous key: JSON of every parameter, rows included."""
+    return hashlib.sha256(json.dumps({'prompt': prompt, **kwargs}, sort_keys=True,
+                                     default=str).encode()).hexdigest()
+
+
+def main() -> None:
+    cache = OpenAICache(cache_dir='.cache/bench_cache_key')
+    history = [{'role': 'user', 'content': 'What is the average balance?'},
+               {'role': 'assistant', 'content': 'The average balance is 1,500.'}]
+    print(f"{'rows':>10} {'fingerprint (once)':>20} {'legacy key':>12} {'new key':>12}")
+
+    for rows in SIZES:
+        df = synthetic_frame(rows)
+        records = df.to_dict('records')
+
+        start = time.perf_counter()
+        fingerprint = dataframe_fingerprint(df)
+        fingerprint_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy_key('question', context={'data': records}, previous_messages=history)
+        legacy_time = time.perf_counter() - start
+
+        context = {'data': records, 'fingerprint': fingerprint}
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            cache.cache_key('question', context=context, previous_messages=history)
+        key_time = (time.perf_counter() - start) / REPEATS
+
+        print(f"{rows:>10,} {fingerprint_time * 1000:>18.1f}ms {legacy_time * 1000:>10.1f}ms "
+              f"{key_time * 1e6:>10.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Chart payload size and build time vs dataset size, per chart type.
+
+Usage: python -m benchmarks.bench_downsampling
+"""
+import asyncio
+import json
+import time
+
+from benchmarks.bench_parallel_profile import synthetic_frame
+from utils.ai_helper import create_visualization
+
+SIZES = (1_000, 100_000, 1_000_000)
+CHART_TYPES = ('line', 'bar', 'scatter', 'heatmap', 'pie')
+
+
+def main() -> None:
+    print(f"{'rows':>10} {'chart':>8} {'method':>8} {'points':>8} {'payload':>10} {'time':>10}")
+    for rows in SIZES:
+        df = synthetic_frame(rows)
+        for chart_type in CHART_TYPES:
+            start = time.perf_counter()
+            viz = asyncio.run(create_visualization({'chart_type': chart_type}, df))
+            elapsed = time.perf_counter() - start
+            payload = len(json.dumps(viz))
+            sampling = viz['sampling']
+            print(f"{rows:>10,} {chart_type:>8} {sampling['method']:>8} {sampling['output_points']:>8,} "
+                  f"{payload / 1024:>8.0f}KB {elapsed * 1000:>8.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Serialization benchmark: recursive native conversion vs the JSON provider.
+
+Usage: python -m benchmarks.bench_json_provider [rows]
+"""
+import json
+import sys
+import time
+
+from flask import Flask
+
+from benchmarks.bench_parallel_profile import synthetic_frame
+from utils.data_processor import convert_to_native_types
+from utils.json_provider import DataJSONProvider, orjson
+
+
+def timed(label: str, func, baseline: float = None) -> float:
+    """Run func once and print its wall time and payload size."""
+    start = time.perf_counter()
+    size = len(func())
+    elapsed = time.perf_counter() - start
+    speedup = f"  speedup {baseline / elapsed:5.2f}x" if baseline else ''
+    print(f"{label:<28} {elapsed:8.3f}s  {size / 1024 / 1024:7.1f} MB{speedup}")
+    return elapsed
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    df = synthetic_frame(rows)
+    payload = {'metadata': {'rows': rows, 'columns': list(df.columns)}, 'data': df}
+    print(f"{rows:,} rows, {len(df.columns)} columns")
+
+    app = Flask(__name__)
+    provider = DataJSONProvider(app)
+
+    def legacy() -> bytes:
+        records = convert_to_native_types(df.to_dict('records'))
+        return json.dumps({'metadata': payload['metadata'], 'data': records},
+                          sort_keys=True).encode('utf-8')
+
+    def stdlib() -> bytes:
+        provider.use_orjson = False
+        return provider.dumps_bytes(payload)
+
+    def fast() -> bytes:
+        provider.use_orjson = True
+        return provider.dumps_bytes(payload)
+
+    baseline = timed('to_dict + convert + json', legacy)
+    timed('provider (json)', stdlib, baseline)
+    if orjson is not None:
+        timed('provider (orjson)', fast, baseline)
+    else:
+        print('orjson not installed; skipping the orjson path')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Scaling benchmark for parallel chunk profiling.
+
+Usage: python -m benchmarks.bench_parallel_profile [rows] [chunk_size]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.parallel_profile import parallel_summarize
+from utils.streaming_stats import summarize_frame, merge_summaries
+
+
+def synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build a bank-customer-like frame with numeric and categorical columns."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'age': rng.integers(18, 95, rows),
+        'balance': rng.normal(1500, 3000, rows).round(2),
+        'duration': rng.exponential(250, rows).round(),
+        'campaign': rng.integers(1, 40, rows),
+        'job': rng.choice(['admin.', 'technician', 'services', 'management',
+                           'retired', 'blue-collar', 'student'], rows),
+        'marital': rng.choice(['married', 'single', 'divorced'], rows),
+        'housing': rng.choice(['yes', 'no'], rows),
+        'customer_id': rng.integers(0, rows, rows).astype(str),
+    })
+
+
+def serial_summarize(df: pd.DataFrame, chunk_size: int):
+    """The single-process baseline used by chunk_process_data."""
+    return merge_summaries([summarize_frame(df.iloc[i:i + chunk_size])
+                            for i in range(0, len(df), chunk_size)])
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 3_000_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    cores = os.cpu_count() or 1
+
+    df = synthetic_frame(rows)
+    print(f"{rows:,} rows, {len(df.columns)} columns, chunk size {chunk_size:,}, {cores} cores")
+
+    start = time.perf_counter()
+    serial_summarize(df, chunk_size)
+    baseline = time.perf_counter() - start
+    print(f"serial      {baseline:8.2f}s")
+
+    workers = 1
+    while workers <= cores:
+        start = time.perf_counter()
+        parallel_summarize(df, chunk_size, workers)
+        elapsed = time.perf_counter() - start
+        print(f"workers={workers:<3} {elapsed:8.2f}s  speedup {baseline / elapsed:5.2f}x")
+        workers *= 2
+    if workers // 2 != cores:
+        start = time.perf_counter()
+        parallel_summarize(df, chunk_size, cores)
+        elapsed = time.perf_counter() - start
+        print(f"workers={cores:<3} {elapsed:8.2f}s  speedup {baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
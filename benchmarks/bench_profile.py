@@ -0,0 +1,51 @@
+"""Dataset profile build vs reuse, and charts drawn with and without it.
+
+Usage: python -m benchmarks.bench_profile
+"""
+import asyncio
+import tempfile
+import time
+
+from benchmarks.bench_parallel_profile import synthetic_frame
+from utils.ai_helper import create_visualization
+from utils.dataset_profile import ProfileCache
+from utils.fingerprint import dataframe_fingerprint
+
+SIZES = (10_000, 100_000, 1_000_000)
+CHARTS = (
+    {'chart_type': 'histogram', 'x': 'balance'},
+    {'chart_type': 'bar', 'x': 'customer_id', 'y': ['balance'], 'agg': 'sum'},
+)
+
+
+def timed(func):
+    """Run a callable once and return its result and elapsed milliseconds."""
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as profile_dir:
+        print(f"{'rows':>10} {'build':>10} {'disk hit':>10} {'memory hit':>11}")
+        frames = {}
+        for rows in SIZES:
+            df = synthetic_frame(rows)
+            fingerprint = dataframe_fingerprint(df)
+            profile, build = timed(lambda: ProfileCache(profile_dir=profile_dir).get_or_build(df, fingerprint))
+            restarted = ProfileCache(profile_dir=profile_dir)
+            _, disk = timed(lambda: restarted.get(fingerprint))
+            _, memory = timed(lambda: restarted.get(fingerprint))
+            frames[rows] = (df, profile)
+            print(f"{rows:>10,} {build:>8.0f}ms {disk:>8.1f}ms {memory:>9.3f}ms")
+
+    print(f"\n{'rows':>10} {'chart':>10} {'rows scan':>10} {'profile':>10}")
+    for rows, (df, profile) in frames.items():
+        for config in CHARTS:
+            _, scanned = timed(lambda: asyncio.run(create_visualization(dict(config), df)))
+            _, profiled = timed(lambda: asyncio.run(create_visualization(dict(config), df, profile=profile)))
+            print(f"{rows:>10,} {config['chart_type']:>10} {scanned:>8.0f}ms {profiled:>8.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
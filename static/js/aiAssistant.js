@@ -59,7 +59,7 @@ const aiAssistant = {
         document.addEventListener('data-loaded', (event) => {
             const result = event.detail;
             const columns = result.columns || result.metadata?.column_names || [];
-            const rows = result.data?.length || 0;
+            const rows = result.metadata?.rows || result.data?.length || 0;
 
             if (result && !this.elements.chatContainer.querySelector('.assistant-message')) {
                 this.addMessage('assistant', 
@@ -97,47 +97,65 @@ const aiAssistant = {
                 summary: window.appState.currentData.summary
             });
 
-            // Send request to AI assistant
-            const response = await fetch('/visualize_data', {
+            // Send request to AI assistant. Data loaded from the server is
+            // referenced by id; the loaded rows are only sent when no id is
+            // available, since the client may hold just the first page.
+            const datasetId = window.appState.currentData.metadata?.dataset_id;
+            const buildContext = (includeData) => ({
+                dataset_id: datasetId,
+                // Column arrays avoid repeating every key on every row
+                data: includeData ? columnarCodec.encodeRows(window.appState.currentData.data || []) : [],
+                columns: window.appState.currentData.columns || [],
+                column_stats: window.appState.currentData.column_stats || {},
+                summary: window.appState.currentData.summary || {}
+            });
+            // Answers stream in as server-sent events, so text shows as it is generated
+            const sendQuestion = (includeData) => fetch('/ai/analyze/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    question,
-                    context: {
-                        data: window.appState.currentData.data || [],
-                        columns: window.appState.currentData.columns || [],
-                        column_stats: window.appState.currentData.column_stats || {},
-                        summary: window.appState.currentData.summary || {}
-                    }
-                })
+                body: JSON.stringify({ question, context: buildContext(includeData) })
             });
 
-            const result = await response.json();
-            console.log('Received response from AI assistant:', result);
+            let response = await sendQuestion(!datasetId);
+            if (response.status === 410) {
+                // The server evicted the dataset; reloading registers it again
+                const reload = await fetch('/upload?limit=1', { method: 'POST' });
+                response = await sendQuestion(!reload.ok);
+            }
+            if (!response.ok || !response.body) {
+                const errorData = await response.json().catch(() => ({}));
+                throw new Error(errorData.error || 'Analysis failed: ' + response.statusText);
+            }
 
-            // Hide loading indicator
+            let answer = '';
+            let message = null;
+            let result = null;
+            await this.readEvents(response, (event, payload) => {
+                if (event === 'token') {
+                    // Hide loading indicator once the first words arrive
+                    queryProcessing.style.display = 'none';
+                    answer += payload.content || '';
+                    message = this.updateMessage(message, this.cleanAnswer(answer));
+                } else if (event === 'done') {
+                    result = payload;
+                } else if (event === 'error') {
+                    throw new Error(payload.error || 'Error streaming analysis');
+                }
+            });
+            console.log('Received response from AI assistant:', result);
             queryProcessing.style.display = 'none';
 
-            // Show assistant's response, filtering out JSON
-            if (result.response && result.response.answer) {
-                const cleanAnswer = result.response.answer.replace(/```json[\s\S]*?```/g, '')
-                    .replace(/```[\s\S]*?```/g, '')
-                    .trim();
-                if (cleanAnswer) {
-                    this.addMessage('assistant', cleanAnswer);
-                }
-            } else if (result.answer) {
-                const cleanAnswer = result.answer.replace(/```json[\s\S]*?```/g, '')
-                    .replace(/```[\s\S]*?```/g, '')
-                    .trim();
-                if (cleanAnswer) {
-                    this.addMessage('assistant', cleanAnswer);
-                }
+            // The final envelope replaces the streamed text
+            const finalAnswer = this.cleanAnswer(result?.response?.answer ?? answer);
+            if (finalAnswer) {
+                this.updateMessage(message, finalAnswer);
+            } else if (message) {
+                message.remove();
             }
 
             // Update visualization if provided
-            const visualization = result.response?.visualization || result.visualization;
-            const vizType = result.response?.type || 'echarts';
+            const visualization = result?.response?.visualization || result?.visualization;
+            const vizType = result?.response?.type || 'echarts';
             console.log('Visualization data:', visualization);
             console.log('Visualization type:', vizType);
 
@@ -160,6 +178,48 @@ const aiAssistant = {
         }
     },
 
+    // Read a text/event-stream response, calling onEvent(event, payload) per event
+    async readEvents(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            for (const block of events) {
+                let event = 'message';
+                let data = '';
+                block.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                });
+                if (data) onEvent(event, JSON.parse(data));
+            }
+            if (done) return;
+        }
+    },
+
+    // Strip fenced code blocks (JSON leftovers) from an answer
+    cleanAnswer(answer) {
+        return (answer || '').replace(/```json[\s\S]*?```/g, '')
+            .replace(/```[\s\S]*?```/g, '')
+            .trim();
+    },
+
+    // Replace a message's content, adding the message first if needed
+    updateMessage(messageDiv, content) {
+        if (!messageDiv) {
+            return this.addMessage('assistant', content);
+        }
+        const replacement = this.addMessage('assistant', content, false);
+        messageDiv.replaceChildren(...replacement.childNodes);
+        const chatContainer = this.elements.chatContainer;
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+        return messageDiv;
+    },
+
     createPieChartConfig(data, title) {
         return {
             title: {
@@ -236,7 +296,7 @@ const aiAssistant = {
         };
     },
 
-    addMessage(type, content) {
+    addMessage(type, content, append = true) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `message ${type}-message`;
 
@@ -290,7 +350,7 @@ const aiAssistant = {
         messageDiv.appendChild(contentDiv);
         
         const chatContainer = this.elements.chatContainer;
-        if (chatContainer) {
+        if (append && chatContainer) {
             chatContainer.appendChild(messageDiv);
             chatContainer.scrollTop = chatContainer.scrollHeight;
         }
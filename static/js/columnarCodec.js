@@ -0,0 +1,142 @@
+// Columnar dataset codec
+// Reads the column-array and typed-buffer encodings served by the backend,
+// and packs row data into column arrays before sending it back.
+const columnarCodec = {
+    MAGIC: 'DLC1',
+    BINARY_MIMETYPE: 'application/vnd.datalens.columnar',
+
+    isColumnar(payload) {
+        return !!payload && !Array.isArray(payload) && payload.format === 'columnar';
+    },
+
+    decodeColumn(column) {
+        if (column.codes) {
+            const dictionary = column.dictionary;
+            return column.codes.map(code => (code < 0 ? null : dictionary[code]));
+        }
+        return column.values || [];
+    },
+
+    toRows(payload) {
+        if (!this.isColumnar(payload)) {
+            return payload || [];
+        }
+        const names = payload.columns.map(column => column.name);
+        const values = payload.columns.map(column => this.decodeColumn(column));
+        const rows = new Array(payload.length);
+        for (let i = 0; i < payload.length; i++) {
+            const row = {};
+            for (let j = 0; j < names.length; j++) {
+                row[names[j]] = values[j][i];
+            }
+            rows[i] = row;
+        }
+        return rows;
+    },
+
+    encodeRows(rows) {
+        if (!Array.isArray(rows) || rows.length === 0) {
+            return rows || [];
+        }
+        const names = Object.keys(rows[0]);
+        const columns = names.map(name => {
+            const values = rows.map(row => (row[name] === undefined ? null : row[name]));
+            const isNumeric = values.every(v => v === null || typeof v === 'number');
+            if (isNumeric) {
+                return { name, type: 'float', values };
+            }
+            const lookup = new Map();
+            const dictionary = [];
+            const codes = values.map(v => {
+                if (v === null) return -1;
+                const key = String(v);
+                if (!lookup.has(key)) {
+                    lookup.set(key, dictionary.length);
+                    dictionary.push(key);
+                }
+                return lookup.get(key);
+            });
+            return { name, type: 'dictionary', dictionary, codes };
+        });
+        return { format: 'columnar', length: rows.length, columns };
+    },
+
+    decodeBinary(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== this.MAGIC) {
+            throw new Error('Not a columnar binary payload');
+        }
+        const headerLength = view.getUint32(4, true);
+        const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+        const base = 8 + headerLength;
+        const arrayTypes = {
+            int8: Int8Array,
+            int16: Int16Array,
+            int32: Int32Array,
+            float32: Float32Array,
+            float64: Float64Array
+        };
+
+        const columns = {};
+        header.columns.forEach(column => {
+            const ArrayType = arrayTypes[column.dtype];
+            const count = column.byte_length / ArrayType.BYTES_PER_ELEMENT;
+            const array = new ArrayType(buffer, base + column.offset, count);
+            if (column.type === 'dictionary') {
+                columns[column.name] = Array.from(array, code => (code < 0 ? null : column.dictionary[code]));
+            } else if (column.type === 'bool') {
+                columns[column.name] = Array.from(array, v => (v < 0 ? null : v === 1));
+            } else {
+                columns[column.name] = array;
+            }
+        });
+
+        return { length: header.length, metadata: header.metadata || {}, columns };
+    },
+
+    binaryToRows(buffer) {
+        const decoded = this.decodeBinary(buffer);
+        const names = Object.keys(decoded.columns);
+        const rows = new Array(decoded.length);
+        for (let i = 0; i < decoded.length; i++) {
+            const row = {};
+            names.forEach(name => {
+                const value = decoded.columns[name][i];
+                row[name] = typeof value === 'number' && Number.isNaN(value) ? null : value;
+            });
+            rows[i] = row;
+        }
+        return { rows, metadata: decoded.metadata };
+    },
+
+    // Decode a dataset response in whichever format the server sent into
+    // the row-oriented { metadata, page, data } shape the UI reads
+    async readDataset(response) {
+        const mimetype = (response.headers.get('Content-Type') || '').split(';')[0].trim();
+        if (mimetype === this.BINARY_MIMETYPE) {
+            const { rows, metadata } = this.binaryToRows(await response.arrayBuffer());
+            const { page, ...rest } = metadata;
+            return page ? { metadata: rest, page, data: rows } : { metadata: rest, data: rows };
+        }
+        const result = await response.json();
+        if (result && this.isColumnar(result.data)) {
+            result.data = this.toRows(result.data);
+        }
+        return result;
+    },
+
+    // Saved sessions come back with their row lists as column arrays
+    sessionToRows(sessionData) {
+        const restored = { ...sessionData, data: this.toRows(sessionData.data) };
+        if (sessionData.currentData) {
+            restored.currentData = {
+                ...sessionData.currentData,
+                data: this.toRows(sessionData.currentData.data)
+            };
+        }
+        return restored;
+    }
+};
+
+window.columnarCodec = columnarCodec;
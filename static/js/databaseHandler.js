@@ -23,8 +23,10 @@ async function startConnectionSequence() {
         // Step 3: Load Schema
         await animateStep(2, steps, progressBar, 75);
         
-        // Actual data loading
-        const response = await fetch('/upload', {
+        // Actual data loading: metadata plus the first page of rows; the
+        // preview fetches later pages from /data/rows as they are shown.
+        // The page arrives as typed column buffers, decoded back into rows
+        const response = await fetch('/upload?format=binary', {
             method: 'POST'
         });
 
@@ -32,7 +34,7 @@ async function startConnectionSequence() {
             throw new Error(await response.text() || 'Database connection failed');
         }
 
-        const result = await response.json();
+        const result = await columnarCodec.readDataset(response);
         console.log('Server response:', result);
 
         if (!result || !result.data) {
@@ -1,8 +1,109 @@
 const ROWS_PER_PAGE = 10;
+// Rows requested from /data/rows at a time (the server caps a page at 5000)
+const ROW_FETCH_SIZE = 500;
+const MAX_ROW_FETCH_SIZE = 5000;
 let currentPage = 1;
 let filteredData = [];
 let fullData = [];
 
+// /upload returns the metadata and a first page; fetch later rows on demand
+async function fetchRowPage(offset, limit = ROW_FETCH_SIZE) {
+    const response = await fetch(`/data/rows?offset=${offset}&limit=${limit}`);
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.error || 'Failed to load rows: ' + response.statusText);
+    }
+    return response.json();
+}
+
+// Charts and statistics describe the whole dataset, so they are read from
+// its server-side profile rather than from the rows loaded so far
+const profileRequests = new Map();
+
+function loadProfile(data) {
+    const datasetId = data?.metadata?.dataset_id || '';
+    if (!profileRequests.has(datasetId)) {
+        const query = datasetId ? `?dataset_id=${encodeURIComponent(datasetId)}` : '';
+        profileRequests.set(datasetId, fetch(`/profile${query}`).then(async response => {
+            if (!response.ok) {
+                profileRequests.delete(datasetId);
+                const errorData = await response.json().catch(() => ({}));
+                throw new Error(errorData.error || 'Failed to load profile: ' + response.statusText);
+            }
+            const { profile } = await response.json();
+            window.appState = { ...window.appState, profile };
+            return profile;
+        }));
+    }
+    return profileRequests.get(datasetId);
+}
+
+// Charts that need more than the profile (such as scatter plots) are built
+// and downsampled server-side from a chart spec
+async function fetchChart(data, spec) {
+    const response = await fetch('/visualize_data', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ spec, context: { dataset_id: data?.metadata?.dataset_id } })
+    });
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.error || 'Failed to build chart: ' + response.statusText);
+    }
+    return (await response.json()).visualization;
+}
+
+// Bin labels and counts of a profiled column's histogram
+function profileHistogram(description) {
+    const { edges, counts } = description.histogram;
+    return {
+        labels: counts.map((_, i) => `${edges[i].toFixed(1)} - ${edges[i + 1].toFixed(1)}`),
+        counts
+    };
+}
+
+// Box plot whiskers at the 1.5 IQR fences, clipped to the observed range
+function profileBoxPlot(description) {
+    const { p25, p50, p75 } = description.quantiles;
+    const iqr = p75 - p25;
+    return [
+        Math.max(p25 - 1.5 * iqr, description.min),
+        p25,
+        p50,
+        p75,
+        Math.min(p75 + 1.5 * iqr, description.max)
+    ];
+}
+
+// Summary statistics of a profiled numeric column, in the stat cards' terms
+function profileStatistics(description) {
+    return {
+        mean: description.mean,
+        median: description.quantiles.p50,
+        stdDev: description.std,
+        cv: description.mean ? (description.std / Math.abs(description.mean)) * 100 : 0,
+        skewness: description.skewness,
+        kurtosis: description.kurtosis,
+        min: description.min,
+        max: description.max,
+        q1: description.quantiles.p25,
+        q3: description.quantiles.p75
+    };
+}
+
+// Append pages to data.data until its first `end` rows are loaded
+async function ensureRowsLoaded(data, end) {
+    const total = data.metadata?.rows ?? data.data.length;
+    end = Math.min(end, total);
+    while (data.data.length < end) {
+        const limit = Math.min(Math.max(end - data.data.length, ROW_FETCH_SIZE), MAX_ROW_FETCH_SIZE);
+        const { rows } = await fetchRowPage(data.data.length, limit);
+        if (!rows.length) break;
+        data.data.push(...rows);
+    }
+    return data.data;
+}
+
 function initializeFileHandlers() {
     const fileInput = document.querySelector('input[type="file"]');
     const dropZone = document.getElementById('dropZone');
@@ -74,7 +175,8 @@ async function handleFileUpload(file) {
         const formData = new FormData();
         formData.append('file', file);
 
-        const response = await fetch('/upload', {
+        // Rows arrive as typed column buffers instead of repeating keys per row
+        const response = await fetch('/upload?format=binary', {
             method: 'POST',
             body: formData
         });
@@ -84,7 +186,7 @@ async function handleFileUpload(file) {
             throw new Error(errorData.error || 'Upload failed: ' + response.statusText);
         }
 
-        const result = await response.json();
+        const result = await columnarCodec.readDataset(response);
         if (!result || !result.data) {
             throw new Error('Invalid response format from server');
         }
@@ -150,7 +252,7 @@ function initializeTableSearch() {
     });
 }
 
-function updateDataPreview(data, showAll = false) {
+async function updateDataPreview(data, showAll = false) {
     const table = document.getElementById('previewTable');
     if (!table) {
         console.error('Preview table element not found');
@@ -160,7 +262,20 @@ function updateDataPreview(data, showAll = false) {
     try {
         // Use metadata to infer columns and preview data
         const columns = data.metadata.column_names || [];
-        const preview = showAll ? data.data : data.data.slice(0, 10); // Show all data if showAll is true
+        const totalRows = data.metadata.rows || data.data.length;
+        const totalPages = Math.max(Math.ceil(totalRows / ROWS_PER_PAGE), 1);
+        data.previewPage = Math.min(data.previewPage || 1, totalPages);
+
+        // Rows past the loaded ones are fetched only when shown
+        let preview;
+        if (showAll) {
+            preview = await ensureRowsLoaded(data, totalRows);
+        } else {
+            const start = (data.previewPage - 1) * ROWS_PER_PAGE;
+            await ensureRowsLoaded(data, start + ROWS_PER_PAGE);
+            preview = data.data.slice(start, start + ROWS_PER_PAGE);
+        }
+        updatePreviewPaging(data, showAll ? 1 : data.previewPage, showAll ? 1 : totalPages);
 
         console.log('Columns:', columns);
         console.log('Preview data:', preview);
@@ -202,6 +317,27 @@ function updateDataPreview(data, showAll = false) {
     }
 }
 
+function updatePreviewPaging(data, page, totalPages) {
+    const prevButton = document.getElementById('prevPage');
+    const nextButton = document.getElementById('nextPage');
+    const pageInfo = document.getElementById('pageInfo');
+    if (!prevButton || !nextButton || !pageInfo) return;
+
+    prevButton.disabled = page <= 1;
+    nextButton.disabled = page >= totalPages;
+    pageInfo.textContent = `Page ${page} of ${totalPages}`;
+
+    // Assigned rather than added, so reloading data does not stack handlers
+    prevButton.onclick = () => {
+        data.previewPage = page - 1;
+        updateDataPreview(data);
+    };
+    nextButton.onclick = () => {
+        data.previewPage = page + 1;
+        updateDataPreview(data);
+    };
+}
+
 function showSuccess(message) {
     const successAlert = document.createElement('div');
     successAlert.className = 'alert alert-success alert-dismissible fade show position-fixed top-0 start-50 translate-middle-x mt-3';
@@ -287,7 +423,7 @@ async function handleFile(file) {
     try {
         await displayFileContent(file);
         
-        const response = await fetch('/upload', {
+        const response = await fetch('/upload?format=binary', {
             method: 'POST',
             body: formData
         });
@@ -296,7 +432,7 @@ async function handleFile(file) {
             throw new Error(`Upload failed: ${response.statusText}`);
         }
 
-        const result = await response.json();
+        const result = await columnarCodec.readDataset(response);
         
         // Update application state with structured data
         window.appState = {
@@ -313,8 +449,8 @@ async function handleFile(file) {
         updateDataStats(result);
         updatePreviewTable(result.preview);
         
-        // Generate automatic visualizations with full data
-        generateInitialVisualizations(window.appState.fullData);
+        // Generate automatic visualizations from the dataset profile
+        generateInitialVisualizations(result);
         
         shareButton.disabled = false;
         progressDiv.classList.add('d-none');
@@ -332,24 +468,19 @@ async function generateInitialVisualizations(data) {
     const noVisualizationsMsg = document.getElementById('noVisualizationsMsg');
     
     try {
-        // Use metadata to infer column types if column_stats is missing
-        const columnStats = data.column_stats || inferColumnStats(data.metadata);
-        
-        const numericColumns = Object.entries(columnStats)
-            .filter(([_, stats]) => stats.type === 'numeric')
-            .map(([col, _]) => col);
-        
-        const categoricalColumns = Object.entries(columnStats)
-            .filter(([_, stats]) => stats.type === 'categorical')
-            .map(([col, _]) => col);
+        // Column types, histograms and category counts cover every row
+        const profile = await loadProfile(data);
+        const columns = profile.column_descriptions;
+        const numericColumns = profile.numeric_columns.filter(col => columns[col]?.histogram);
+        const categoricalColumns = profile.categorical_columns;
 
         noVisualizationsMsg.classList.add('d-none');
         visualizationContainer.classList.remove('d-none');
         visualizationContainer.innerHTML = ''; // Clear existing charts
 
-        // Create different types of charts using full dataset
         if (numericColumns.length > 0) {
             // Distribution chart for first numeric column
+            const histogram = profileHistogram(columns[numericColumns[0]]);
             createChart(visualizationContainer, {
                 title: {
                     text: `Distribution of ${numericColumns[0]}`,
@@ -364,7 +495,7 @@ async function generateInitialVisualizations(data) {
                 },
                 xAxis: {
                     type: 'category',
-                    data: createBins(data.data.map(row => row[numericColumns[0]]), 10),
+                    data: histogram.labels,
                     axisLabel: { color: '#adb5bd' }
                 },
                 yAxis: {
@@ -373,7 +504,7 @@ async function generateInitialVisualizations(data) {
                 },
                 series: [{
                     type: 'bar',
-                    data: calculateHistogram(data.data.map(row => row[numericColumns[0]]), 10),
+                    data: histogram.counts,
                     itemStyle: {
                         color: new echarts.graphic.LinearGradient(0, 0, 0, 1, [
                             { offset: 0, color: '#3498db' },
@@ -385,47 +516,22 @@ async function generateInitialVisualizations(data) {
         }
 
         if (numericColumns.length >= 2) {
-            // Scatter plot for first two numeric columns
-            createChart(visualizationContainer, {
-                title: {
-                    text: `${numericColumns[0]} vs ${numericColumns[1]}`,
-                    textStyle: { color: '#e9ecef' }
-                },
-                backgroundColor: 'transparent',
-                tooltip: {
-                    trigger: 'item',
-                    backgroundColor: 'rgba(30, 32, 35, 0.9)',
-                    borderColor: '#555',
-                    textStyle: { color: '#fff' }
-                },
-                xAxis: {
-                    type: 'value',
-                    name: numericColumns[0],
-                    nameTextStyle: { color: '#adb5bd' },
-                    axisLabel: { color: '#adb5bd' }
-                },
-                yAxis: {
-                    type: 'value',
-                    name: numericColumns[1],
-                    nameTextStyle: { color: '#adb5bd' },
-                    axisLabel: { color: '#adb5bd' }
-                },
-                series: [{
-                    type: 'scatter',
-                    data: data.data.map(row => [row[numericColumns[0]], row[numericColumns[1]]]),
-                    itemStyle: {
-                        color: new echarts.graphic.LinearGradient(0, 0, 0, 1, [
-                            { offset: 0, color: '#2ecc71' },
-                            { offset: 1, color: '#27ae60' }
-                        ])
-                    }
-                }]
+            // Scatter plot for first two numeric columns, sampled (or binned
+            // into a heatmap) by the server within its point budget
+            const scatter = await fetchChart(data, {
+                chart_type: 'scatter',
+                title: `${numericColumns[0]} vs ${numericColumns[1]}`,
+                x: numericColumns[0],
+                y: [numericColumns[1]]
             });
+            if (scatter) {
+                createChart(visualizationContainer, scatter.config);
+            }
         }
 
         if (categoricalColumns.length > 0) {
-            // Bar chart for categorical data
-            const categoryData = processCategories(data.data, categoricalColumns[0]);
+            // Bar chart of the most frequent categories
+            const topValues = columns[categoricalColumns[0]].top_values.slice(0, 10);
             createChart(visualizationContainer, {
                 title: {
                     text: `Distribution of ${categoricalColumns[0]}`,
@@ -440,7 +546,7 @@ async function generateInitialVisualizations(data) {
                 },
                 xAxis: {
                     type: 'category',
-                    data: categoryData.categories,
+                    data: topValues.map(entry => String(entry.value)),
                     axisLabel: {
                         color: '#adb5bd',
                         rotate: 45
@@ -452,7 +558,7 @@ async function generateInitialVisualizations(data) {
                 },
                 series: [{
                     type: 'bar',
-                    data: categoryData.counts,
+                    data: topValues.map(entry => entry.count),
                     itemStyle: {
                         color: new echarts.graphic.LinearGradient(0, 0, 0, 1, [
                             { offset: 0, color: '#9b59b6' },
@@ -519,50 +625,7 @@ function createChart(container, config) {
     });
 }
 
-// Helper functions
-function createBins(data, binCount) {
-    const validData = data.filter(v => v !== null && !isNaN(v));
-    const min = Math.min(...validData);
-    const max = Math.max(...validData);
-    const binWidth = (max - min) / binCount;
-    return Array(binCount).fill(0).map((_, i) => 
-        `${(min + i * binWidth).toFixed(1)} - ${(min + (i + 1) * binWidth).toFixed(1)}`
-    );
-}
-
-function calculateHistogram(data, binCount) {
-    const validData = data.filter(v => v !== null && !isNaN(v));
-    const min = Math.min(...validData);
-    const max = Math.max(...validData);
-    const binWidth = (max - min) / binCount;
-    const bins = Array(binCount).fill(0);
-    
-    validData.forEach(value => {
-        const binIndex = Math.min(Math.floor((value - min) / binWidth), binCount - 1);
-        bins[binIndex]++;
-    });
-    
-    return bins;
-}
-
-function processCategories(data, column) {
-    const counts = {};
-    data.forEach(row => {
-        const value = row[column];
-        counts[value] = (counts[value] || 0) + 1;
-    });
-    
-    const sorted = Object.entries(counts)
-        .sort((a, b) => b[1] - a[1])
-        .slice(0, 10); // Show top 10 categories
-    
-    return {
-        categories: sorted.map(([cat]) => cat),
-        counts: sorted.map(([_, count]) => count)
-    };
-}
-
-function updateDataStats(data) {
+async function updateDataStats(data) {
     const statsDiv = document.getElementById('dataStats');
 
     // Log the entire data object for debugging
@@ -578,38 +641,38 @@ function updateDataStats(data) {
     const summary = {
         rows: totalRows,
         columns: totalColumns,
-        memory_usage: `${(data.data.length * columnNames.length * 8 / 1024 / 1024).toFixed(2)} MB` // Rough estimate
+        memory_usage: `${(totalRows * columnNames.length * 8 / 1024 / 1024).toFixed(2)} MB` // Rough estimate
     };
 
-    const columnStats = data.column_stats || {};
-    const preview = data.data; // Use the entire dataset for preview
-
-    // Log the received data for debugging
-    console.log('Summary:', summary);
-    console.log('Column Stats:', columnStats);
-    console.log('Preview Data:', preview);
+    // Quality and column statistics come from the profile of every row
+    let profile;
+    try {
+        profile = await loadProfile(data);
+    } catch (error) {
+        console.error('Error loading dataset profile:', error);
+        statsDiv.innerHTML = '<div class="text-muted">Statistics are unavailable for this dataset.</div>';
+        return;
+    }
 
     // Calculate metrics
-    const qualityMetrics = calculateDataQuality(data);
+    const qualityMetrics = calculateDataQuality(profile);
     const distributionMetrics = calculateDistributionMetrics(data);
 
     // Log the calculated metrics
     console.log('Quality Metrics:', qualityMetrics);
     console.log('Distribution Metrics:', distributionMetrics);
 
-    // Process the actual data for better insights
     const processedStats = {};
-    Object.entries(columnStats).forEach(([column, stats]) => {
-        if (stats.type === 'numeric') {
-            const values = preview.map(row => parseFloat(row[column])).filter(v => !isNaN(v));
-            processedStats[column] = {
-                ...stats,
-                values,
-                actualStats: calculateColumnStatistics(values),
-                patterns: detectPatterns(values, column),
-                correlations: findCorrelations(column, preview, columnStats)
-            };
-        }
+    profile.numeric_columns.forEach(column => {
+        const description = profile.column_descriptions[column];
+        if (!description?.valid_count) return;
+        const actualStats = profileStatistics(description);
+        processedStats[column] = {
+            ...description,
+            actualStats,
+            patterns: detectPatterns(actualStats, description, column),
+            correlations: findCorrelations(column, profile.correlations)
+        };
     });
 
     statsDiv.innerHTML = `
@@ -829,16 +892,15 @@ function initializeStatisticalFeatures() {
 
             // Initialize charts when expanded
             if (details.classList.contains('show')) {
-                const stats = window.appState.currentData.column_stats[column];
-                const preview = window.appState.currentData.preview;
+                const description = window.appState.profile.column_descriptions[column];
                 
                 // Initialize distribution chart
                 const distributionChartId = `dist_${column.replace(/[^a-zA-Z0-9]/g, '_')}`;
-                initializeDistributionChart(distributionChartId, preview, column, stats);
+                initializeDistributionChart(distributionChartId, column, description);
                 
                 // Initialize box plot
                 const chartId = `chart_${column.replace(/[^a-zA-Z0-9]/g, '_')}`;
-                initializeBoxPlot(chartId, preview, column, stats);
+                initializeBoxPlot(chartId, column, description);
             }
         });
     });
@@ -851,14 +913,13 @@ function initializeStatisticalFeatures() {
             details.classList.add('show');
             
             // Initialize all charts
-            const stats = window.appState.currentData.column_stats[column];
-            const preview = window.appState.currentData.preview;
+            const description = window.appState.profile.column_descriptions[column];
             
             const distributionChartId = `dist_${column.replace(/[^a-zA-Z0-9]/g, '_')}`;
             const chartId = `chart_${column.replace(/[^a-zA-Z0-9]/g, '_')}`;
             
-            initializeDistributionChart(distributionChartId, preview, column, stats);
-            initializeBoxPlot(chartId, preview, column, stats);
+            initializeDistributionChart(distributionChartId, column, description);
+            initializeBoxPlot(chartId, column, description);
         });
         
         document.querySelectorAll('.expand-stats i').forEach(icon => {
@@ -868,12 +929,11 @@ function initializeStatisticalFeatures() {
     });
 }
 
-function initializeDistributionChart(chartId, preview, column, stats) {
+function initializeDistributionChart(chartId, column, description) {
     const chartDom = document.getElementById(chartId);
-    if (!chartDom) return;
+    if (!chartDom || !description?.histogram) return;
 
-    const values = preview.map(row => parseFloat(row[column])).filter(v => !isNaN(v));
-    const bins = calculateHistogramBins(values);
+    const bins = profileHistogram(description);
     
     const chart = echarts.init(chartDom);
     const option = {
@@ -922,12 +982,11 @@ function initializeDistributionChart(chartId, preview, column, stats) {
     window.addEventListener('resize', () => chart.resize());
 }
 
-function initializeBoxPlot(chartId, preview, column, stats) {
+function initializeBoxPlot(chartId, column, description) {
     const chartDom = document.getElementById(chartId);
-    if (!chartDom) return;
+    if (!chartDom || !description?.valid_count) return;
 
-    const values = preview.map(row => parseFloat(row[column])).filter(v => !isNaN(v));
-    const boxplotData = calculateBoxPlotData(values);
+    const boxplotData = profileBoxPlot(description);
     
     const chart = echarts.init(chartDom);
     const option = {
@@ -972,79 +1031,33 @@ function initializeBoxPlot(chartId, preview, column, stats) {
     window.addEventListener('resize', () => chart.resize());
 }
 
-function calculateHistogramBins(values) {
-    const binCount = Math.min(20, Math.max(5, Math.ceil(1 + 3.322 * Math.log10(values.length))));
-    const min = Math.min(...values);
-    const max = Math.max(...values);
-    const binWidth = (max - min) / binCount;
-    
-    const counts = new Array(binCount).fill(0);
-    const labels = new Array(binCount).fill(0);
-    
-    values.forEach(value => {
-        const binIndex = Math.min(Math.floor((value - min) / binWidth), binCount - 1);
-        counts[binIndex]++;
-    });
-    
-    for (let i = 0; i < binCount; i++) {
-        const start = min + i * binWidth;
-        const end = min + (i + 1) * binWidth;
-        labels[i] = `${start.toFixed(1)}-${end.toFixed(1)}`;
-    }
-    
-    return { counts, labels };
-}
-
-function calculateBoxPlotData(values) {
-    values.sort((a, b) => a - b);
-    const q1 = values[Math.floor(values.length * 0.25)];
-    const median = values[Math.floor(values.length * 0.5)];
-    const q3 = values[Math.floor(values.length * 0.75)];
-    const iqr = q3 - q1;
-    const min = Math.max(q1 - 1.5 * iqr, values[0]);
-    const max = Math.min(q3 + 1.5 * iqr, values[values.length - 1]);
-    
-    return [min, q1, median, q3, max];
-}
-
-function calculateDataQuality(data) {
-    const totalRows = data.metadata.rows || data.data.length;
-    const columnNames = data.metadata.column_names || [];
+function calculateDataQuality(profile) {
+    // Ratios are over every row, from the per-column counts in the profile
+    const totalRows = profile.total_rows || 1;
+    const columnNames = profile.columns || [];
     let completeness = 0;
     let uniqueRate = 0;
     let consistencyScore = 0;
     let outlierScore = 0;
 
     columnNames.forEach(column => {
-        const values = data.data.map(row => row[column]);
-        const nonNullValues = values.filter(value => value !== null && value !== undefined);
-        const uniqueValues = new Set(values);
+        const description = profile.column_descriptions[column] || {};
+        const nonNullCount = totalRows - (description.null_count || 0);
 
         // Calculate completeness
-        completeness += (nonNullValues.length / totalRows) * 100;
+        completeness += (nonNullCount / totalRows) * 100;
 
         // Calculate uniqueness
-        uniqueRate += (uniqueValues.size / totalRows) * 100;
+        uniqueRate += ((description.unique_values || 0) / totalRows) * 100;
 
-        // Calculate consistency
-        const isNumeric = values.every(value => !isNaN(value) || value === null || value === undefined);
-        if (isNumeric) {
+        // Calculate consistency: numeric columns parse throughout, other
+        // columns are consistent where they hold a value
+        if (description.type === 'numeric') {
             consistencyScore += 100;
+            // Calculate outliers using IQR
+            outlierScore += ((description.outlier_count || 0) / totalRows) * 100;
         } else {
-            const consistentValues = values.filter(value => typeof value === typeof values[0]);
-            consistencyScore += (consistentValues.length / totalRows) * 100;
-        }
-
-        // Calculate outliers using IQR
-        if (isNumeric) {
-            const numericValues = nonNullValues.map(Number).sort((a, b) => a - b);
-            const q1 = numericValues[Math.floor((numericValues.length / 4))];
-            const q3 = numericValues[Math.floor((numericValues.length * (3 / 4)))];
-            const iqr = q3 - q1;
-            const lowerBound = q1 - 1.5 * iqr;
-            const upperBound = q3 + 1.5 * iqr;
-            const outliers = numericValues.filter(value => value < lowerBound || value > upperBound);
-            outlierScore += (outliers.length / totalRows) * 100;
+            consistencyScore += (nonNullCount / totalRows) * 100;
         }
     });
 
@@ -1124,42 +1137,7 @@ function calculateDistributionMetrics(data) {
     return distributionMetrics;
 }
 
-function calculateColumnStatistics(values) {
-    if (!values || values.length === 0) return null;
-
-    const n = values.length;
-    const mean = values.reduce((sum, val) => sum + val, 0) / n;
-    const sortedValues = [...values].sort((a, b) => a - b);
-    const median = sortedValues[Math.floor(n / 2)];
-    
-    // Calculate variance and standard deviation
-    const squaredDiffs = values.map(val => Math.pow(val - mean, 2));
-    const variance = squaredDiffs.reduce((sum, val) => sum + val, 0) / (n - 1);
-    const stdDev = Math.sqrt(variance);
-
-    // Calculate skewness and kurtosis
-    const skewness = values.reduce((sum, val) => sum + Math.pow((val - mean) / stdDev, 3), 0) / n;
-    const kurtosis = values.reduce((sum, val) => sum + Math.pow((val - mean) / stdDev, 4), 0) / n - 3;
-
-    // Calculate quartiles
-    const q1 = sortedValues[Math.floor(n * 0.25)];
-    const q3 = sortedValues[Math.floor(n * 0.75)];
-
-    return {
-        mean,
-        median,
-        stdDev,
-        skewness,
-        kurtosis,
-        min: sortedValues[0],
-        max: sortedValues[n - 1],
-        q1,
-        q3
-    };
-}
-
-function detectPatterns(values, columnName) {
-    const stats = calculateColumnStatistics(values);
+function detectPatterns(stats, description, columnName) {
     const insights = [];
     
     // Distribution Analysis
@@ -1197,18 +1175,15 @@ function detectPatterns(values, columnName) {
         });
     }
 
-    // Outlier Analysis
-    const iqr = stats.q3 - stats.q1;
-    const lowerBound = stats.q1 - 1.5 * iqr;
-    const upperBound = stats.q3 + 1.5 * iqr;
-    const outliers = values.filter(v => v < lowerBound || v > upperBound);
-    const outlierPercentage = (outliers.length / values.length) * 100;
+    // Outlier Analysis (beyond the 1.5 IQR fences)
+    const outlierCount = description.outlier_count || 0;
+    const outlierPercentage = (outlierCount / description.valid_count) * 100;
 
-    if (outliers.length > 0) {
+    if (outlierCount > 0) {
         insights.push({
             icon: 'bi-diamond-exclamation',
             type: 'outliers',
-            text: `${outliers.length} outliers detected (${outlierPercentage.toFixed(1)}% of data), potentially affecting analysis`,
+            text: `${outlierCount.toLocaleString()} outliers detected (${outlierPercentage.toFixed(1)}% of data), potentially affecting analysis`,
             importance: outlierPercentage > 5 ? 'high' : 'medium'
         });
     }
@@ -1247,8 +1222,7 @@ function detectPatterns(values, columnName) {
     }
 
     // Zero/Missing Analysis
-    const zeroCount = values.filter(v => v === 0).length;
-    const zeroPercentage = (zeroCount / values.length) * 100;
+    const zeroPercentage = ((description.zero_count || 0) / description.valid_count) * 100;
     if (zeroPercentage > 10) {
         insights.push({
             icon: 'bi-x-circle',
@@ -1272,40 +1246,16 @@ function detectPatterns(values, columnName) {
     };
 }
 
-function findCorrelations(column, data, columnStats) {
-    const correlations = [];
-    const sourceValues = data.map(row => parseFloat(row[column])).filter(v => !isNaN(v));
-
-    Object.entries(columnStats)
-        .filter(([col, stats]) => col !== column && stats.type === 'numeric')
-        .forEach(([col, stats]) => {
-            const targetValues = data.map(row => parseFloat(row[col])).filter(v => !isNaN(v));
-            if (targetValues.length === sourceValues.length) {
-                const correlation = calculateCorrelation(sourceValues, targetValues);
-                if (Math.abs(correlation) > 0.3) { // Only show meaningful correlations
-                    correlations.push({
-                        column: col,
-                        value: correlation
-                    });
-                }
-            }
-        });
-
-    return correlations.sort((a, b) => Math.abs(b.value) - Math.abs(a.value)).slice(0, 3);
-}
-
-function calculateCorrelation(x, y) {
-    const n = x.length;
-    const sumX = x.reduce((a, b) => a + b, 0);
-    const sumY = y.reduce((a, b) => a + b, 0);
-    const sumXY = x.reduce((sum, xi, i) => sum + xi * y[i], 0);
-    const sumX2 = x.reduce((sum, xi) => sum + xi * xi, 0);
-    const sumY2 = y.reduce((sum, yi) => sum + yi * yi, 0);
+function findCorrelations(column, correlations) {
+    // Pearson correlations over every row, precomputed with the profile
+    const index = correlations.columns.indexOf(column);
+    if (index < 0) return [];
 
-    const numerator = n * sumXY - sumX * sumY;
-    const denominator = Math.sqrt((n * sumX2 - sumX * sumX) * (n * sumY2 - sumY * sumY));
-    
-    return denominator === 0 ? 0 : numerator / denominator;
+    return correlations.columns
+        .map((col, i) => ({ column: col, value: correlations.matrix[index][i] }))
+        .filter(({ column: col, value }) => col !== column && value !== null && Math.abs(value) > 0.3) // Only show meaningful correlations
+        .sort((a, b) => Math.abs(b.value) - Math.abs(a.value))
+        .slice(0, 3);
 }
 
 function determineDistributionType(skewness, kurtosis) {
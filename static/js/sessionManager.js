@@ -68,10 +68,11 @@ const sessionManager = {
 
     async loadSession(sessionId) {
         try {
-            const response = await fetch(`/load_session/${sessionId}`);
+            const response = await fetch(`/load_session/${sessionId}?format=columnar`);
             if (!response.ok) throw new Error('Failed to load session');
 
             const session = await response.json();
+            session.data = columnarCodec.sessionToRows(session.data);
             
             // Restore application state
             window.appState = {
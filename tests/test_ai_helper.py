@@ -0,0 +1,38 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.ai_helper import create_visualization
+from utils.downsampling import DEFAULT_POINT_BUDGET, SCATTER_POINT_THRESHOLD
+
+
+def _frame(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'age': rng.integers(18, 90, rows), 'balance': rng.normal(1000, 300, rows)})
+
+
+def _scatter(rows, **config):
+    chart = asyncio.run(create_visualization({'chart_type': 'scatter', **config}, _frame(rows)))
+    return chart['config']['series'][0], chart['sampling']
+
+
+@pytest.mark.parametrize('rows, kind, method, points', [
+    (500, 'scatter', 'none', 500),
+    (DEFAULT_POINT_BUDGET, 'scatter', 'none', DEFAULT_POINT_BUDGET),
+    (SCATTER_POINT_THRESHOLD - 1, 'scatter', 'sample', DEFAULT_POINT_BUDGET),
+    (SCATTER_POINT_THRESHOLD + 1, 'heatmap', 'heatmap', None),
+])
+def test_scatter_stays_within_the_point_budget(rows, kind, method, points):
+    series, sampling = _scatter(rows)
+    assert series['type'] == kind
+    assert sampling['method'] == method
+    assert len(series['data']) <= DEFAULT_POINT_BUDGET
+    if points is not None:
+        assert len(series['data']) == points
+
+
+def test_scatter_sample_honours_the_request_budget():
+    series, sampling = _scatter(3000, point_budget=100)
+    assert len(series['data']) == sampling['output_points'] == 100
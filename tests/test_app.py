@@ -0,0 +1,171 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+
+from app import app  # noqa: E402
+from utils import ai_helper  # noqa: E402
+from utils.cache_backends import FileCacheBackend  # noqa: E402
+from utils.cache_manager import OpenAICache, cache_openai_request  # noqa: E402
+from utils.columnar import decode_columnar_binary  # noqa: E402
+from utils.dataset_profile import profile_cache  # noqa: E402
+
+BANK_ROWS = 596
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    # Profiles built on upload go to a temporary directory, not the working tree
+    monkeypatch.setattr(profile_cache, 'store', FileCacheBackend(str(tmp_path)))
+    return app.test_client()
+
+
+def test_upload_returns_metadata_and_first_page(client):
+    result = client.post('/upload').get_json()
+    assert result['metadata']['rows'] == BANK_ROWS
+    assert len(result['data']) == result['page']['limit'] == 500
+    assert result['page']['next_offset'] == 500
+
+
+def test_later_pages_come_from_data_rows(client):
+    first = client.post('/upload?limit=100').get_json()
+    rest = client.get(f"/data/rows?offset={first['page']['next_offset']}&limit=5000").get_json()
+    assert len(first['data']) + len(rest['rows']) == BANK_ROWS
+    assert rest['page']['next_offset'] is None
+
+
+def test_upload_all_opts_out_of_paging(client):
+    result = client.post('/upload?all=true').get_json()
+    assert len(result['data']) == BANK_ROWS
+    assert 'page' not in result
+
+
+def test_binary_upload_decodes_to_the_json_page(client):
+    rows = client.post('/upload?limit=50').get_json()['data']
+    response = client.post('/upload?limit=50&format=binary')
+    assert response.mimetype == 'application/vnd.datalens.columnar'
+    # The frontend reads the page cursor from the binary header
+    header = json.loads(response.data[8:8 + int.from_bytes(response.data[4:8], 'little')])
+    assert header['metadata']['page']['next_offset'] == 50
+    assert decode_columnar_binary(response.data).to_dict('records') == rows
+
+
+def test_chart_spec_is_built_without_the_model(client, monkeypatch):
+    monkeypatch.setattr(ai_helper, 'get_llm_client', lambda: pytest.fail('the model was called'))
+    dataset_id = client.post('/upload?limit=1').get_json()['metadata']['dataset_id']
+    result = client.post('/visualize_data', json={
+        'spec': {'chart_type': 'scatter', 'x': 'age', 'y': ['balance']},
+        'context': {'dataset_id': dataset_id}}).get_json()
+
+    series = result['visualization']['config']['series'][0]
+    assert series['type'] == 'scatter'
+    assert len(series['data']) == BANK_ROWS
+    assert result['visualization']['config']['xAxis']['name'] == 'age'
+
+    rows_only = client.post('/visualize_data', json={
+        'spec': {'chart_type': 'scatter'}, 'context': {'data': [{'age': 1, 'balance': 2}]}})
+    assert rows_only.status_code == 400
+
+
+class ChartModel:
+    """Stub LLM client that answers the first turn with a create_visualization call."""
+
+    def __init__(self, spec):
+        self.arguments = json.dumps({'should_visualize': True, **spec})
+        self.follow_ups = []
+
+    async def create(self, **params):
+        if 'functions' in params:
+            call = SimpleNamespace(name='create_visualization', arguments=self.arguments)
+            message = SimpleNamespace(content=None, function_call=call)
+        else:
+            self.follow_ups.append(params['messages'])
+            message = SimpleNamespace(content='Here is the chart.', function_call=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def stream(self, **params):
+        if 'functions' in params:
+            # The call's name comes first, then its arguments in pieces
+            half = len(self.arguments) // 2
+            deltas = [SimpleNamespace(name='create_visualization', arguments=''),
+                      SimpleNamespace(name=None, arguments=self.arguments[:half]),
+                      SimpleNamespace(name=None, arguments=self.arguments[half:])]
+            for delta in deltas:
+                yield SimpleNamespace(choices=[SimpleNamespace(
+                    delta=SimpleNamespace(content=None, function_call=delta))])
+        else:
+            self.follow_ups.append(params['messages'])
+            for token in ('Here is ', 'the chart.'):
+                yield SimpleNamespace(choices=[SimpleNamespace(
+                    delta=SimpleNamespace(content=token, function_call=None))])
+
+
+@pytest.fixture
+def chart_model(monkeypatch, tmp_path):
+    """Install a ChartModel factory behind an isolated response cache."""
+    cache = OpenAICache(cache_dir=str(tmp_path / 'openai'), sweep_interval=0)
+    monkeypatch.setattr(ai_helper, 'openai_cache', cache)
+    monkeypatch.setattr(ai_helper, 'send_openai_request',
+                        cache_openai_request(cache)(ai_helper.send_openai_request.__wrapped__))
+
+    def install(spec):
+        model = ChartModel(spec)
+        monkeypatch.setattr(ai_helper, 'get_llm_client', lambda: model)
+        return model
+    return install
+
+
+def sse_events(response):
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        kind, data = block.split('\n')
+        events.append((kind[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def test_streamed_bar_spec_reaches_the_chart(client, chart_model):
+    model = chart_model({'chart_type': 'bar', 'title': 'Balance by job', 'x': 'job',
+                         'y': ['balance'], 'agg': 'median'})
+    dataset_id = client.post('/upload?limit=1').get_json()['metadata']['dataset_id']
+    response = client.post('/ai/analyze/stream', json={
+        'question': 'Plot balance by job', 'context': {'dataset_id': dataset_id}})
+
+    events = sse_events(response)
+    assert ''.join(data['content'] for kind, data in events if kind == 'token') == 'Here is the chart.'
+    kind, done = events[-1]
+    chart = done['response']['visualization']['config']
+    assert kind == 'done'
+    assert chart['series'][0]['type'] == 'bar'
+    assert 'management' in chart['xAxis']['data']
+    # The model hears that the chart was made, not its data
+    assert json.loads(model.follow_ups[0][-1]['content']) == {'created': True, 'title': 'Balance by job'}
+
+
+def test_heatmap_spec_reaches_the_chart(client, chart_model):
+    chart_model({'chart_type': 'heatmap', 'title': 'Age and balance', 'x': 'age', 'y': ['balance'],
+                 'bins': 8})
+    dataset_id = client.post('/upload?limit=1').get_json()['metadata']['dataset_id']
+    result = client.post('/visualize_data', json={
+        'question': 'Where do age and balance cluster?', 'context': {'dataset_id': dataset_id}}).get_json()
+
+    assert result['answer'] == 'Here is the chart.'
+    series = result['visualization']['config']['series'][0]
+    assert series['type'] == 'heatmap'
+    assert result['visualization']['config']['xAxis']['name'] == 'age'
+    assert result['visualization']['config']['yAxis']['name'] == 'balance'
+    assert len(result['visualization']['config']['xAxis']['data']) == 8
+
+
+def test_declined_spec_answers_without_a_chart(client, chart_model):
+    model = chart_model({'chart_type': 'bar', 'title': 'Nothing', 'should_visualize': False})
+    dataset_id = client.post('/upload?limit=1').get_json()['metadata']['dataset_id']
+    result = client.post('/ai/analyze', json={
+        'question': 'Describe the customers', 'context': {'dataset_id': dataset_id}}).get_json()
+
+    assert result['response'] == {'answer': 'Here is the chart.', 'visualization': None,
+                                  'web_search_used': False}
+    assert json.loads(model.follow_ups[0][-1]['content'])['created'] is False
@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from utils.cache_backends import SQLiteCacheBackend
+
+
+def _committed(db_path, key):
+    """Whether another connection, as another worker would, sees the key."""
+    with sqlite3.connect(db_path) as connection:
+        return connection.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+
+def test_lone_write_is_committed_within_the_flush_interval(tmp_path):
+    db_path = tmp_path / 'cache.db'
+    backend = SQLiteCacheBackend(db_path, flush_interval=0.1)
+    backend.flush()
+    backend.write('lone', time.time(), {'content': 'ok'})
+    assert backend.read('lone')[1] == {'content': 'ok'}
+
+    deadline = time.time() + 2
+    while not _committed(db_path, 'lone') and time.time() < deadline:
+        time.sleep(0.02)
+    assert _committed(db_path, 'lone')
+    backend.stop_flusher()
+
+
+def test_zero_interval_commits_every_write(tmp_path):
+    db_path = tmp_path / 'cache.db'
+    backend = SQLiteCacheBackend(db_path, flush_interval=0)
+    backend.write('now', time.time(), {'content': 'ok'})
+    assert _committed(db_path, 'now')
+
+
+def test_stop_flusher_commits_buffered_writes(tmp_path):
+    db_path = tmp_path / 'cache.db'
+    backend = SQLiteCacheBackend(db_path, flush_interval=60)
+    backend.write('buffered', time.time(), {'content': 'ok'})
+    assert not _committed(db_path, 'buffered')
+    backend.stop_flusher()
+    assert _committed(db_path, 'buffered')
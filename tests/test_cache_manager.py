@@ -0,0 +1,252 @@
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import ai_helper
+from utils.cache_manager import MemoryCache, OpenAICache, cache_openai_request
+
+
+class CountingModel:
+    """Stub LLM client that counts completions and can hold them open."""
+
+    def __init__(self):
+        self.calls = 0
+        self.gates = {}
+        self.failing = set()
+
+    async def create(self, **params):
+        self.calls += 1
+        question = params['messages'][-1]['content']
+        gate = self.gates.get(question)
+        if gate is not None:
+            await gate.wait()
+        else:
+            # Keep the call in flight long enough for every caller to join it
+            await asyncio.sleep(0.05)
+        message = SimpleNamespace(content=f"answer to {question}", function_call=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def stream(self, **params):
+        self.calls += 1
+        question = params['messages'][-1]['content']
+        for token in ("answer ", "to ", question):
+            await asyncio.sleep(0.02)
+            if token == question and question in self.failing:
+                raise RuntimeError("stream dropped")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+
+@pytest.fixture
+def model(monkeypatch):
+    stub = CountingModel()
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(ai_helper, 'get_llm_client', lambda: stub)
+    return stub
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = OpenAICache(cache_dir=str(tmp_path), sweep_interval=0)
+    yield cache
+    cache.stop_sweeper()
+
+
+@pytest.fixture
+def send(cache):
+    """send_openai_request bound to an isolated cache."""
+    return cache_openai_request(cache)(ai_helper.send_openai_request.__wrapped__)
+
+
+def test_concurrent_identical_requests_make_one_upstream_call(model, cache, send):
+    requests = 20
+
+    async def run():
+        return await asyncio.gather(*[send("how many rows?", context={'fingerprint': 'abc'})
+                                      for _ in range(requests)])
+
+    responses = asyncio.run(run())
+    assert model.calls == 1
+    assert cache.stats()['coalesced'] == requests - 1
+    assert all(response == responses[0] for response in responses)
+    assert responses[0]['content'] == "answer to how many rows?"
+
+    # Later callers are answered from the cache
+    asyncio.run(send("how many rows?", context={'fingerprint': 'abc'}))
+    assert model.calls == 1
+
+
+def test_followers_get_copies(model, send):
+    async def run():
+        return await asyncio.gather(send("q"), send("q"))
+
+    first, second = asyncio.run(run())
+    first['content'] = 'changed'
+    assert second['content'] == "answer to q"
+
+
+def test_different_keys_do_not_block_each_other(model, send):
+    async def run():
+        slow_gate = asyncio.Event()
+        model.gates['slow'] = slow_gate
+
+        async def fast_then_release():
+            response = await send('fast')
+            # Only released once the other key has finished on its own
+            slow_gate.set()
+            return response
+
+        return await asyncio.wait_for(asyncio.gather(send('slow'), fast_then_release()), timeout=5)
+
+    slow, fast = asyncio.run(run())
+    assert model.calls == 2
+    assert slow['content'] == "answer to slow"
+    assert fast['content'] == "answer to fast"
+
+
+def test_single_flight_shares_errors_and_frees_the_key(cache):
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        return await asyncio.gather(*[cache.single_flight('key', failing) for _ in range(5)],
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def succeeding():
+        return {'content': 'ok'}
+
+    assert asyncio.run(cache.single_flight('key', succeeding)) == {'content': 'ok'}
+
+
+@pytest.fixture
+def stream(monkeypatch, cache):
+    """stream_openai_request bound to an isolated cache."""
+    monkeypatch.setattr(ai_helper, 'openai_cache', cache)
+
+    async def collect(question):
+        tokens = []
+        async for kind, value in ai_helper.stream_openai_request(question):
+            if kind == 'token':
+                tokens.append(value)
+        return ''.join(tokens)
+    return collect
+
+
+def test_concurrent_identical_streams_make_one_upstream_call(model, cache, stream):
+    async def run():
+        return await asyncio.gather(*[stream("q") for _ in range(10)])
+
+    assert asyncio.run(run()) == ["answer to q"] * 10
+    assert model.calls == 1
+    assert cache.stats()['coalesced'] == 9
+
+
+def test_streams_join_a_blocking_request_in_flight(model, cache, stream, send):
+    async def run():
+        return await asyncio.gather(send("q"), stream("q"))
+
+    blocking, streamed = asyncio.run(run())
+    assert model.calls == 1
+    assert streamed == blocking['content'] == "answer to q"
+
+
+def test_follower_streams_itself_when_the_leader_disconnects(model, cache, stream):
+    async def run():
+        # Lead the flight, then disconnect once a follower has joined it
+        events = ai_helper.stream_openai_request("q")
+        await events.__anext__()
+        follower = asyncio.ensure_future(stream("q"))
+        while cache.stats()['coalesced'] == 0:
+            await asyncio.sleep(0.001)
+        await events.aclose()
+        return await follower
+
+    assert asyncio.run(run()) == "answer to q"
+    assert model.calls == 2
+
+
+def test_followers_share_upstream_failures(model, stream):
+    model.failing.add("q")
+
+    async def run():
+        return await asyncio.gather(stream("q"), stream("q"), return_exceptions=True)
+
+    first, second = asyncio.run(run())
+    assert isinstance(first, RuntimeError) and isinstance(second, RuntimeError)
+    # The follower retries once on its own call and meets the same failure
+    assert model.calls == 2
+
+
+def _sweepers():
+    return [thread for thread in threading.enumerate() if thread.name == 'openai-cache-sweeper']
+
+
+def test_memory_tier_evicts_least_recently_used_within_budget():
+    memory = MemoryCache(max_bytes=30)
+    expires_at = time.time() + 60
+    memory.set('a', '"aaaaaaaa"', expires_at)
+    memory.set('b', '"bbbbbbbb"', expires_at)
+    memory.get('a')
+    memory.set('c', '"cccccccc"', expires_at)
+    memory.set('d', '"dddddddd"', expires_at)
+    assert memory.get('b') is None
+    assert memory.get('a') == 'aaaaaaaa'
+    assert memory.stats()['bytes'] <= 30
+    memory.set('old', '"x"', time.time() - 1)
+    assert memory.get('old') is None
+    assert memory.stats()['expirations'] == 1
+
+
+def test_sweeper_starts_on_first_write_and_stops(tmp_path):
+    before = len(_sweepers())
+    cache = OpenAICache(cache_dir=str(tmp_path), sweep_interval=60)
+    assert len(_sweepers()) == before
+
+    asyncio.run(cache.set_by_key('key', {'content': 'ok'}))
+    asyncio.run(cache.set_by_key('other', {'content': 'ok'}))
+    assert len(_sweepers()) == before + 1
+
+    cache.stop_sweeper()
+    assert len(_sweepers()) == before
+    # A stopped cache does not start another sweeper
+    asyncio.run(cache.set_by_key('later', {'content': 'ok'}))
+    assert len(_sweepers()) == before
+
+
+def test_sweep_expires_old_entries_and_caps_disk(tmp_path):
+    cache = OpenAICache(cache_dir=str(tmp_path), ttl=60, max_disk_bytes=10_000, sweep_interval=0)
+    for index in range(20):
+        cache.backend.write(f"key{index}", time.time(), {'content': 'x' * 1000})
+    cache.backend.write('stale', time.time() - 120, {'content': 'old'})
+    os.utime(tmp_path / 'stale.json', (time.time() - 120, time.time() - 120))
+
+    result = cache.sweep()
+    assert result['expired'] == 1
+    assert result['evicted'] > 0
+    assert result['disk_bytes'] <= 10_000
+
+
+def test_fingerprint_stands_in_for_the_rows(tmp_path):
+    cache = OpenAICache(cache_dir=str(tmp_path))
+    rows = [{'amount': i} for i in range(1000)]
+
+    def key(**context):
+        return cache.cache_key('question', model='gpt-4o', context=context)
+
+    with_rows = key(fingerprint='fp', dataset_id='a', data=rows, data_info={'total_rows': 1000})
+    assert with_rows == key(fingerprint='fp', dataset_id='b', data=rows[:10])
+    assert with_rows != key(fingerprint='other', data=rows)
+    assert with_rows != key(fingerprint='fp', chat_history=['earlier'])
+    assert key(data=rows) != key(data=rows[:10])
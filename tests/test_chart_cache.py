@@ -0,0 +1,71 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.ai_helper import create_visualization
+from utils.chart_cache import chart_cache, normalize_spec
+from utils.dataset_registry import DatasetRegistry
+from utils.downsampling import DEFAULT_HISTOGRAM_BINS, MAX_HISTOGRAM_BINS
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    chart_cache.clear()
+    yield pd.DataFrame({'age': rng.integers(18, 90, 5000), 'balance': rng.normal(1000, 300, 5000)})
+    chart_cache.clear()
+
+
+def _bars(config, df):
+    chart = asyncio.run(create_visualization(config, df, fingerprint='frame'))
+    return len(chart['config']['series'][0]['data'])
+
+
+def test_histogram_bins_are_part_of_the_key(frame):
+    assert _bars({'chart_type': 'histogram', 'x': 'balance'}, frame) == DEFAULT_HISTOGRAM_BINS
+    assert _bars({'chart_type': 'histogram', 'x': 'balance', 'bins': 50}, frame) == 50
+    assert _bars({'chart_type': 'histogram', 'x': 'balance', 'bins': 30}, frame) == 30
+
+
+def test_histogram_bins_are_clamped_like_the_key(frame):
+    assert _bars({'chart_type': 'histogram', 'x': 'balance', 'bins': 300}, frame) == MAX_HISTOGRAM_BINS
+    assert normalize_spec({'chart_type': 'histogram', 'bins': 300}) == \
+        normalize_spec({'chart_type': 'histogram', 'bins': 250})
+
+
+def test_bins_follow_the_chart_type():
+    assert normalize_spec({'chart_type': 'histogram'})['bins'] == [DEFAULT_HISTOGRAM_BINS]
+    assert normalize_spec({'chart_type': 'heatmap', 'bins': 10})['bins'] == [10, 10]
+    # Charts without bins share an entry whatever bins says
+    assert normalize_spec({'chart_type': 'bar', 'bins': 10}) == normalize_spec({'chart_type': 'bar'})
+
+
+def test_repeat_charts_are_served_from_the_cache(frame):
+    config = {'chart_type': 'line', 'x': 'age', 'y': 'balance', 'title': 'First'}
+    first = asyncio.run(create_visualization(config, frame, fingerprint='frame'))
+    again = asyncio.run(create_visualization({**config, 'y': ['balance'], 'title': 'Second'},
+                                             frame, fingerprint='frame'))
+
+    assert chart_cache.stats()['hits'] == 1
+    assert again['config']['series'] == first['config']['series']
+    assert again['config']['title']['text'] == 'Second'
+    assert first['config']['title']['text'] == 'First'
+
+
+def test_charts_are_dropped_with_their_content(frame):
+    registry = DatasetRegistry()
+    dataset_id = registry.register(frame)
+    registry.register(frame.copy(), 'copy')
+    fingerprint = registry.fingerprint(dataset_id)
+    config = {'chart_type': 'bar', 'x': 'age', 'y': 'balance'}
+    asyncio.run(create_visualization(config, frame, fingerprint=fingerprint))
+
+    # Another id still holds the same content, so its charts stay
+    registry.register(frame.head(10), dataset_id)
+    assert chart_cache.get(fingerprint, config) is not None
+
+    registry.remove('copy')
+    assert chart_cache.get(fingerprint, config) is None
+    assert chart_cache.stats()['invalidations'] == 1
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.compaction import compact_dataframe
+from utils.data_processor import process_data
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(10)
+    n = 2000
+    return pd.DataFrame({
+        'small_int': rng.integers(0, 100, n),
+        'big_int': rng.integers(0, 2 ** 40, n),
+        'halves': rng.integers(0, 200, n) / 2,
+        'noisy': rng.normal(0, 1, n),
+        'city': rng.choice(['paris', 'oslo', 'lima'], n).astype(object),
+        'answer': rng.choice(['yes', 'no'], n).astype(object),
+        'flag': pd.Series(rng.random(n) > 0.5, dtype=object),
+        'id': [f'row-{i}' for i in range(n)],
+    })
+
+
+def test_compaction_keeps_every_value(frame):
+    compact, report = compact_dataframe(frame)
+
+    pd.testing.assert_frame_equal(compact, frame, check_dtype=False, check_categorical=False)
+    assert compact['small_int'].dtype == np.int8
+    assert compact['big_int'].dtype == np.int64
+    assert compact['halves'].dtype == np.float32
+    assert compact['noisy'].dtype == np.float64
+    assert isinstance(compact['city'].dtype, pd.CategoricalDtype)
+    assert isinstance(compact['answer'].dtype, pd.CategoricalDtype)
+    assert compact['flag'].dtype == bool
+    assert 'id' not in report['conversions']
+    assert report['memory_after'] < report['memory_before']
+
+
+def test_compact_processing_reports_the_same_statistics(frame):
+    plain = process_data(frame.copy())
+    compacted = process_data(frame.copy(), compact=True)
+
+    for column in ('small_int', 'big_int', 'halves', 'noisy'):
+        assert compacted['column_stats'][column] == pytest.approx(plain['column_stats'][column])
+    assert compacted['column_stats']['city'] == plain['column_stats']['city']
+    assert compacted['summary']['memory_usage_before'] == plain['summary']['memory_usage']
+    assert compacted['summary']['dtype_conversions']['small_int'] == 'int64 -> int8'
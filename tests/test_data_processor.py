@@ -0,0 +1,120 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_parallel_profile import synthetic_frame
+from utils import data_processor
+from utils.data_processor import (analyze_columns_with_ai, chunk_process_data, column_analysis_cache,
+                                  process_data, stream_process_csv)
+from utils.llm_client import set_llm_client
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """Record the worker count of every process pool chunk_process_data starts."""
+    sizes = []
+    parallel_summarize = data_processor.parallel_summarize
+
+    def recording(df, chunk_size, workers=None):
+        sizes.append(workers)
+        return parallel_summarize(df, chunk_size, workers)
+
+    monkeypatch.setattr(data_processor, 'parallel_summarize', recording)
+    return sizes
+
+
+def test_profile_workers_opts_into_a_pool(monkeypatch, pools):
+    monkeypatch.setattr(data_processor, 'DEFAULT_WORKERS', 2)
+    df = synthetic_frame(4000)
+    parallel = chunk_process_data(df.copy(), chunk_size=1000, include_data=False)
+    serial = chunk_process_data(df.copy(), chunk_size=1000, workers=1, include_data=False)
+    assert pools == [2]
+    assert parallel['column_stats'] == serial['column_stats']
+
+
+def test_single_chunk_stays_in_process(monkeypatch, pools):
+    monkeypatch.setattr(data_processor, 'DEFAULT_WORKERS', 4)
+    chunk_process_data(synthetic_frame(500), chunk_size=1000, include_data=False)
+    assert pools == []
+
+
+def test_workers_default_to_in_process(pools):
+    chunk_process_data(synthetic_frame(4000), chunk_size=1000, include_data=False)
+    assert pools == []
+
+
+def test_streamed_csv_matches_in_memory_profile(tmp_path):
+    rng = np.random.default_rng(5)
+    value = rng.normal(50, 10, 3000)
+    value[::7] = np.nan
+    df = pd.DataFrame({
+        'value': value,
+        'count': rng.integers(0, 100, 3000),
+        'group': rng.choice(['a', 'b', 'c'], 3000),
+    })
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+
+    expected = process_data(pd.read_csv(path))
+    streamed = stream_process_csv(str(path), chunk_size=500)
+
+    summary = {k: v for k, v in streamed['summary'].items() if k != 'chunks_processed'}
+    assert summary == expected['summary']
+    assert streamed['column_stats']['group'] == expected['column_stats']['group']
+    for column in ('value', 'count'):
+        assert streamed['column_stats'][column] == pytest.approx(expected['column_stats'][column])
+
+
+class ColumnModel:
+    """Stub LLM client answering column batches, except for columns it is told to skip."""
+
+    def __init__(self, skip=()):
+        self.skip = set(skip)
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, **params):
+        prompt = params['messages'][-1]['content']
+        names = [json.loads(line[2:].split(': ', 1)[0]) for line in prompt.splitlines()
+                 if line.startswith('- "')]
+        self.batches.append(names)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        columns = {name: {'data_type': 'categorical-nominal', 'format_pattern': None,
+                          'cleaning_strategy': 'trim'}
+                   for name in names if name not in self.skip}
+        message = SimpleNamespace(content=json.dumps({'columns': columns}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def column_model():
+    model = ColumnModel(skip={'c4'})
+    column_analysis_cache.clear()
+    previous = set_llm_client(model)
+    yield model
+    set_llm_client(previous)
+    column_analysis_cache.clear()
+
+
+def test_columns_are_analyzed_in_batches_and_memoized(column_model):
+    samples = {f"c{index}": [f"v{index}", index] for index in range(7)}
+
+    first = asyncio.run(analyze_columns_with_ai(samples, batch_size=2, concurrency=2))
+    assert sorted(map(len, column_model.batches)) == [1, 2, 2, 2]
+    assert column_model.peak == 2
+    assert first['c0'] == {'type': 'categorical-nominal', 'format': None, 'cleaning_strategy': 'trim'}
+    assert first['c4'] == {'type': 'unknown', 'format': None, 'cleaning_strategy': None}
+
+    column_model.batches.clear()
+    second = asyncio.run(analyze_columns_with_ai(samples, batch_size=2, concurrency=2))
+    # Only the column the model could not analyze is asked about again
+    assert column_model.batches == [['c4']]
+    assert second == first
@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+
+from utils.dataset_cache import DatasetCache, DatasetEntry
+
+
+def loader(calls):
+    def load(path, fingerprint):
+        calls.append(path)
+        df = pd.read_csv(path)
+        return DatasetEntry(fingerprint, path, df, {'rows': len(df)}, b'{}')
+    return load
+
+
+def write_csv(path, rows):
+    pd.DataFrame({'value': range(rows)}).to_csv(path, index=False)
+
+
+def test_repeat_loads_reuse_the_parsed_frame(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    write_csv(path, 5)
+    cache, calls = DatasetCache(), []
+
+    first = cache.get_or_load(path, loader(calls))
+    assert cache.get_or_load(path, loader(calls)) is first
+    assert calls == [path]
+    assert first.etag == cache.fingerprint(path)
+
+
+def test_editing_the_file_replaces_the_stale_entry(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    write_csv(path, 5)
+    cache, calls = DatasetCache(), []
+    first = cache.get_or_load(path, loader(calls))
+
+    write_csv(path, 7)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = cache.get_or_load(path, loader(calls))
+
+    assert second.etag != first.etag
+    assert second.metadata['rows'] == 7
+    assert cache.get(first.fingerprint) is None
+
+
+def test_least_recently_used_file_is_evicted(tmp_path):
+    paths = [str(tmp_path / f"data{index}.csv") for index in range(3)]
+    for path in paths:
+        write_csv(path, 3)
+    cache, calls = DatasetCache(max_entries=2), []
+
+    first = cache.get_or_load(paths[0], loader(calls))
+    second = cache.get_or_load(paths[1], loader(calls))
+    cache.get(first.fingerprint)
+    cache.get_or_load(paths[2], loader(calls))
+
+    assert cache.get(first.fingerprint) is first
+    assert cache.get(second.fingerprint) is None
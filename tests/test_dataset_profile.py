@@ -0,0 +1,91 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import dataset_profile
+from utils.dataset_profile import ProfileCache
+
+
+def frame(seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'value': rng.normal(size=200), 'group': rng.choice(list('abc'), 200)})
+
+
+def test_profiles_survive_a_restart(tmp_path):
+    df = frame(0)
+    built = ProfileCache(profile_dir=str(tmp_path)).get_or_build(df, 'fp')
+    assert ProfileCache(profile_dir=str(tmp_path)).get('fp') == built
+
+
+def test_profile_directory_is_capped(tmp_path):
+    cache = ProfileCache(profile_dir=str(tmp_path))
+    cache.get_or_build(frame(0), 'first')
+    size = (tmp_path / 'first.json').stat().st_size
+    # Room for two profiles, so each write evicts the oldest
+    cache.max_disk_bytes = 2 * size + size // 2
+    for index in range(1, 5):
+        cache.get_or_build(frame(index), f"fp{index}")
+        assert sum(path.stat().st_size for path in tmp_path.glob('*.json')) <= cache.max_disk_bytes
+    assert (tmp_path / 'fp4.json').exists()
+
+
+def test_stale_profiles_are_swept_on_write(tmp_path):
+    cache = ProfileCache(profile_dir=str(tmp_path), ttl=60)
+    cache.get_or_build(frame(0), 'stale')
+    old = time.time() - 120
+    os.utime(tmp_path / 'stale.json', (old, old))
+    cache.get_or_build(frame(1), 'fresh')
+    assert sorted(path.stem for path in tmp_path.glob('*.json')) == ['fresh']
+
+
+def test_numeric_profile_matches_the_rows():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'value': np.round(rng.lognormal(size=5000)) - 1,
+                       'other': rng.normal(size=5000)})
+    df['double'] = df['value'] * 2 + rng.normal(scale=0.1, size=5000)
+    profile = ProfileCache(profile_dir=None).get_or_build(df)
+    column = profile['column_descriptions']['value']
+
+    values = df['value'].to_numpy()
+    standardized = (values - values.mean()) / values.std(ddof=1)
+    assert np.isclose(column['skewness'], np.mean(standardized ** 3))
+    assert np.isclose(column['kurtosis'], np.mean(standardized ** 4) - 3)
+    assert column['zero_count'] == int((values == 0).sum())
+    q1, q3 = np.quantile(values, [0.25, 0.75])
+    outside = (values < q1 - 1.5 * (q3 - q1)) | (values > q3 + 1.5 * (q3 - q1))
+    assert column['outlier_count'] == int(outside.sum())
+
+    correlations = profile['correlations']
+    assert correlations['columns'] == ['value', 'other', 'double']
+    assert np.allclose(correlations['matrix'], df.corr().to_numpy())
+
+
+def test_constant_columns_have_no_correlation():
+    df = pd.DataFrame({'constant': [1.0] * 10, 'value': np.arange(10.0)})
+    matrix = ProfileCache(profile_dir=None).get_or_build(df)['correlations']['matrix']
+    assert matrix[0] == [None, None]
+    assert matrix[1][1] == 1.0
+
+
+def test_profiles_are_memoized_by_content(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    builds = []
+    build_profile = dataset_profile.build_profile
+
+    def counting(df, schema_key=None):
+        builds.append(schema_key)
+        return build_profile(df, schema_key)
+
+    monkeypatch.setattr(dataset_profile, 'build_profile', counting)
+    cache = ProfileCache()
+
+    profile = cache.get_or_build(frame(0))
+    assert cache.get_or_build(frame(0).copy()) is profile
+    assert profile['total_rows'] == 200
+    assert profile['numeric_columns'] == ['value']
+    assert profile['categorical_columns'] == ['group']
+
+    assert cache.get_or_build(frame(1)) is not profile
+    assert len(builds) == 2
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from utils.dataset_registry import DatasetRegistry
+
+
+def frame(rows, seed=0):
+    return pd.DataFrame({'value': np.random.default_rng(seed).normal(size=rows)})
+
+
+def test_frames_are_evicted_least_recently_used_within_the_byte_budget():
+    size = int(frame(1000).memory_usage(deep=True).sum())
+    registry = DatasetRegistry(max_bytes=2 * size)
+    registry.register(frame(1000, 1), 'a')
+    registry.register(frame(1000, 2), 'b')
+    registry.get('a')
+    registry.register(frame(1000, 3), 'c')
+
+    assert registry.get('b') is None
+    assert registry.get('a') is not None and registry.get('c') is not None
+    assert registry.stats() == {'datasets': 2, 'bytes': 2 * size, 'max_bytes': 2 * size, 'evictions': 1}
+
+
+def test_the_newest_frame_is_kept_even_over_budget():
+    registry = DatasetRegistry(max_bytes=1)
+    df = frame(1000)
+    dataset_id = registry.register(df)
+    assert registry.get(dataset_id) is df
+
+
+def test_reregistering_replaces_the_frame_and_its_size():
+    registry = DatasetRegistry()
+    small, large = frame(10), frame(1000)
+    registry.register(small, 'a')
+    registry.register(small, 'a')
+    registry.register(large, 'a')
+
+    assert registry.get('a') is large
+    assert registry.stats()['bytes'] == int(large.memory_usage(deep=True).sum())
+    registry.remove('a')
+    assert registry.stats()['datasets'] == registry.stats()['bytes'] == 0
@@ -0,0 +1,53 @@
+import numpy as np
+
+from utils.downsampling import OTHER_LABEL, aggregate_top_n, downsample_series, lttb_indices
+
+
+def smooth(n, spike_at=None):
+    y = np.sin(np.linspace(0, 20, n))
+    if spike_at is not None:
+        y[spike_at] = 50.0
+    return y
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    y = smooth(100000, spike_at=41234)
+    kept = lttb_indices(np.arange(len(y)), y, 500)
+
+    assert len(kept) == 500
+    assert kept[0] == 0 and kept[-1] == len(y) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert 41234 in kept
+
+
+def test_lttb_returns_every_point_under_the_threshold():
+    assert np.array_equal(lttb_indices(np.arange(10), smooth(10), 20), np.arange(10))
+
+
+def test_series_share_the_budget_and_keep_their_own_peaks():
+    first, second = smooth(50000, spike_at=1000), smooth(50000, spike_at=30000)
+    kept = downsample_series(None, [first, second], budget=1000)
+
+    assert len(kept) <= 1000
+    assert np.all(np.diff(kept) > 0)
+    assert {1000, 30000} <= set(kept.tolist())
+
+
+def test_small_category_sets_keep_their_order():
+    labels, totals = aggregate_top_n(['b', 'a', 'b', None], [[1.0, 2.0, 3.0, 100.0]], max_categories=3)
+    assert labels == ['b', 'a']
+    assert totals == [[4.0, 2.0]]
+
+
+def test_long_tails_fold_into_other():
+    keys = np.repeat([f"k{index}" for index in range(20)], 5)
+    values = np.repeat(np.arange(20, dtype=np.float64), 5)
+    counts = np.ones(len(keys))
+    values[0] = np.nan
+
+    labels, (sums, tallies) = aggregate_top_n(keys, [values, counts], max_categories=4)
+
+    assert labels == ['k19', 'k18', 'k17', OTHER_LABEL]
+    assert sums[:3] == [95.0, 90.0, 85.0]
+    assert sum(sums) == np.nansum(values)
+    assert tallies == [5.0, 5.0, 5.0, 85.0]
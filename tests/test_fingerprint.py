@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from utils.dataset_registry import DatasetRegistry
+from utils.fingerprint import dataframe_fingerprint
+
+
+def frame():
+    return pd.DataFrame({'amount': [1.5, 2.5, np.nan], 'city': ['paris', 'oslo', None]})
+
+
+def test_equal_content_has_the_same_fingerprint():
+    assert dataframe_fingerprint(frame()) == dataframe_fingerprint(frame().copy())
+    # The index is not part of the content
+    assert dataframe_fingerprint(frame()) == dataframe_fingerprint(frame().set_axis([7, 8, 9]))
+
+
+def test_any_change_alters_the_fingerprint():
+    base = dataframe_fingerprint(frame())
+    changed_value = frame()
+    changed_value.loc[2, 'city'] = 'lima'
+    variants = [
+        changed_value,
+        frame().rename(columns={'city': 'town'}),
+        frame().astype({'amount': 'float32'}),
+        frame()[['city', 'amount']],
+        frame().head(2),
+    ]
+    fingerprints = {dataframe_fingerprint(df) for df in variants}
+    assert base not in fingerprints
+    assert len(fingerprints) == len(variants)
+
+
+def test_registry_fingerprints_each_frame_once():
+    registry = DatasetRegistry()
+    first = registry.register(frame())
+    second = registry.register(frame())
+    assert registry.fingerprint(first) == registry.fingerprint(second) == dataframe_fingerprint(frame())
+    assert registry.fingerprint('missing') is None
@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+
+from utils.json_provider import DataJSONProvider
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def app(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(DataJSONProvider, 'use_orjson', False)
+    elif not DataJSONProvider.use_orjson:
+        pytest.skip('orjson is not installed')
+    app = Flask(__name__)
+    app.json = DataJSONProvider(app)
+    return app
+
+
+def test_frames_are_spliced_as_records(app):
+    frame = pd.DataFrame({
+        'when': pd.to_datetime(['2024-01-01', None]),
+        'amount': [1.5, np.nan],
+        'name': ['a', 'b'],
+    })
+    payload = {
+        'data': frame,
+        'column': frame['amount'],
+        'values': np.array([1, 2, 3]),
+        'stats': {'count': np.int64(2), 'mean': np.float64(1.5), 'missing': np.float64('nan'),
+                  'flag': np.bool_(True)},
+        'label': 'x "__frame_0__" y',
+    }
+    with app.app_context():
+        body = json.loads(app.json.dumps(payload))
+        assert json.loads(app.json.dumps_bytes(payload)) == body
+
+    assert body['data'] == [
+        {'when': '2024-01-01T00:00:00.000', 'amount': 1.5, 'name': 'a'},
+        {'when': None, 'amount': None, 'name': 'b'},
+    ]
+    assert body['column'] == [1.5, None]
+    assert body['values'] == [1, 2, 3]
+    assert body['stats'] == {'count': 2, 'mean': 1.5, 'missing': None, 'flag': True}
+    assert body['label'] == 'x "__frame_0__" y'
+
+
+def test_jsonify_responses_use_the_provider(app):
+    @app.route('/frame')
+    def frame():
+        return {'rows': pd.DataFrame({'b': [1], 'a': [2]}), 'total': np.int64(3)}
+
+    response = app.test_client().get('/frame')
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {'rows': [{'a': 2, 'b': 1}], 'total': 3}
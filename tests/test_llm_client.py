@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from flask import Flask
+
+from utils import llm_client
+from utils.llm_client import LLMClient, get_llm_client, set_llm_client
+
+
+def _status_error(error_class, status):
+    request = httpx.Request('POST', 'http://llm.test/v1/chat/completions')
+    return error_class(f"status {status}", response=httpx.Response(status, request=request), body=None)
+
+
+class FakeCompletions:
+    """Stand-in for ``chat.completions`` that fails on cue and tracks concurrency."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.active -= 1
+        message = SimpleNamespace(content=f"answer {params['messages'][-1]['content']}", function_call=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeLLMClient(LLMClient):
+    """LLMClient whose pooled HTTP client is replaced by ``FakeCompletions``."""
+
+    def __init__(self, completions, **kwargs):
+        super().__init__(api_key='test', **kwargs)
+        self.completions = completions
+
+    async def _setup(self):
+        await super()._setup()
+        await self._client.close()
+        self._client = SimpleNamespace(chat=SimpleNamespace(completions=self.completions),
+                                       close=self._noop)
+
+    async def _noop(self):
+        return None
+
+
+@pytest.fixture
+def install(monkeypatch):
+    """Install a fake client as the process-wide one, restoring the original after."""
+    installed = []
+
+    def install_client(completions, **kwargs):
+        client = FakeLLMClient(completions, **kwargs)
+        installed.append((client, set_llm_client(client)))
+        return client
+
+    yield install_client
+    for client, previous in reversed(installed):
+        set_llm_client(previous)
+        client.close()
+
+
+def _ask(question):
+    return get_llm_client().create(model='test', messages=[{'role': 'user', 'content': question}])
+
+
+def test_semaphore_caps_requests_in_flight(install):
+    completions = FakeCompletions()
+    install(completions, max_concurrency=3)
+
+    async def run():
+        return await asyncio.gather(*[_ask(str(i)) for i in range(12)])
+
+    responses = asyncio.run(run())
+    assert len(responses) == 12
+    assert completions.peak == 3
+
+
+def test_transient_errors_are_retried_with_jittered_backoff(install, monkeypatch):
+    delays = []
+
+    def uniform(low, high):
+        delays.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr(llm_client, 'random', SimpleNamespace(uniform=uniform))
+    completions = FakeCompletions([_status_error(openai.RateLimitError, 429),
+                                   _status_error(openai.InternalServerError, 503)])
+    install(completions, backoff=0.5, max_retries=3)
+
+    response = asyncio.run(_ask('q'))
+    assert response.choices[0].message.content == 'answer q'
+    assert completions.calls == 3
+    # Full jitter: uniform between 0 and the doubling exponential cap
+    assert delays == [(0, 0.5), (0, 1.0)]
+
+
+def test_client_errors_are_not_retried(install):
+    completions = FakeCompletions([_status_error(openai.BadRequestError, 400)])
+    install(completions, backoff=0.001)
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(_ask('q'))
+    assert completions.calls == 1
+
+
+def test_retries_give_up_after_max_retries(install):
+    completions = FakeCompletions([_status_error(openai.RateLimitError, 429)] * 3)
+    install(completions, backoff=0.001, max_retries=2)
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(_ask('q'))
+    assert completions.calls == 3
+
+
+def test_run_sync_from_a_synchronous_flask_handler(install):
+    completions = FakeCompletions()
+    install(completions, max_concurrency=2)
+    app = Flask(__name__)
+
+    @app.route('/sync')
+    def sync_handler():
+        async def both():
+            return await asyncio.gather(_ask('a'), _ask('b'))
+        responses = get_llm_client().run_sync(both())
+        return {'answers': [response.choices[0].message.content for response in responses]}
+
+    result = app.test_client().get('/sync').get_json()
+    assert result == {'answers': ['answer a', 'answer b']}
+    assert completions.calls == 2
@@ -0,0 +1,71 @@
+import re
+
+import pandas as pd
+import pytest
+
+from utils.dataset_profile import build_profile
+from utils.local_analytics import answer_locally
+
+# Question -> text the local answer must contain, or None when it must go to the model.
+# Expected numbers were checked against plain pandas on the bundled bank data.
+CASES = [
+    ("how many rows are there", "The dataset has 596 rows."),
+    ("how many customers have no loan", "518 of 596 rows match (where loan = no)."),
+    ("how many customers are single", "126 of 596 rows match (where marital = single)."),
+    ("how many customers are retired", "30 of 596 rows match (where job = retired)."),
+    ("how many customers with housing", "514 of 596 rows match (where housing = yes)."),
+    ("how many distinct jobs", "There are 12 distinct values of job."),
+    ("how many unique education values", "There are 4 distinct values of education."),
+    ("what is the average age", "The average age is 43.79."),
+    ("what is the oldest age", "The maximum age is 61."),
+    ("median and max balance", "The median balance is 161.50; the maximum balance is 45,248."),
+    ("average balance of customers without a loan", "The average balance is 620.44 (where loan = no)."),
+    ("average balance of customers with a loan", "The average balance is 523.01 (where loan = yes)."),
+    ("average balance of married customers", "The average balance is 522.87 (where marital = married)."),
+    ("average age of people without housing", "The average age is 47.56 (where housing = no)."),
+    ("what percentage have a loan", "13.1% of rows have yes for loan."),
+    ("share of customers with no housing", "13.8% of rows have no for housing."),
+    ("what percentage of customers are married", "63.4% of rows have marital = married."),
+    ("average balance by job", "Average balance by job: job average balance management 1,076.89"),
+    ("top 3 jobs by average balance", "Top 3 job by average balance: job average balance management 1,076.89"),
+    ("count by marital", "Count by marital: marital count married 378 single 126 divorced 92"),
+    # Qualifiers the router cannot parse
+    ("how many people are in their thirties", None),
+    ("how many customers didn't take a loan", None),
+    ("max balance of customers who are not students", None),
+    ("how many customers are older than forty", None),
+    ("average balance for customers over 50", None),
+    # Several yes/no columns: "housing loan" names one column, not two filters
+    ("average balance of people with no housing loan", None),
+    ("what percentage have a housing loan", None),
+    # Several categorical values
+    ("how many students are married", None),
+    ("average age of married students", None),
+    # Open-ended questions
+    ("explain why balance differs by job", None),
+    ("show me a chart of balance by job", None),
+]
+
+
+@pytest.fixture(scope='module')
+def bank():
+    """The bundled dataset with the column split the app derives for it."""
+    df = pd.read_csv('data/BankCustomerData2.csv', encoding='utf-8')
+    profile = build_profile(df)
+    return df, profile['numeric_columns'], profile['categorical_columns']
+
+
+def _text(answer: str) -> str:
+    """An HTML answer as plain text with collapsed whitespace."""
+    return ' '.join(re.sub(r'<[^>]+>', ' ', answer).split()).replace(' .', '.').replace(' ;', ';')
+
+
+@pytest.mark.parametrize('question, expected', CASES)
+def test_answer_locally(bank, question, expected):
+    df, numeric_columns, categorical_columns = bank
+    result = answer_locally(question, df, numeric_columns, categorical_columns)
+    if expected is None:
+        assert result is None
+    else:
+        assert result is not None
+        assert expected in _text(result['answer'])
@@ -0,0 +1,87 @@
+import pytest
+
+from utils import prompt_builder
+from utils.prompt_builder import (CHARS_PER_TOKEN, PROFILE_SHARE, build_prompt, compact_history,
+                                  count_tokens, truncate_to_tokens)
+
+
+@pytest.fixture
+def unloadable_encoding(monkeypatch):
+    """tiktoken installed but unable to fetch its encoding file, as on an offline host."""
+    class Offline:
+        @staticmethod
+        def encoding_for_model(model):
+            raise ConnectionError("encoding file unavailable")
+
+    monkeypatch.setattr(prompt_builder, 'tiktoken', Offline)
+    prompt_builder._encoding.cache_clear()
+    yield
+    prompt_builder._encoding.cache_clear()
+
+
+def test_counts_fall_back_to_the_heuristic(unloadable_encoding):
+    text = 'x' * (10 * CHARS_PER_TOKEN)
+    assert count_tokens(text) == 10
+    assert truncate_to_tokens(text, 5) == 'x' * (4 * CHARS_PER_TOKEN) + '…'
+
+
+def test_exact_counts_with_tiktoken():
+    tiktoken = pytest.importorskip('tiktoken')
+    try:
+        encoding = tiktoken.get_encoding('o200k_base')
+    except Exception:
+        pytest.skip("tiktoken encoding file unavailable")
+    prompt_builder._encoding.cache_clear()
+    text = "Average balance by job, top 3"
+    assert count_tokens(text, 'gpt-4o') == len(encoding.encode(text))
+
+
+@pytest.fixture
+def heuristic(monkeypatch):
+    """Count tokens with the character heuristic so budgets are deterministic."""
+    monkeypatch.setattr(prompt_builder, 'tiktoken', None)
+    prompt_builder._encoding.cache_clear()
+    yield
+    prompt_builder._encoding.cache_clear()
+
+
+def conversation(turns):
+    return [{'role': 'user' if index % 2 == 0 else 'assistant', 'content': f"turn {index} " + 'word ' * 80}
+            for index in range(turns)]
+
+
+def test_history_keeps_recent_turns_and_summarizes_older_ones(heuristic):
+    messages = conversation(20)
+    kept, report = compact_history(messages, max_tokens=400)
+
+    verbatim = [message for message in kept if message['role'] != 'system']
+    assert verbatim == messages[-len(verbatim):]
+    assert kept[0]['role'] == 'system'
+    assert kept[0]['content'].startswith('Summary of earlier conversation:')
+    assert report['history_kept'] == len(verbatim)
+    assert report['history_kept'] + report['history_summarized'] + report['history_dropped'] == 20
+    assert report['history_summarized'] > 0
+    assert report['history'] <= 400
+
+
+def test_oversized_messages_are_capped(heuristic, monkeypatch):
+    monkeypatch.setattr(prompt_builder, 'MAX_MESSAGE_TOKENS', 50)
+    kept, report = compact_history([{'role': 'assistant', 'content': 'x' * 10000}], max_tokens=1000)
+    assert count_tokens(kept[0]['content']) <= 50
+    assert report['history_kept'] == 1
+
+
+def test_prompt_stays_within_budget(heuristic):
+    columns = [f"column_{index}" for index in range(500)]
+    data_info = {'total_rows': 10 ** 6, 'columns': columns,
+                 'numeric_columns': columns[:250], 'categorical_columns': columns[250:]}
+    history = conversation(200) + [{'role': 'user', 'content': 'What is the average?'}]
+
+    prompt = build_prompt('What is the average?', data_info, history, budget=4000)
+
+    tokens = prompt['tokens']
+    assert tokens['total'] <= 4000
+    assert not tokens['over_budget']
+    assert tokens['data_profile'] <= (4000 - tokens['static_prefix'] - tokens['question']) * PROFILE_SHARE + 2
+    assert '(+' in prompt['system_prompt']
+    assert all(message['content'] != 'What is the average?' for message in prompt['previous_messages'])
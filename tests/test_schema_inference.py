@@ -0,0 +1,58 @@
+import pandas as pd
+
+from utils import schema_inference
+from utils.schema_inference import SchemaCache, infer_column, schema_columns, stratified_sample
+
+
+def test_stratified_sample_covers_the_whole_column():
+    series = pd.Series(range(10000))
+    sample = stratified_sample(series, size=100)
+    assert len(sample) == 100
+    assert sample.index.min() < 100
+    assert sample.index.max() >= 9900
+
+
+def test_sorted_file_is_confirmed_over_every_value():
+    # A head sample sees only numbers; the full column is mostly text
+    series = pd.Series([str(i) for i in range(3000)] + ['label %d' % (i % 40) for i in range(7000)],
+                       dtype=object)
+    schema = infer_column(series, sample_size=1000)
+    assert schema['type'] == 'categorical'
+    assert schema['method'] == 'confirmed'
+
+
+def test_numeric_text_with_placeholders_is_numeric():
+    series = pd.Series(['1.5', '2', 'n/a', '4', None, '6'] * 100, dtype=object)
+    assert infer_column(series)['type'] == 'numeric'
+
+
+def test_high_cardinality_columns_trust_a_clear_sample():
+    series = pd.Series([str(i) for i in range(60000)], dtype=object)
+    schema = infer_column(series, sample_size=500)
+    assert schema == {'source_dtype': 'object', 'type': 'numeric', 'method': 'sample',
+                      'sample_numeric_ratio': 1.0}
+
+
+def test_schema_cache_reuses_and_corrects_by_fingerprint(monkeypatch):
+    calls = []
+    infer_schema = schema_inference.infer_schema
+
+    def counting(df, sample_size):
+        calls.append(list(df.columns))
+        return infer_schema(df, sample_size)
+
+    monkeypatch.setattr(schema_inference, 'infer_schema', counting)
+    cache = SchemaCache()
+    df = pd.DataFrame({'amount': [1.0, 2.0, 3.0], 'city': ['a', 'b', 'c']})
+
+    schema = cache.get_or_infer(df, 'fp')
+    assert cache.get_or_infer(df, 'fp') is schema
+    assert schema_columns(schema, 'numeric') == ['amount']
+
+    cache.update_column('fp', 'city', 'numeric')
+    assert schema_columns(cache.get('fp'), 'numeric') == ['amount', 'city']
+
+    cache.get_or_infer(df.assign(extra=[1, 2, 3]), 'fp')
+    cache.get_or_infer(df)
+    assert calls == [['amount', 'city'], ['amount', 'city', 'extra'], ['amount', 'city']]
+    assert cache.get(None) is None
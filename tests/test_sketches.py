@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.sketches import HyperLogLog, KLLSketch, SpaceSaving
+
+
+def _chunks(values, count):
+    return np.array_split(values, count)
+
+
+def test_kll_rank_error_within_epsilon_on_a_million_values():
+    rng = np.random.default_rng(1)
+    values = rng.lognormal(3, 1.5, 1_000_000)
+    k = 400
+    epsilon = 1.7 / k
+
+    # Sketch chunks separately and merge, as chunk_process_data does
+    sketch = KLLSketch(k=k)
+    for seed, chunk in enumerate(_chunks(values, 10)):
+        part = KLLSketch(k=k, seed=seed)
+        part.update(chunk)
+        sketch.merge(part)
+    assert not sketch.exact
+    assert sketch.count == len(values)
+
+    ordered = np.sort(values)
+    for q in (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99):
+        rank = np.searchsorted(ordered, sketch.quantile(q), side='right') / len(values)
+        assert abs(rank - q) <= epsilon, q
+
+
+def test_kll_is_exact_for_small_columns():
+    values = np.random.default_rng(2).normal(size=5000)
+    sketch = KLLSketch()
+    sketch.update(values)
+    assert sketch.exact
+    assert sketch.quantile(0.5) == np.quantile(values, 0.5)
+
+
+def test_hll_relative_error_matches_its_standard_error():
+    p = 10
+    standard_error = 1.04 / np.sqrt(1 << p)
+    distinct = 200_000
+    errors = []
+    for seed in range(20):
+        values = np.random.default_rng(seed).permutation(distinct * 4)[:distinct]
+        sketch = HyperLogLog(p=p)
+        for chunk in _chunks(values, 4):
+            part = HyperLogLog(p=p)
+            part.update(chunk)
+            sketch.merge(part)
+        errors.append(sketch.estimate() / distinct - 1)
+
+    rms = float(np.sqrt(np.mean(np.square(errors))))
+    assert rms < 1.5 * standard_error
+    assert max(abs(error) for error in errors) < 4 * standard_error
+
+
+def test_hll_ignores_repeated_values():
+    sketch = HyperLogLog()
+    sketch.update(np.tile(np.arange(1000), 50))
+    assert abs(sketch.estimate() / 1000 - 1) < 0.02
+
+
+def test_space_saving_keeps_every_heavy_hitter():
+    rng = np.random.default_rng(3)
+    capacity = 64
+    # Zipf-distributed categories: a few heavy values and a long tail
+    values = pd.Series(rng.zipf(1.3, 500_000) % 20_000).astype(str)
+    true_counts = values.value_counts()
+    threshold = len(values) / capacity
+
+    summary = SpaceSaving(capacity=capacity)
+    for start in range(0, len(values), 20_000):
+        part = SpaceSaving(capacity=capacity)
+        part.update(values.iloc[start:start + 20_000])
+        summary.merge(part)
+
+    heavy = true_counts[true_counts > threshold]
+    assert len(heavy) > 0
+    assert set(heavy.index) <= set(summary.counts.index)
+    for value, count in heavy.items():
+        # Counts are upper bounds, overestimating by at most the floor
+        assert count <= summary.counts[value] <= count + summary.floor
+    assert summary.floor <= threshold
+
+
+def test_space_saving_is_exact_under_capacity():
+    values = pd.Series(['a'] * 5 + ['b'] * 3 + ['c'])
+    summary = SpaceSaving(capacity=8)
+    summary.update(values)
+    assert summary.exact
+    assert summary.top(2) == {'a': 5, 'b': 3}
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_hll_merge_is_order_independent(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=60_000)
+    parts = []
+    for chunk in _chunks(values, 6):
+        part = HyperLogLog()
+        part.update(chunk)
+        parts.append(part)
+    forward, backward = HyperLogLog(), HyperLogLog()
+    for part in parts:
+        forward.merge(part)
+    for part in reversed(parts):
+        backward.merge(part)
+    assert forward.estimate() == backward.estimate()
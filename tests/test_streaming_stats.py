@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.streaming_stats import RunningMoments, merge_summaries, summarize_frame
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_merged_moments_match_numpy_in_any_order(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(1e6, 250, 100_000)
+    bounds = np.sort(rng.choice(np.arange(1, len(values)), 15, replace=False))
+    chunks = np.split(values, bounds)
+
+    parts = []
+    for chunk in chunks:
+        part = RunningMoments()
+        part.update(chunk)
+        parts.append(part)
+
+    merged = RunningMoments()
+    for index in rng.permutation(len(parts)):
+        merged.merge(parts[index])
+
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(np.mean(values), rel=1e-12)
+    assert merged.m2 / (merged.count - 1) == pytest.approx(np.var(values, ddof=1), rel=1e-9)
+    assert merged.std() == pytest.approx(np.std(values, ddof=1), rel=1e-9)
+    assert (merged.min, merged.max) == (values.min(), values.max())
+
+
+def test_chunked_summary_matches_a_single_pass():
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({'balance': rng.normal(1500, 3000, 50_000),
+                       'job': rng.choice(['admin.', 'services', 'retired'], 50_000)})
+    whole = summarize_frame(df)
+    chunked = merge_summaries([summarize_frame(df.iloc[i:i + 7_000]) for i in range(0, len(df), 7_000)])
+    assert chunked['balance'].result()['mean'] == pytest.approx(whole['balance'].result()['mean'], rel=1e-12)
+    assert chunked['job'].result()['unique_values'] == whole['job'].result()['unique_values'] == 3
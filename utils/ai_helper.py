@@ -1,43 +1,112 @@
 import os
+import copy
 import json
-from openai import OpenAI
 import pandas as pd
 import numpy as np
-from .cache_manager import OpenAICache, cache_openai_request
+from .cache_manager import OpenAICache, cache_openai_request, is_cacheable
+from .llm_client import get_llm_client
+from .columnar import to_dataframe
+from .dataset_registry import dataset_registry
+from .dataset_profile import profile_cache
+from .fingerprint import dataframe_fingerprint
+from .prompt_builder import build_prompt
+from .local_analytics import answer_locally
+from .chart_cache import chart_cache
+from .chart_aggregation import DEFAULT_AGGREGATE, aggregate_label, aggregate_series
+from .downsampling import (DEFAULT_POINT_BUDGET, DEFAULT_MAX_CATEGORIES, DEFAULT_HISTOGRAM_BINS,
+                           SCATTER_POINT_THRESHOLD, downsample_series, sample_indices, heatmap_bins,
+                           histogram_bins, histogram_2d, bin_labels, aggregate_top_n, sampling_report)
 import asyncio
-from typing import Dict, Any, List, Optional
-from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client and cache
-openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# Initialize the response cache; completions go through the shared LLM client
 openai_cache = OpenAICache()
-thread_pool = ThreadPoolExecutor()
 
 # Use the correct model name
 DEFAULT_MODEL = "gpt-4o"  # Latest GPT-4 Turbo model
 
 
-async def run_in_thread(func, *args, **kwargs):
-    """Run a synchronous function in a thread pool."""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(thread_pool,
-                                      lambda: func(*args, **kwargs))
+def _spec_column(config: Dict[str, Any], key: str, df: pd.DataFrame) -> Any:
+    """A column named in a chart spec, or None when absent or unknown.
+
+    A list (as the function schema gives ``y``) names its first column.
+    """
+    value = config.get(key)
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, (str, int)) and value in df.columns:
+        return value
+    return None
+
+
+def chart_spec(config: Dict[str, Any], df: pd.DataFrame, numeric_cols: Any,
+               cat_cols: Any) -> Tuple[Any, List[Any], str, Any]:
+    """Resolve the x column, y columns, aggregate and series column of an x/y chart.
+
+    Columns missing from the spec are chosen as before: age against balance
+    when both exist, otherwise the first categorical column against up to
+    three numeric ones. x is None when there is nothing to group by.
+    """
+    x_col = _spec_column(config, "x", df)
+    series_col = _spec_column(config, "series", df)
+    y_spec = config.get("y")
+    y_spec = [y_spec] if isinstance(y_spec, (str, int)) else list(y_spec or [])
+    y_cols = [col for col in y_spec if col in df.columns and col not in (x_col, series_col)]
+
+    if x_col is None and not y_cols and "age" in df.columns and "balance" in df.columns:
+        x_col, y_cols = "age", ["balance"]
+    if x_col is None and len(cat_cols) > 0:
+        x_col = cat_cols[0]
+    agg = config.get("agg") or DEFAULT_AGGREGATE
+    if not y_cols and not (agg == "count" and x_col is not None):
+        y_cols = [col for col in numeric_cols if col not in (x_col, series_col)][:3]
+    return x_col, y_cols, agg, series_col
+
+
+async def create_visualization(config: Dict[str, Any], data: Any,
+                               fingerprint: Optional[str] = None,
+                               profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Create a visualization configuration with actual data.
+
+    Bar and line charts take an optional spec of ``x``, ``y`` (a column or
+    list), ``agg`` (mean, median, sum, count, min, max or a percentile such
+    as ``p90``) and ``series``, and plot one aggregated point per distinct
+    x. Chart data is reduced to ``config['point_budget']`` points (by default
+    ``DEFAULT_POINT_BUDGET``): line charts with LTTB and bar and pie charts
+    by summing per category and folding the smallest into "Other".
+    ``heatmap`` (or ``hexbin``) charts bin two numeric columns into
+    ``config['bins']`` cells per axis. Scatter plots over the point budget
+    are drawn from a seeded sample of that many rows, and those with more
+    than ``config['scatter_threshold']`` rows as heatmaps.
+    ``histogram`` charts count one numeric column into ``config['bins']``
+    bins. How the data was reduced is reported under ``sampling``.
+
+    With the dataset ``profile`` from ``dataset_profile``, default-binned
+    histograms are read from it without touching the rows, and category
+    rankings come from it instead of counting the rows again.
+
+    With the dataset's ``fingerprint`` the result is cached in
+    ``chart_cache``, and repeat requests for the same chart skip pandas.
+    """
+    cached = chart_cache.get(fingerprint, config)
+    if cached is not None:
+        return cached
 
-
-async def create_visualization(config: Dict[str, Any],
-                               data: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Create a visualization configuration with actual data."""
     try:
         chart_type = config.get("chart_type", "line")  # Default to line chart if not specified
         title = config.get("title", "Data Visualization")
+        budget = int(config.get("point_budget") or DEFAULT_POINT_BUDGET)
+        max_categories = int(config.get("max_categories") or DEFAULT_MAX_CATEGORIES)
 
-        # Convert data to DataFrame for easier processing
-        df = pd.DataFrame(data)
+        # Accept row records, a columnar payload or an existing DataFrame
+        df = to_dataframe(data)
+        profiled = (profile or {}).get("column_descriptions") or {}
 
         # Create a basic visualization based on chart type
         viz_config = {
@@ -76,6 +145,8 @@ async def create_visualization(config: Dict[str, Any],
             }
         }
 
+        sampling = sampling_report("none", len(df), len(df))
+
         # Get numeric columns
         numeric_cols = df.select_dtypes(include=[np.number]).columns
         if len(numeric_cols) == 0:
@@ -86,109 +157,207 @@ async def create_visualization(config: Dict[str, Any],
 
         # Configure axes based on chart type
         if chart_type in ["bar", "line"]:
-            # For the specific request of balance vs age
-            if "age" in df.columns and "balance" in df.columns:
-                # Sort by age for better visualization
-                df = df.sort_values("age")
-                x_data = df["age"].tolist()
-                y_data = df["balance"].tolist()
-                
+            x_col, y_cols, agg, series_col = chart_spec(config, df, numeric_cols, cat_cols)
+            if x_col is not None:
+                # One point per distinct x (and series value) from a single groupby
+                aggregated = aggregate_series(df, x_col, y_cols, agg, series_col, max_categories,
+                                              fold_x=chart_type == "bar" and x_col in cat_cols,
+                                              profiles=profiled)
+                x_values = np.asarray(aggregated['x'], dtype=object)
+                series_data = [(entry['name'], entry['data']) for entry in aggregated['series']]
+                method = "aggregate"
+            else:
+                # Nothing to group by: plot rows against their index
+                x_values = df.index.to_numpy()
+                series_data = [(col, df[col].tolist()) for col in y_cols]
+                method = "none"
+
+            if len(x_values) > budget:
+                positions = x_values.astype(np.float64) if x_col in numeric_cols else None
+                keep = downsample_series(
+                    positions, [np.asarray(data, dtype=np.float64) for _, data in series_data], budget)
+                x_values = x_values[keep]
+                series_data = [(name, np.asarray(data, dtype=object)[keep].tolist())
+                               for name, data in series_data]
+                method = "lttb"
+            sampling = sampling_report(method, len(df), len(x_values))
+
+            x_data = x_values.tolist()
+            y_name = None
+            if x_col is not None and len(y_cols) <= 1:
+                y_name = f"{aggregate_label(agg)} of {y_cols[0]}" if y_cols else "count"
+            viz_config["config"].update({
+                "xAxis": {
+                    "type": "category",
+                    "data": x_data,
+                    "name": None if x_col is None else str(x_col),
+                    "axisLabel": {
+                        "color": "#fff",
+                        "rotate": 45 if len(x_data) > 10 else 0
+                    }
+                },
+                "yAxis": {
+                    "type": "value",
+                    "name": y_name,
+                    "axisLabel": {
+                        "color": "#fff"
+                    }
+                },
+                "series": []
+            })
+
+            for name, data in series_data:
+                series = {
+                    "name": name,
+                    "type": chart_type,
+                    "data": data,
+                    "smooth": True if chart_type == "line" else False
+                }
+                viz_config["config"]["series"].append(series)
+                viz_config["config"]["legend"]["data"].append(name)
+
+        elif chart_type in ["scatter", "heatmap", "hexbin"]:
+            # Spec columns win when numeric; otherwise the first two numeric columns
+            chosen = [col for col in (_spec_column(config, "x", df), _spec_column(config, "y", df))
+                      if col in numeric_cols]
+            chosen += [col for col in numeric_cols if col not in chosen]
+            if len(chosen) < 2:
+                raise ValueError(f"Need at least 2 numeric columns for {chart_type} plot")
+            x_name, y_name = chosen[0], chosen[1]
+
+            x_values = df[x_name].to_numpy(dtype=np.float64)
+            y_values = df[y_name].to_numpy(dtype=np.float64)
+            threshold = int(config.get("scatter_threshold") or SCATTER_POINT_THRESHOLD)
+            if chart_type != "scatter" or len(df) > threshold:
+                # Density view: the payload grows with the bin count, not the row count
+                heat = histogram_2d(x_values, y_values, heatmap_bins(config.get("bins")))
+                viz_config["config"]["tooltip"]["trigger"] = "item"
                 viz_config["config"].update({
                     "xAxis": {
                         "type": "category",
-                        "data": x_data,
-                        "name": "Age",
+                        "name": x_name,
+                        "data": bin_labels(heat["x_edges"]),
                         "axisLabel": {
                             "color": "#fff"
                         }
                     },
                     "yAxis": {
-                        "type": "value",
-                        "name": "Balance",
+                        "type": "category",
+                        "name": y_name,
+                        "data": bin_labels(heat["y_edges"]),
                         "axisLabel": {
                             "color": "#fff"
                         }
                     },
+                    "visualMap": {
+                        "min": 0,
+                        "max": max(heat["max"], 1),
+                        "calculable": True,
+                        "orient": "horizontal",
+                        "left": "center",
+                        "bottom": 0,
+                        "textStyle": {
+                            "color": "#fff"
+                        },
+                        "inRange": {
+                            "color": ["#1e3a5f", "#3498db", "#f1c40f", "#e74c3c"]
+                        }
+                    },
                     "series": [{
-                        "name": "Balance",
-                        "type": chart_type,
-                        "data": y_data,
-                        "smooth": True if chart_type == "line" else False
+                        "type": "heatmap",
+                        "name": f"{x_name} vs {y_name}",
+                        "data": heat["cells"]
                     }]
                 })
-                viz_config["config"]["legend"]["data"].append("Balance")
+                sampling = sampling_report("heatmap", len(df), len(heat["cells"]))
             else:
-                # Default handling for other cases
-                x_col = cat_cols[0] if len(cat_cols) > 0 else df.index.name or 'index'
-                x_data = df[x_col].tolist() if len(cat_cols) > 0 else df.index.tolist()
-
+                # Below the heatmap threshold, still send at most the point budget
+                kept = sample_indices(len(df), budget)
                 viz_config["config"].update({
                     "xAxis": {
-                        "type": "category",
-                        "data": x_data,
+                        "type": "value",
+                        "name": x_name,
                         "axisLabel": {
-                            "color": "#fff",
-                            "rotate": 45 if len(x_data) > 10 else 0
+                            "color": "#fff"
                         }
                     },
                     "yAxis": {
                         "type": "value",
+                        "name": y_name,
                         "axisLabel": {
                             "color": "#fff"
                         }
                     },
-                    "series": []
+                    "series": [{
+                        "type": "scatter",
+                        "name": f"{x_name} vs {y_name}",
+                        "data": df[[x_name, y_name]].to_numpy()[kept].tolist(),
+                        "symbolSize": 10,
+                        "itemStyle": {
+                            "opacity": 0.8
+                        }
+                    }]
                 })
-
-                for col in numeric_cols[:3]:
-                    series = {
-                        "name": col,
-                        "type": chart_type,
-                        "data": df[col].tolist(),
-                        "smooth": True if chart_type == "line" else False
-                    }
-                    viz_config["config"]["series"].append(series)
-                    viz_config["config"]["legend"]["data"].append(col)
-
-        elif chart_type == "scatter":
-            if len(numeric_cols) < 2:
-                raise ValueError("Need at least 2 numeric columns for scatter plot")
+                sampling = sampling_report("sample" if len(kept) < len(df) else "none",
+                                           len(df), len(kept))
+            viz_config["config"]["legend"]["data"].append(f"{x_name} vs {y_name}")
+
+        elif chart_type == "histogram":
+            value_col = _spec_column(config, "x", df)
+            if value_col not in numeric_cols:
+                value_col = _spec_column(config, "y", df)
+            if value_col not in numeric_cols:
+                value_col = numeric_cols[0]
+            bins = histogram_bins(config.get("bins"))
+
+            histogram = (profiled.get(value_col) or {}).get("histogram")
+            if histogram is not None and bins == DEFAULT_HISTOGRAM_BINS:
+                # Precomputed with the dataset profile; no rows are read
+                counts, edges = histogram["counts"], histogram["edges"]
+                method = "profile"
+            else:
+                values = df[value_col].to_numpy(dtype=np.float64)
+                counts, edges = np.histogram(values[np.isfinite(values)], bins=bins)
+                counts = counts.tolist()
+                method = "histogram"
+            sampling = sampling_report(method, len(df), len(counts))
 
             viz_config["config"].update({
                 "xAxis": {
-                    "type": "value",
-                    "name": numeric_cols[0],
+                    "type": "category",
+                    "name": str(value_col),
+                    "data": bin_labels(edges),
                     "axisLabel": {
                         "color": "#fff"
                     }
                 },
                 "yAxis": {
                     "type": "value",
-                    "name": numeric_cols[1],
+                    "name": "count",
                     "axisLabel": {
                         "color": "#fff"
                     }
                 },
                 "series": [{
-                    "type": "scatter",
-                    "name": f"{numeric_cols[0]} vs {numeric_cols[1]}",
-                    "data": df[[numeric_cols[0], numeric_cols[1]]].values.tolist(),
-                    "symbolSize": 10,
-                    "itemStyle": {
-                        "opacity": 0.8
-                    }
+                    "type": "bar",
+                    "name": str(value_col),
+                    "data": counts,
+                    "barCategoryGap": "0%"
                 }]
             })
-            viz_config["config"]["legend"]["data"].append(f"{numeric_cols[0]} vs {numeric_cols[1]}")
+            viz_config["config"]["legend"]["data"].append(str(value_col))
 
         elif chart_type == "pie":
-            value_col = numeric_cols[0]
-            label_col = cat_cols[0] if len(cat_cols) > 0 else df.index.name or 'index'
-            
-            if len(cat_cols) > 0:
-                pie_data = df.groupby(label_col)[value_col].sum()
-            else:
-                pie_data = df[value_col]
+            value_col = _spec_column(config, "y", df)
+            if value_col not in numeric_cols:
+                value_col = numeric_cols[0]
+            label_col = _spec_column(config, "x", df)
+            if label_col is None and len(cat_cols) > 0:
+                label_col = cat_cols[0]
+
+            labels = df[label_col].to_numpy() if label_col is not None else df.index.to_numpy()
+            names, (values,) = aggregate_top_n(labels, [df[value_col].to_numpy()], max_categories)
+            sampling = sampling_report("top_n", len(df), len(names))
 
             viz_config["config"].update({
                 "series": [{
@@ -196,7 +365,7 @@ async def create_visualization(config: Dict[str, Any],
                     "radius": "60%",
                     "data": [
                         {"value": float(v), "name": str(k)}
-                        for k, v in pie_data.items()
+                        for k, v in zip(names, values)
                     ],
                     "label": {
                         "color": "#fff"
@@ -211,119 +380,158 @@ async def create_visualization(config: Dict[str, Any],
                 }]
             })
 
+        viz_config["sampling"] = sampling
+        chart_cache.set(fingerprint, config, viz_config)
         return viz_config
     except Exception as e:
         logger.error(f"Error creating visualization: {str(e)}")
         return None
 
 
+def build_messages(prompt: str, **kwargs) -> List[Dict[str, Any]]:
+    """Assemble the system prompt, prior conversation and question."""
+    messages = [{
+        "role":
+        "system",
+        "content":
+        kwargs.get(
+            "system_prompt",
+            "You are a helpful data analysis assistant. Analyze the data and provide clear insights."
+        )
+    }, {
+        "role": "user",
+        "content": prompt
+    }]
+
+    # Add context messages if available
+    if kwargs.get("previous_messages"):
+        messages[1:1] = kwargs["previous_messages"]
+    return messages
+
+
+def request_params(messages: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+    """Completion parameters for a request, offering its functions if any."""
+    api_params = {
+        "model": kwargs.get("model", DEFAULT_MODEL),
+        "messages": messages
+    }
+    if kwargs.get("functions"):
+        api_params["functions"] = kwargs["functions"]
+        api_params["function_call"] = kwargs.get("function_call", "auto")
+    return api_params
+
+
+async def run_function_calls(function_calls: List[Any],
+                             request_context: Dict[str, Any]) -> List[Optional[Dict[str, Any]]]:
+    """Run the model's function calls in parallel.
+
+    Returns one ``{'name', 'args', 'results'}`` entry per call, or None for
+    calls that failed, were unknown or declined to visualize.
+    """
+    async def process_function_call(func_call):
+        function_name = getattr(func_call, "name", None)
+        try:
+            function_args = json.loads(func_call.arguments or "{}")
+
+            if function_name == "create_visualization" and function_args.get("should_visualize", True):
+                source = None
+                if request_context.get("dataset_id"):
+                    source = dataset_registry.get(request_context["dataset_id"])
+                if source is None:
+                    source = request_context.get("data", [])
+                viz_config = await create_visualization(
+                    function_args, source, request_context.get("fingerprint"),
+                    request_context.get("data_info"))
+                if viz_config:
+                    return {"name": function_name, "args": function_args, "results": viz_config}
+            return None
+        except Exception as e:
+            logger.error(f"Error in function call {function_name}: {str(e)}")
+            return None
+
+    results = await asyncio.gather(
+        *[process_function_call(call) for call in function_calls],
+        return_exceptions=True)
+    return [None if isinstance(r, Exception) else r for r in results]
+
+
+def function_messages(function_calls: List[Any],
+                      results: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """The assistant's function calls and their outcomes, for the follow-up completion.
+
+    The model only hears whether each chart was created, not its data,
+    so the follow-up prompt stays small whatever the chart size.
+    """
+    messages = []
+    for call, result in zip(function_calls, results):
+        messages.append({
+            "role": "assistant",
+            "content": None,
+            "function_call": {"name": call.name, "arguments": call.arguments or "{}"}
+        })
+        messages.append({
+            "role": "function",
+            "name": call.name,
+            "content": json.dumps({"created": result is not None,
+                                   "title": result["args"].get("title") if result else None})
+        })
+    return messages
+
+
+def response_visualization(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The chart config a response's ``create_visualization`` call produced, if any."""
+    return (response.get("function_results") or {}).get("create_visualization")
+
+
+def function_results(results: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Results of the successful function calls keyed by function name."""
+    return {r["name"]: r["results"] for r in results if r is not None} or None
+
+
 @cache_openai_request(openai_cache)
 async def send_openai_request(prompt: str, **kwargs) -> Dict[str, Any]:
-    """Send a request to OpenAI with proper error handling."""
+    """Send a request to OpenAI with proper error handling.
+
+    When the model calls a function (``create_visualization``) the call
+    is run here and a second completion answers with its outcome; the
+    chart config is returned under ``function_results``.
+    """
     try:
         # Verify API key
         if not os.getenv('OPENAI_API_KEY'):
             raise ValueError("OpenAI API key is not set")
 
         # Prepare the messages
-        messages = [{
-            "role":
-            "system",
-            "content":
-            kwargs.get(
-                "system_prompt",
-                "You are a helpful data analysis assistant. Analyze the data and provide clear insights."
-            )
-        }, {
-            "role": "user",
-            "content": prompt
-        }]
-
-        # Add context messages if available
-        if kwargs.get("previous_messages"):
-            messages[1:1] = kwargs["previous_messages"]
+        messages = build_messages(prompt, **kwargs)
 
         logger.info(
             f"Sending request to OpenAI with model {kwargs.get('model', DEFAULT_MODEL)}"
         )
 
-        # Prepare API call parameters
-        api_params = {
-            "model": kwargs.get("model", DEFAULT_MODEL),
-            "messages": messages
-        }
-
-        if kwargs.get("functions"):
-            api_params["functions"] = kwargs["functions"]
-            api_params["function_call"] = kwargs.get("function_call", "auto")
-
         # Make the API call
-        response = await run_in_thread(openai_client.chat.completions.create,
-                                       **api_params)
+        response = await get_llm_client().create(**request_params(messages, **kwargs))
 
         message = response.choices[0].message
 
         # Handle function calls
         if message.function_call:
-            function_calls = []
-
             # Support multiple function calls
             if isinstance(message.function_call, list):
                 function_calls = message.function_call
             else:
                 function_calls = [message.function_call]
 
-            # Process all function calls in parallel
-            async def process_function_call(func_call):
-                try:
-                    function_name = func_call.name
-                    function_args = json.loads(func_call.arguments)
-
-                    if function_name == "create_visualization":
-                        viz_config = await create_visualization(
-                            function_args,
-                            kwargs.get("context", {}).get("data", []))
-                        return {"name": function_name, "results": viz_config}
-                    return None
-                except Exception as e:
-                    logger.error(
-                        f"Error in function call {function_name}: {str(e)}")
-                    return None
-
             # Execute all function calls in parallel
-            function_results = await asyncio.gather(
-                *[process_function_call(call) for call in function_calls],
-                return_exceptions=True)
-
-            # Filter out errors and None results
-            valid_results = [
-                r for r in function_results
-                if r is not None and not isinstance(r, Exception)
-            ]
-
-            # Add function results to messages
-            for result in valid_results:
-                messages.append(message)
-                messages.append({
-                    "role": "function",
-                    "name": result["name"],
-                    "content": json.dumps(result["results"])
-                })
+            results = await run_function_calls(function_calls, kwargs.get("context", {}))
 
             # Get final response with function results
-            final_api_params = {
-                "model": kwargs.get("model", DEFAULT_MODEL),
-                "messages": messages
-            }
-            final_response = await run_in_thread(
-                openai_client.chat.completions.create, **final_api_params)
+            messages.extend(function_messages(function_calls, results))
+            final_response = await get_llm_client().create(
+                model=kwargs.get("model", DEFAULT_MODEL), messages=messages)
 
             return {
                 "content": final_response.choices[0].message.content,
-                "function_results": {
-                    r["name"]: r["results"]
-                    for r in valid_results
-                }
+                "function_results": function_results(results)
             }
 
         return {"content": message.content, "function_results": None}
@@ -355,8 +563,98 @@ async def send_openai_request(prompt: str, **kwargs) -> Dict[str, Any]:
             }
 
 
-async def get_ai_insights(question: str, context: dict) -> Dict[str, Any]:
-    """Get AI insights with improved intent recognition and data access."""
+async def stream_openai_request(prompt: str, **kwargs) -> AsyncIterator[Tuple[str, Any]]:
+    """Stream a completion as ``('token', text)`` events, then ``('done', response)``.
+
+    Takes the same arguments as ``send_openai_request`` and shares its
+    cache, function handling and single-flight: a hit is replayed as a
+    single token, and while an identical request is in flight (streamed or
+    not) this one waits for its response instead of paying for another
+    completion. If that request fails or its client goes away, this one
+    streams on its own.
+    """
+    cache_key = openai_cache.cache_key(prompt, **kwargs)
+    while True:
+        cached_response = await openai_cache.get_by_key(cache_key, prompt)
+        if cached_response is not None:
+            yield 'token', cached_response.get('content') or ''
+            yield 'done', cached_response
+            return
+
+        future, leader = openai_cache.begin_flight(cache_key)
+        if leader:
+            break
+        try:
+            response = copy.deepcopy(await asyncio.wrap_future(future))
+        except Exception:
+            # The leader did not finish; check the cache again or lead a new request
+            continue
+        yield 'token', response.get('content') or ''
+        yield 'done', response
+        return
+
+    try:
+        if not os.getenv('OPENAI_API_KEY'):
+            raise ValueError("OpenAI API key is not set")
+
+        logger.info(f"Streaming request to OpenAI with model {kwargs.get('model', DEFAULT_MODEL)}")
+        messages = build_messages(prompt, **kwargs)
+        parts = []
+        call = {"name": "", "arguments": ""}
+        async for chunk in get_llm_client().stream(**request_params(messages, **kwargs)):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            # A function call arrives as name and argument fragments instead of content
+            call_delta = getattr(delta, "function_call", None)
+            if call_delta is not None:
+                call["name"] += call_delta.name or ""
+                call["arguments"] += call_delta.arguments or ""
+            token = delta.content
+            if token:
+                parts.append(token)
+                yield 'token', token
+
+        results = []
+        if call["name"]:
+            function_calls = [SimpleNamespace(**call)]
+            results = await run_function_calls(function_calls, kwargs.get("context", {}))
+            messages.extend(function_messages(function_calls, results))
+            async for chunk in get_llm_client().stream(model=kwargs.get("model", DEFAULT_MODEL),
+                                                       messages=messages):
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    parts.append(token)
+                    yield 'token', token
+
+        response = {"content": ''.join(parts), "function_results": function_results(results)}
+        if is_cacheable(response):
+            await openai_cache.set_by_key(cache_key, response, prompt)
+    except BaseException as e:
+        # Includes the consumer closing the stream early; followers then retry
+        error = e if isinstance(e, Exception) else RuntimeError("Stream closed before it finished")
+        openai_cache.end_flight(cache_key, future, error=error)
+        raise
+    openai_cache.end_flight(cache_key, future, result=response)
+    yield 'done', response
+
+
+def data_source_is_registered(dataset_id: str, df: pd.DataFrame) -> bool:
+    """Check that a dataset id still refers to the frame being analyzed."""
+    return dataset_registry.get(dataset_id) is df
+
+
+async def prepare_ai_request(question: str, context: dict,
+                             df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Resolve the data and build the model request for a question.
+
+    Returns the final answer envelope when the question can be answered
+    without the model, otherwise ``{'request': kwargs, 'df': frame,
+    'tokens': report}`` where kwargs are the ``send_openai_request``
+    arguments besides the question and report is the prompt's token use.
+    When ``df`` is given (a frame resolved from the dataset registry) it is
+    used directly and ``context['data']`` is ignored.
+    """
     try:
         # Print the incoming question and context
         # print(f"Received question: {question}")
@@ -364,6 +662,8 @@ async def get_ai_insights(question: str, context: dict) -> Dict[str, Any]:
 
         # Extract columns from context
         columns = context.get('columns') or context.get('metadata', {}).get('column_names', [])
+        if not columns and df is not None:
+            columns = list(df.columns)
         
         # Ensure columns are available
         if not columns:
@@ -376,7 +676,7 @@ async def get_ai_insights(question: str, context: dict) -> Dict[str, Any]:
         
         # First check if we have data in the context
         data = context.get('data', [])
-        if not data:
+        if df is None and not data:
             print("Data is not defined in the context")
             return {
                 'answer': "I don't see any data loaded yet. Please upload your data first.",
@@ -384,8 +684,9 @@ async def get_ai_insights(question: str, context: dict) -> Dict[str, Any]:
                 'web_search_used': False
             }
 
-        # Convert data to DataFrame for analysis
-        df = pd.DataFrame(data)
+        # Convert data to DataFrame for analysis (rows or columnar payload)
+        if df is None:
+            df = to_dataframe(data)
         if df.empty:
             print("The data appears to be empty")
             return {
@@ -397,6 +698,11 @@ async def get_ai_insights(question: str, context: dict) -> Dict[str, Any]:
         # Print the DataFrame summary
         # print(f"DataFrame summary:\n{df.describe(include='all')}")
 
+        # Content fingerprint for keying cached profiles, prompts and charts
+        registered = bool(context.get('dataset_id')) and data_source_is_registered(context['dataset_id'], df)
+        fingerprint = (dataset_registry.fingerprint(context['dataset_id']) if registered else None) \
+            or dataframe_fingerprint(df)
+
         # Check if this is a direct visualization request for balance vs age
         if "show me a multi line chart with balance versus age data" in question.lower():
             if "age" not in df.columns or "balance" not in df.columns:
@@ -411,7 +717,7 @@ async def get_ai_insights(question: str, context: dict) -> Dict[str, Any]:
                 "chart_type": "line",
                 "title": "Balance vs Age Analysis",
                 "should_visualize": True
-            }, data)
+            }, df, fingerprint)
             
             if viz_config:
                 return {
@@ -420,145 +726,20 @@ async def get_ai_insights(question: str, context: dict) -> Dict[str, Any]:
                     'web_search_used': False
                 }
 
-        # Prepare data context for the AI
-        data_info = {
-            'total_rows': len(df),
-            'columns': list(df.columns),
-            'numeric_columns': list(df.select_dtypes(include=[np.number]).columns),
-            'categorical_columns': list(df.select_dtypes(exclude=[np.number]).columns),
-            'sample_data': df.head(3).to_dict('records'),
-            'column_descriptions': {col: {
-                'dtype': str(df[col].dtype),
-                'unique_values': len(df[col].unique()),
-                'sample_values': df[col].head(3).tolist()
-            } for col in df.columns}
-        }
-        print(f"Data info: {data_info}")
-
-        # Prepare system prompt with clear instructions and data context
-        system_prompt = f"""You are a versatile data analysis assistant that output HTML. You can:
-1. Have normal conversations without creating visualizations
-2. Analyze data and provide insights when asked
-3. Create visualizations only when explicitly requested or when it would significantly enhance the answer
-
-Current Data Summary:
-- Total rows: {data_info['total_rows']}
-- Columns: {', '.join(data_info['columns'])}
-- Numeric columns: {', '.join(data_info['numeric_columns'])}
-- Categorical columns: {', '.join(data_info['categorical_columns'])}
-
-For each user message:
-- If it's a casual conversation (like greetings, general questions), respond naturally without data analysis
-- If it's a question about the data, provide a clear textual analysis using the available data
-- Only create visualizations if:
-  a) The user explicitly requests one
-  b) The question is specifically about trends, patterns, or comparisons that would be clearer with a visual
-  c) The data analysis would be significantly enhanced by a visualization
-
-When creating visualizations:
-- For time series or trends: Use line charts
-- For comparisons between categories: Use bar charts
-- For relationships between numeric variables: Use scatter plots
-- For part-to-whole relationships: Use pie charts
-
-You will respond in clean, proper HTML so the application can render it straight away. Normal text will be wrapped in a <p> tag. You will format the links as html links with an <a> tag. Links will have yellow font. Use divs and headings to properly separate different sections. Make sure text doesn't overlap and there is adequate line spacing. You will only output pure HTML. No markdown. All answers, titles, lists, headers, paragraphs - reply in fully styled HTML as the app will render and parse your responses as you reply. Only if you are asked about some programming problem that requires to send a code, you will use white font for only the code part, explanation part would be normal. Don't use ```html at the start and do not end with ``` anywhere. Do not output any text afterwards.
-DO NOT USE CANVAS TO OUTPUT CHARTS. MAKE SURE ALL CONTENT YOU OUTPUT IS IN A DIV THAT HAS MAX WIDTH 300px. MAKE SURE TO KEEP ANY LEGENDS SMALL.
-DO NOT OUTPUT ANY MARKDOWN. ONLY OUTPUT HTML. 
-
-EXAMPLE HTML FOR CHARTS:
-
-<div style="width: 300px; margin-bottom: 40px;">
-        <div style="text-align: center; margin-bottom: 10px; font-weight: bold; font-size: 14px;">Pie Chart</div>
-        <div style="width: 200px; height: 200px; border-radius: 50%; background: conic-gradient(#3498db 0deg 90deg, #e74c3c 90deg 180deg, #2ecc71 180deg 270deg, #f1c40f 270deg 360deg); margin: 0 auto; position: relative;">
-            <div class="hover-area" data-label="Category A" data-value="25%" style="position: absolute; width: 50%; height: 50%; top: 0; left: 50%; transform-origin: 0% 100%; transform: rotate(0deg) skew(0deg);"></div>
-            <div class="hover-area" data-label="Category B" data-value="25%" style="position: absolute; width: 50%; height: 50%; top: 0; left: 50%; transform-origin: 0% 100%; transform: rotate(90deg) skew(0deg);"></div>
-            <div class="hover-area" data-label="Category C" data-value="25%" style="position: absolute; width: 50%; height: 50%; top: 0; left: 50%; transform-origin: 0% 100%; transform: rotate(180deg) skew(0deg);"></div>
-            <div class="hover-area" data-label="Category D" data-value="25%" style="position: absolute; width: 50%; height: 50%; top: 0; left: 50%; transform-origin: 0% 100%; transform: rotate(270deg) skew(0deg);"></div>
-        </div>
-        <div style="display: flex; justify-content: center; flex-wrap: wrap; margin-top: 10px; font-size: 12px;">
-            <div style="display: flex; align-items: center; margin: 0 5px;">
-                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #3498db;"></div>
-                <span>Category A</span>
-            </div>
-            <div style="display: flex; align-items: center; margin: 0 5px;">
-                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #e74c3c;"></div>
-                <span>Category B</span>
-            </div>
-            <div style="display: flex; align-items: center; margin: 0 5px;">
-                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #2ecc71;"></div>
-                <span>Category C</span>
-            </div>
-            <div style="display: flex; align-items: center; margin: 0 5px;">
-                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #f1c40f;"></div>
-                <span>Category D</span>
-            </div>
-        </div>
-    </div>
-
-    <div style="width: 300px; margin-bottom: 40px;">
-        <div style="text-align: center; margin-bottom: 10px; font-weight: bold; font-size: 14px;">Bar Chart</div>
-        <div style="width: 300px; height: 200px; border-bottom: 2px solid white; border-left: 2px solid white; margin: 0 auto; position: relative; display: flex; align-items: flex-end; justify-content: space-around;">
-            <div class="hover-area" data-label="A" data-value="60%" style="width: 40px; background-color: #3498db; height: 60%;"></div>
-            <div class="hover-area" data-label="B" data-value="80%" style="width: 40px; background-color: #3498db; height: 80%;"></div>
-            <div class="hover-area" data-label="C" data-value="40%" style="width: 40px; background-color: #3498db; height: 40%;"></div>
-            <div class="hover-area" data-label="D" data-value="100%" style="width: 40px; background-color: #3498db; height: 100%;"></div>
-            <div class="hover-area" data-label="E" data-value="70%" style="width: 40px; background-color: #3498db; height: 70%;"></div>
-            <div style="position: absolute; color: white; font-size: 10px; bottom: -20px; left: 50%; transform: translateX(-50%);">Categories</div>
-            <div style="position: absolute; color: white; font-size: 10px; top: 50%; left: -20px; transform: translateY(-50%) rotate(-90deg);">Value</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 10%;">A</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 30%;">B</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 50%;">C</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 70%;">D</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 90%;">E</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 0;">0</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 25%;">25</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 50%;">50</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 75%;">75</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -20px; bottom: 100%;">100</div>
-        </div>
-        <div style="display: flex; justify-content: center; flex-wrap: wrap; margin-top: 10px; font-size: 12px;">
-            <div style="display: flex; align-items: center; margin: 0 10px;">
-                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #3498db;"></div>
-                <span>Data Series</span>
-            </div>
-        </div>
-    </div>
-
-    <div style="width: 300px; margin-bottom: 40px;">
-        <div style="text-align: center; margin-bottom: 10px; font-weight: bold; font-size: 14px;">Scatter Plot</div>
-        <div style="width: 300px; height: 200px; border-bottom: 2px solid white; border-left: 2px solid white; margin: 0 auto; position: relative;">
-            <div class="hover-area" data-label="Point 1" data-value="(20, 30)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 20%; bottom: 30%;"></div>
-            <div class="hover-area" data-label="Point 2" data-value="(40, 70)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 40%; bottom: 70%;"></div>
-            <div class="hover-area" data-label="Point 3" data-value="(60, 50)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 60%; bottom: 50%;"></div>
-            <div class="hover-area" data-label="Point 4" data-value="(80, 20)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 80%; bottom: 20%;"></div>
-            <div class="hover-area" data-label="Point 5" data-value="(30, 60)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 30%; bottom: 60%;"></div>
-            <div class="hover-area" data-label="Point 6" data-value="(70, 80)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 70%; bottom: 80%;"></div>
-            <div class="hover-area" data-label="Point 7" data-value="(50, 40)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 50%; bottom: 40%;"></div>
-            <div style="position: absolute; color: white; font-size: 10px; bottom: -20px; left: 50%; transform: translateX(-50%);">X Axis</div>
-            <div style="position: absolute; color: white; font-size: 10px; top: 50%; left: -20px; transform: translateY(-50%) rotate(-90deg);">Y Axis</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 0;">0</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 25%;">25</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 50%;">50</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 75%;">75</div>
-            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; right: -5px;">100</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 0;">0</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 25%;">25</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 50%;">50</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 75%;">75</div>
-            <div style="position: absolute; color: white; font-size: 8px; left: -20px; bottom: 100%;">100</div>
-        </div>
-        <div style="display: flex; justify-content: center; flex-wrap: wrap; margin-top: 10px; font-size: 12px;">
-            <div style="display: flex; align-items: center; margin: 0 10px;">
-                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #3498db;"></div>
-                <span>Data Points</span>
-            </div>
-        </div>
-    </div>
-
-    <div id="tooltip" style="position: fixed; background-color: rgba(255,255,255,0.9); color: black; padding: 5px 10px; border-radius: 5px; font-size: 12px; pointer-events: none; display: none;"></div>
-
-
-Remember: Not every data-related question needs a visualization. You can output these visualizations directly in vanilla HTML and CSS and the frontend will render them"""
+        # Prepare data context for the AI from the memoized dataset profile
+        data_info = profile_cache.get_or_build(
+            df, fingerprint, schema_key=context['dataset_id'] if registered else None)
+
+        # Counts, averages, group-bys and the like are answered without the model
+        local_answer = answer_locally(question, df, data_info['numeric_columns'],
+                                      data_info['categorical_columns'])
+        if local_answer is not None:
+            return local_answer
+
+        # Fit the static instructions, data profile and history into the token budget
+        prompt = build_prompt(question, data_info, context.get('conversation_history', []),
+                              model=DEFAULT_MODEL)
+        logger.info(f"Prompt tokens: {prompt['tokens']}")
 
         # Define functions for visualization
         functions = [{
@@ -569,13 +750,34 @@ Remember: Not every data-related question needs a visualization. You can output
                 "properties": {
                     "chart_type": {
                         "type": "string",
-                        "enum": ["bar", "line", "scatter", "pie"],
-                        "description": "Type of chart to create"
+                        "enum": ["bar", "line", "scatter", "pie", "heatmap", "histogram"],
+                        "description": "Type of chart to create; heatmap shows the density of two numeric columns and histogram the distribution of one"
                     },
                     "title": {
                         "type": "string",
                         "description": "Chart title"
                     },
+                    "x": {
+                        "type": "string",
+                        "description": "Column to group by on the x axis (bar and line charts)"
+                    },
+                    "y": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Numeric columns to aggregate per x value"
+                    },
+                    "agg": {
+                        "type": "string",
+                        "description": "Aggregate per x value: mean, median, sum, count, min, max or a percentile such as p90"
+                    },
+                    "series": {
+                        "type": "string",
+                        "description": "Optional categorical column that splits the chart into one line or bar group per value"
+                    },
+                    "bins": {
+                        "type": "integer",
+                        "description": "Bins per axis for heatmaps, or bins for histograms"
+                    },
                     "should_visualize": {
                         "type": "boolean",
                         "description": "Whether a visualization should be created"
@@ -585,60 +787,55 @@ Remember: Not every data-related question needs a visualization. You can output
             }
         }]
 
+        # Registered datasets are referenced by id instead of embedding every row
+        # The fingerprint stands in for the rows when building the cache key
+        if registered:
+            request_context = {'dataset_id': context['dataset_id'], 'data_info': data_info,
+                               'fingerprint': fingerprint}
+        else:
+            request_context = {'data': data, 'data_info': data_info, 'fingerprint': fingerprint}
+
+        return {
+            'request': {
+                'system_prompt': prompt['system_prompt'],
+                'functions': functions,
+                'context': request_context,
+                'previous_messages': prompt['previous_messages']
+            },
+            'df': df,
+            'tokens': prompt['tokens']
+        }
+
+    except Exception as e:
+        logger.error(f"Error preparing AI request: {str(e)}")
+        return {
+            'answer': "I apologize, but I encountered an error while processing your request.",
+            'visualization': None,
+            'web_search_used': False
+        }
+
+
+async def get_ai_insights(question: str, context: dict,
+                          df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Get AI insights with improved intent recognition and data access.
+
+    When ``df`` is given (a frame resolved from the dataset registry) it is
+    used directly and ``context['data']`` is ignored.
+    """
+    try:
+        prepared = await prepare_ai_request(question, context, df)
+        if 'request' not in prepared:
+            return prepared
+
         # Send request to OpenAI with data context
-        response = await send_openai_request(
-            question,
-            system_prompt=system_prompt,
-            # functions=functions,
-            context={'data': data, 'data_info': data_info},
-            previous_messages=context.get('conversation_history', [])
-        )
+        response = await send_openai_request(question, **prepared['request'])
 
-        # Extract the response
-        if isinstance(response, dict) and 'function_call' in response:
-            # Check if visualization was recommended
-            try:
-                args = json.loads(response['function_call']['arguments'])
-                should_visualize = args.get('should_visualize', False)
-                
-                if not should_visualize:
-                    return {
-                        'answer': response.get('content', 'I understand your question. ') +
-                                (response.get('additional_response', '')),
-                        'visualization': None,
-                        'web_search_used': False
-                    }
-                
-                # If visualization is needed, proceed with the existing visualization logic
-                viz_config = await create_visualization(args, data)
-                if viz_config:
-                    return {
-                        'answer': response.get('content', 'Here\'s a visualization of the data. ') +
-                                (response.get('additional_response', '')),
-                        'visualization': viz_config,
-                        'web_search_used': False
-                    }
-                else:
-                    return {
-                        'answer': "I apologize, but I couldn't create the visualization. " + 
-                                response.get('content', ''),
-                        'visualization': None,
-                        'web_search_used': False
-                    }
-            except json.JSONDecodeError:
-                logger.error("Error parsing function call arguments")
-                return {
-                    'answer': response.get('content', 'I understand your question, but there was an error creating the visualization.'),
-                    'visualization': None,
-                    'web_search_used': False
-                }
-        else:
-            # Return just the text response for conversational queries
-            return {
-                'answer': response.get('content', 'I understand your question.'),
-                'visualization': None,
-                'web_search_used': False
-            }
+        # A chart the model asked for was built while handling its function call
+        return {
+            'answer': response.get('content') or 'I understand your question.',
+            'visualization': response_visualization(response),
+            'web_search_used': False
+        }
 
     except Exception as e:
         # print(f"Error in get_ai_insights: {str(e)}")
@@ -0,0 +1,231 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class FileCacheBackend:
+    """Disk tier storing one ``<key>.json`` file per response."""
+
+    def __init__(self, cache_dir: str):
+        """Initialize the file backend."""
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, cache_key: str) -> Path:
+        """Get the file path for a cache key."""
+        return self.cache_dir / f"{cache_key}.json"
+
+    def read(self, cache_key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Return (timestamp, response) for a key, or None if absent.
+
+        Corrupted files are removed and reported as absent.
+        """
+        path = self._path(cache_key)
+        if not path.exists():
+            return None
+        try:
+            cache_data = json.loads(path.read_text())
+            return cache_data["timestamp"], cache_data["response"]
+        except (json.JSONDecodeError, KeyError, OSError) as e:
+            logger.error(f"Error reading cache: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def write(self, cache_key: str, timestamp: float, response: Dict[str, Any]) -> None:
+        """Store a response atomically so concurrent readers never see a partial file."""
+        path = self._path(cache_key)
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        temp_path.write_text(json.dumps({"timestamp": timestamp, "response": response}))
+        os.replace(temp_path, path)
+
+    def delete(self, cache_key: str) -> None:
+        """Remove one response."""
+        self._path(cache_key).unlink(missing_ok=True)
+
+    def clear(self) -> int:
+        """Remove every response and return how many were removed."""
+        cache_files = list(self.cache_dir.glob("*.json"))
+        for path in cache_files:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.error(f"Error deleting cache file {path}: {str(e)}")
+        return len(cache_files)
+
+    def sweep(self, ttl: float, max_bytes: int) -> Dict[str, Any]:
+        """Delete expired files, then the oldest ones over the size cap.
+
+        File modification times stand in for the write timestamp, so no
+        file has to be opened.
+        """
+        now = time.time()
+        files = []
+        expired_keys: List[str] = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > ttl:
+                path.unlink(missing_ok=True)
+                expired_keys.append(path.stem)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        if total > max_bytes:
+            for _, size, path in sorted(files):
+                if total <= max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                evicted += 1
+        return {'expired_keys': expired_keys, 'evicted': evicted, 'disk_bytes': total}
+
+
+class SQLiteCacheBackend:
+    """Disk tier in a single SQLite database in WAL mode.
+
+    Entries are indexed by creation time, so expiry and size-based eviction
+    are range deletes instead of directory scans. Writes are buffered and
+    committed in batches inside one transaction; reads see buffered writes.
+    A background flusher commits whatever is buffered every
+    ``flush_interval`` seconds, so a lone write reaches other processes
+    within that interval; ``flush_interval=0`` commits every write at once.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 32, flush_interval: float = 1.0):
+        """Initialize the SQLite backend and create its schema."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._pending: Dict[str, Tuple[float, str]] = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.time()
+        self._stop_flusher = threading.Event()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, created REAL NOT NULL, "
+                "size INTEGER NOT NULL, payload TEXT NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries (created)")
+        atexit.register(self.flush)
+        if flush_interval > 0:
+            flusher = threading.Thread(target=self._flush_loop, name="sqlite-cache-flusher", daemon=True)
+            flusher.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def read(self, cache_key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Return (timestamp, response) for a key, or None if absent."""
+        with self._pending_lock:
+            pending = self._pending.get(cache_key)
+        if pending is not None:
+            return pending[0], json.loads(pending[1])
+
+        row = self._connection().execute(
+            "SELECT created, payload FROM entries WHERE key = ?", (cache_key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return row[0], json.loads(row[1])
+        except json.JSONDecodeError as e:
+            logger.error(f"Error reading cache: {str(e)}")
+            self.delete(cache_key)
+            return None
+
+    def write(self, cache_key: str, timestamp: float, response: Dict[str, Any]) -> None:
+        """Buffer a response, committing the batch when it is full or stale."""
+        with self._pending_lock:
+            self._pending[cache_key] = (timestamp, json.dumps(response))
+            due = (len(self._pending) >= self.batch_size
+                   or time.time() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Commit all buffered writes in one transaction."""
+        with self._pending_lock:
+            batch, self._pending = self._pending, {}
+            self._last_flush = time.time()
+        if not batch:
+            return 0
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO entries (key, created, size, payload) VALUES (?, ?, ?, ?)",
+                [(key, created, len(payload), payload) for key, (created, payload) in batch.items()])
+        return len(batch)
+
+    def _flush_loop(self) -> None:
+        """Commit buffered writes every ``flush_interval`` seconds until stopped."""
+        while not self._stop_flusher.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Error flushing cache: {str(e)}")
+
+    def stop_flusher(self) -> None:
+        """Stop the background flusher thread and commit what it left buffered."""
+        self._stop_flusher.set()
+        self.flush()
+
+    def delete(self, cache_key: str) -> None:
+        """Remove one response."""
+        with self._pending_lock:
+            self._pending.pop(cache_key, None)
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM entries WHERE key = ?", (cache_key,))
+
+    def clear(self) -> int:
+        """Remove every response and return how many were removed."""
+        with self._pending_lock:
+            pending = len(self._pending)
+            self._pending.clear()
+        connection = self._connection()
+        with connection:
+            removed = connection.execute("DELETE FROM entries").rowcount
+        return removed + pending
+
+    def sweep(self, ttl: float, max_bytes: int) -> Dict[str, Any]:
+        """Delete expired rows, then the oldest rows over the size cap."""
+        self.flush()
+        connection = self._connection()
+        cutoff = time.time() - ttl
+        with connection:
+            expired_keys = [row[0] for row in connection.execute(
+                "SELECT key FROM entries WHERE created < ?", (cutoff,))]
+            connection.execute("DELETE FROM entries WHERE created < ?", (cutoff,))
+
+            total = 0
+            over: List[Tuple[str]] = []
+            for key, size in connection.execute("SELECT key, size FROM entries ORDER BY created DESC"):
+                total += size
+                if total > max_bytes:
+                    over.append((key,))
+            connection.executemany("DELETE FROM entries WHERE key = ?", over)
+
+        disk_bytes = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        return {'expired_keys': expired_keys, 'evicted': len(over), 'disk_bytes': int(disk_bytes)}
@@ -2,13 +2,20 @@ import hashlib
 import json
 import time
 from functools import wraps
-from typing import Any, Dict, Optional, List
+from typing import Any, Awaitable, Callable, Dict, Optional, List, Tuple
 import os
 from pathlib import Path
 import asyncio
+import threading
+from collections import OrderedDict
+import concurrent.futures
+import copy
 from concurrent.futures import ThreadPoolExecutor
+import sqlite3
 import logging
 
+from .cache_backends import FileCacheBackend, SQLiteCacheBackend
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,80 +23,207 @@ logger = logging.getLogger(__name__)
 DEFAULT_MODEL = "gpt-4o"  # Latest GPT-4 Turbo model
 FALLBACK_MODEL = "gpt-4o"  # Fallback model
 
+DEFAULT_MEMORY_MAX_BYTES = int(os.getenv('OPENAI_CACHE_MEMORY_MB', '64')) * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = int(os.getenv('OPENAI_CACHE_DISK_MB', '512')) * 1024 * 1024
+DEFAULT_SWEEP_INTERVAL = float(os.getenv('OPENAI_CACHE_SWEEP_SECONDS', '300'))
+DEFAULT_BACKEND = os.getenv('OPENAI_CACHE_BACKEND', 'file')
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU with a byte budget and per-entry expiry.
+
+    Entries hold the serialized response, so hits hand out a fresh copy
+    and the budget counts real payload bytes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_MAX_BYTES):
+        """Initialize the memory tier."""
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return a live entry and mark it recently used."""
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if time.time() > expires_at:
+                self._discard(cache_key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+        return json.loads(payload)
+
+    def set(self, cache_key: str, payload: str, expires_at: float) -> None:
+        """Store a serialized response, evicting least recently used entries."""
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(cache_key)
+            self._entries[cache_key] = (expires_at, payload)
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def delete(self, cache_key: str) -> None:
+        """Drop one entry."""
+        with self._lock:
+            self._discard(cache_key)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return occupancy and hit/miss/eviction counters."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+    def _discard(self, cache_key: str) -> None:
+        """Remove an entry; the caller must hold the lock."""
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
 
 class OpenAICache:
+    """Two-tier response cache: an in-process LRU in front of a disk backend.
+
+    The disk tier is one JSON file per entry (``backend='file'``) or a
+    single SQLite database (``backend='sqlite'``). A background sweeper,
+    started by the first write, removes expired entries and keeps the disk
+    tier under ``max_disk_bytes`` by evicting the oldest entries first.
+    """
 
-    def __init__(self, cache_dir: str = ".cache/openai", ttl: int = 3600):
+    def __init__(self, cache_dir: str = ".cache/openai", ttl: int = 3600,
+                 memory_max_bytes: int = DEFAULT_MEMORY_MAX_BYTES,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+                 sweep_interval: float = DEFAULT_SWEEP_INTERVAL,
+                 backend: str = DEFAULT_BACKEND):
         """Initialize the cache manager."""
         self.cache_dir = Path(cache_dir)
         self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self._lock = asyncio.Lock()
+        if backend == 'sqlite':
+            self.backend = SQLiteCacheBackend(str(self.cache_dir / "cache.sqlite3"))
+        elif backend == 'file':
+            self.backend = FileCacheBackend(str(self.cache_dir))
+        else:
+            raise ValueError(f"Unknown cache backend '{backend}'")
         self._thread_pool = ThreadPoolExecutor()
+        # In-flight upstream calls by cache key; routes may run on different
+        # event loops, so these are thread-safe futures rather than asyncio ones
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.coalesced = 0
+        self.memory = MemoryCache(memory_max_bytes)
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self.sweep_interval = sweep_interval
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_lock = threading.Lock()
+        self._stop_sweeper = threading.Event()
 
     def _generate_cache_key(self, prompt: str, **kwargs) -> str:
-        """Generate a unique cache key based on the request parameters."""
+        """Generate a unique cache key based on the request parameters.
+
+        When the request context carries a dataset ``fingerprint`` it stands
+        in for the dataset rows and derived data_info, so the key costs the
+        same regardless of dataset size.
+        """
         try:
-            # Create a dictionary of all parameters that affect the response
-            cache_dict = {
-                "prompt": prompt,
-                "model": kwargs.get("model", DEFAULT_MODEL),
-                "functions": kwargs.get("functions"),
-                **{
-                    k: v
-                    for k, v in kwargs.items() if k not in [
-                        "cache", "client", "model", "functions"
-                    ]
-                }
-            }
-            # Convert to a stable string representation and hash it
-            cache_str = json.dumps(cache_dict, sort_keys=True)
-            return hashlib.sha256(cache_str.encode()).hexdigest()
+            hasher = hashlib.sha256()
+            for name, value in (("prompt", prompt),
+                                ("model", kwargs.get("model", DEFAULT_MODEL)),
+                                ("functions", kwargs.get("functions"))):
+                hasher.update(f"{name}\x00".encode())
+                hasher.update(self._value_digest(value))
+
+            for name in sorted(kwargs):
+                if name in ("cache", "client", "model", "functions"):
+                    continue
+                value = kwargs[name]
+                if name == "context" and isinstance(value, dict) and value.get("fingerprint"):
+                    value = {
+                        k: v for k, v in value.items()
+                        if k not in ("data", "data_info", "dataset_id")
+                    }
+                hasher.update(f"{name}\x00".encode())
+                hasher.update(self._value_digest(value))
+            return hasher.hexdigest()
         except Exception as e:
             logger.error(f"Error generating cache key: {str(e)}")
             # Fallback to a simple hash of the prompt and model
             fallback_str = f"{prompt}:{kwargs.get('model', DEFAULT_MODEL)}"
             return hashlib.sha256(fallback_str.encode()).hexdigest()
 
-    def _get_cache_path(self, cache_key: str) -> Path:
-        """Get the file path for a cache key."""
-        return self.cache_dir / f"{cache_key}.json"
+    @staticmethod
+    def _value_digest(value: Any) -> bytes:
+        """Hash one request parameter; strings skip JSON encoding."""
+        if isinstance(value, str):
+            raw = value.encode()
+        else:
+            raw = json.dumps(value, sort_keys=True, default=str).encode()
+        return hashlib.sha256(raw).digest()
+
+    def cache_key(self, prompt: str, **kwargs) -> str:
+        """Public cache key for a request, computed once per call site."""
+        return self._generate_cache_key(prompt, **kwargs)
 
     async def get(self, prompt: str, **kwargs) -> Optional[Dict[str, Any]]:
         """Retrieve a cached response if it exists and is valid."""
+        return await self.get_by_key(self._generate_cache_key(prompt, **kwargs), prompt)
+
+    async def get_by_key(self, cache_key: str, prompt: str = "") -> Optional[Dict[str, Any]]:
+        """Retrieve a cached response by a precomputed key.
+
+        The memory tier answers without touching the event loop; disk hits
+        are promoted into it for the rest of their lifetime.
+        """
+        response = self.memory.get(cache_key)
+        if response is not None:
+            return response
+
         try:
-            async with self._lock:
-                cache_key = self._generate_cache_key(prompt, **kwargs)
-                cache_path = self._get_cache_path(cache_key)
+            loop = asyncio.get_event_loop()
+            record = await loop.run_in_executor(self._thread_pool, self.backend.read, cache_key)
+            if record is None:
+                return None
 
-                if not cache_path.exists():
-                    return None
+            # Check if cache has expired
+            timestamp, response = record
+            expires_at = timestamp + self.ttl
+            if time.time() > expires_at:
+                await loop.run_in_executor(self._thread_pool, self.backend.delete, cache_key)
+                return None
 
-                try:
-                    loop = asyncio.get_event_loop()
-                    cache_data = await loop.run_in_executor(
-                        self._thread_pool,
-                        lambda: json.loads(cache_path.read_text()))
-
-                    # Check if cache has expired
-                    if time.time() - cache_data["timestamp"] > self.ttl:
-                        await loop.run_in_executor(
-                            self._thread_pool,
-                            lambda: cache_path.unlink(missing_ok=True))
-                        return None
-
-                    logger.info(f"Cache hit for prompt: {prompt[:50]}...")
-                    return cache_data["response"]
-                except (json.JSONDecodeError, KeyError, OSError) as e:
-                    logger.error(f"Error reading cache: {str(e)}")
-                    # Try to clean up corrupted cache file
-                    try:
-                        await loop.run_in_executor(
-                            self._thread_pool,
-                            lambda: cache_path.unlink(missing_ok=True))
-                    except:
-                        pass
-                    return None
+            self.disk_hits += 1
+            self.memory.set(cache_key, json.dumps(response), expires_at)
+            logger.info(f"Cache hit for prompt: {prompt[:50]}...")
+            return response
         except Exception as e:
             logger.error(f"Error in cache get: {str(e)}")
             return None
@@ -97,76 +231,186 @@ class OpenAICache:
     async def set(self, prompt: str, response: Dict[str, Any],
                   **kwargs) -> None:
         """Store a response in the cache."""
-        try:
-            async with self._lock:
-                cache_key = self._generate_cache_key(prompt, **kwargs)
-                cache_path = self._get_cache_path(cache_key)
+        await self.set_by_key(self._generate_cache_key(prompt, **kwargs), response, prompt)
 
-                cache_data = {"timestamp": time.time(), "response": response}
+    async def set_by_key(self, cache_key: str, response: Dict[str, Any],
+                         prompt: str = "") -> None:
+        """Store a response under a precomputed key in both tiers."""
+        try:
+            self._start_sweeper()
+            timestamp = time.time()
+            self.memory.set(cache_key, json.dumps(response), timestamp + self.ttl)
 
-                try:
-                    loop = asyncio.get_event_loop()
-                    await loop.run_in_executor(
-                        self._thread_pool,
-                        lambda: cache_path.write_text(json.dumps(cache_data)))
-                    logger.info(
-                        f"Cached response for prompt: {prompt[:50]}...")
-                except OSError as e:
-                    logger.error(f"Error writing cache: {str(e)}")
+            try:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(
+                    self._thread_pool, self.backend.write, cache_key, timestamp, response)
+                logger.info(
+                    f"Cached response for prompt: {prompt[:50]}...")
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Error writing cache: {str(e)}")
         except Exception as e:
             logger.error(f"Error in cache set: {str(e)}")
 
     async def clear(self) -> None:
         """Clear all cached responses."""
+        self.memory.clear()
         try:
-            async with self._lock:
-                loop = asyncio.get_event_loop()
-                cache_files = list(self.cache_dir.glob("*.json"))
-
-                async def delete_file(file_path: Path):
-                    try:
-                        await loop.run_in_executor(
-                            self._thread_pool,
-                            lambda: file_path.unlink(missing_ok=True))
-                    except OSError as e:
-                        logger.error(
-                            f"Error deleting cache file {file_path}: {str(e)}")
-
-                await asyncio.gather(*[delete_file(f) for f in cache_files])
-                logger.info(f"Cleared {len(cache_files)} cache files")
+            loop = asyncio.get_event_loop()
+            removed = await loop.run_in_executor(self._thread_pool, self.backend.clear)
+            logger.info(f"Cleared {removed} cached responses")
         except Exception as e:
             logger.error(f"Error clearing cache: {str(e)}")
 
+    def begin_flight(self, cache_key: str) -> Tuple[concurrent.futures.Future, bool]:
+        """Join the in-flight upstream call for a key, starting one if there is none.
+
+        Returns the call's future and whether this caller is the leader.
+        The leader must make the call and pass its outcome to
+        ``end_flight``; followers await the future.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = concurrent.futures.Future()
+            self._inflight[cache_key] = future
+            return future, True
+
+    def end_flight(self, cache_key: str, future: concurrent.futures.Future,
+                   result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Settle a leader's call, waking its followers, and free the key."""
+        with self._inflight_lock:
+            if self._inflight.get(cache_key) is future:
+                del self._inflight[cache_key]
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def single_flight(self, cache_key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fetch`` for a key unless a call for the same key is in flight.
+
+        Callers arriving while it runs share its result (as a deep copy) or
+        its exception. Calls for different keys never wait on each other.
+        """
+        future, leader = self.begin_flight(cache_key)
+        if not leader:
+            return copy.deepcopy(await asyncio.wrap_future(future))
+        try:
+            result = await fetch()
+        except BaseException as e:
+            self.end_flight(cache_key, future, error=e)
+            raise
+        self.end_flight(cache_key, future, result)
+        return result
+
+    def sweep(self) -> Dict[str, int]:
+        """Expire old entries and enforce the disk size cap."""
+        result = self.backend.sweep(self.ttl, self.max_disk_bytes)
+        for cache_key in result['expired_keys']:
+            self.memory.delete(cache_key)
+        expired = len(result['expired_keys'])
+        evicted = result['evicted']
+        self.disk_evictions += evicted
+
+        if expired or evicted:
+            logger.info(f"Cache sweep removed {expired} expired and {evicted} entries over the size cap")
+        return {'expired': expired, 'evicted': evicted, 'disk_bytes': result['disk_bytes']}
+
+    def _sweep_loop(self, interval: float) -> None:
+        """Run ``sweep`` every ``interval`` seconds until stopped."""
+        while not self._stop_sweeper.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Error sweeping cache: {str(e)}")
+
+    def _start_sweeper(self) -> None:
+        """Start the sweeper thread once, unless sweeping is off or was stopped."""
+        if self._sweeper is not None or self.sweep_interval <= 0:
+            return
+        with self._sweeper_lock:
+            if self._sweeper is None and not self._stop_sweeper.is_set():
+                self._sweeper = threading.Thread(target=self._sweep_loop, args=(self.sweep_interval,),
+                                                 name="openai-cache-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper thread and wait for it to exit."""
+        self._stop_sweeper.set()
+        with self._sweeper_lock:
+            sweeper = self._sweeper
+        if sweeper is not None:
+            sweeper.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters for both tiers."""
+        return {
+            'memory': self.memory.stats(),
+            'disk_hits': self.disk_hits,
+            'disk_evictions': self.disk_evictions,
+            'coalesced': self.coalesced,
+            'max_disk_bytes': self.max_disk_bytes
+        }
+
+
+def is_cacheable(response: Any) -> bool:
+    """Only cache successful responses."""
+    return (response and not isinstance(response.get("content"), str)
+            or not "error" in response.get("content", "").lower())
+
 
 def cache_openai_request(cache: OpenAICache):
-    """Decorator to cache OpenAI API requests."""
+    """Decorator to cache OpenAI API requests.
+
+    Concurrent misses for the same key are coalesced: the first caller
+    makes the upstream call and the others await its result, while
+    requests for different keys proceed independently.
+    """
 
     def decorator(func):
 
+        async def fetch(cache_key: str, prompt: str, *args, **kwargs):
+            """Look the key up again, then call upstream and store the result."""
+            cached_response = await cache.get_by_key(cache_key, prompt)
+            if cached_response is not None:
+                return cached_response
+
+            response = await func(prompt, *args, **kwargs)
+            if is_cacheable(response):
+                await cache.set_by_key(cache_key, response, prompt)
+            return response
+
         @wraps(func)
         async def wrapper(prompt: str, *args, **kwargs):
             try:
+                # Build the key once for both the lookup and the store
+                cache_key = cache.cache_key(prompt, **kwargs)
+
                 # Try to get from cache first
-                cached_response = await cache.get(prompt, **kwargs)
+                cached_response = await cache.get_by_key(cache_key, prompt)
 
                 if cached_response is not None:
                     return cached_response
-
-                # If not in cache, make the actual API call
-                response = await func(prompt, *args, **kwargs)
-
-                # Only cache successful responses
-                if response and not isinstance(response.get(
-                        "content"), str) or not "error" in response.get(
-                            "content", "").lower():
-                    await cache.set(prompt, response, **kwargs)
-
-                return response
             except Exception as e:
                 logger.error(f"Error in cache decorator: {str(e)}")
                 # If caching fails, still try to get a response
                 return await func(prompt, *args, **kwargs)
 
+            async def fetch_or_call():
+                try:
+                    return await fetch(cache_key, prompt, *args, **kwargs)
+                except Exception as e:
+                    logger.error(f"Error in cache decorator: {str(e)}")
+                    # If caching fails, still try to get a response
+                    return await func(prompt, *args, **kwargs)
+
+            return await cache.single_flight(cache_key, fetch_or_call)
+
         return wrapper
 
     return decorator
@@ -0,0 +1,139 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .downsampling import DEFAULT_MAX_CATEGORIES, OTHER_LABEL
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES = ('mean', 'median', 'sum', 'count', 'min', 'max')
+AGGREGATE_ALIASES = {'average': 'mean', 'avg': 'mean', 'total': 'sum'}
+# "p90", "p99.5", "percentile_90"
+PERCENTILE_PATTERN = re.compile(r'^(?:p|percentile[_ ]?)(\d{1,2}(?:\.\d+)?)$')
+DEFAULT_AGGREGATE = 'mean'
+
+
+def parse_aggregate(agg: Optional[str]) -> Tuple[str, Optional[float]]:
+    """Normalize an aggregate name to (function, quantile).
+
+    Percentiles come back as ``('quantile', q)``; unknown names fall back
+    to the mean.
+    """
+    name = str(agg or DEFAULT_AGGREGATE).strip().lower()
+    name = AGGREGATE_ALIASES.get(name, name)
+    if name in AGGREGATES:
+        return name, None
+    match = PERCENTILE_PATTERN.match(name)
+    if match:
+        return 'quantile', float(match.group(1)) / 100
+    logger.warning(f"Unknown aggregate '{agg}', using {DEFAULT_AGGREGATE}")
+    return DEFAULT_AGGREGATE, None
+
+
+def aggregate_label(agg: Optional[str]) -> str:
+    """Readable name of an aggregate for axis titles and legends."""
+    function, quantile = parse_aggregate(agg)
+    if function == 'quantile':
+        return f"p{quantile * 100:g}"
+    return function
+
+
+def fold_categories(keys: pd.Series, max_categories: int = DEFAULT_MAX_CATEGORIES,
+                    other_label: str = OTHER_LABEL,
+                    profile: Optional[Dict[str, Any]] = None) -> pd.Series:
+    """Relabel all but the most frequent ``max_categories - 1`` keys as "Other".
+
+    Folding happens on the rows, before aggregation, so every aggregate
+    of the "Other" group is computed correctly. Missing keys stay missing.
+    With the column's ``profile`` from ``dataset_profile`` the distinct
+    count and ranking are read from it instead of counting the keys.
+    """
+    if profile is not None:
+        present = profile['unique_values'] - (1 if profile.get('null_count') else 0)
+        if present <= max_categories:
+            return keys
+        if len(profile.get('top_values', [])) >= max_categories - 1:
+            top = [entry['value'] for entry in profile['top_values'][:max_categories - 1]]
+            return keys.astype(object).where(keys.isin(top) | keys.isna(), other_label)
+
+    counts = keys.value_counts(sort=True)
+    if len(counts) <= max_categories:
+        return keys
+    top = counts.index[:max_categories - 1]
+    return keys.astype(object).where(keys.isin(top) | keys.isna(), other_label)
+
+
+def _plain(values: np.ndarray) -> List[Any]:
+    """Float array as a JSON-ready list with NaN as None."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def aggregate_series(df: pd.DataFrame, x: Any, ys: List[Any], agg: Optional[str] = None,
+                     series: Optional[Any] = None,
+                     max_categories: int = DEFAULT_MAX_CATEGORIES,
+                     fold_x: bool = False,
+                     profiles: Optional[Dict[Any, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Aggregate y columns per distinct x, optionally split by a series column.
+
+    Runs as a single groupby over ``[x, series]``. The aggregate is one of
+    mean, median, sum, count, min, max or a percentile such as ``p90``;
+    ``count`` counts non-null y values, or rows when no y is given. A
+    series column is limited to its ``max_categories`` most frequent
+    values plus "Other", and so is x when ``fold_x`` is set; ``profiles``
+    maps columns to their precomputed profiles for that ranking.
+
+    Returns the sorted distinct x values and one ``{'name', 'data'}`` entry
+    per output series, aligned with them.
+    """
+    function, quantile = parse_aggregate(agg)
+    profiles = profiles or {}
+    keys = {'__x': fold_categories(df[x], max_categories, profile=profiles.get(x)) if fold_x else df[x]}
+    if series is not None:
+        keys['__series'] = fold_categories(df[series], max_categories, profile=profiles.get(series))
+    frame = pd.DataFrame(keys, index=df.index)
+
+    value_columns = []
+    for position, column in enumerate(ys):
+        values = df[column]
+        if not pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+            values = pd.to_numeric(values.astype(object), errors='coerce')
+        frame[f'__y{position}'] = values
+        value_columns.append(f'__y{position}')
+    if not value_columns:
+        frame['__y0'] = 1
+        value_columns = ['__y0']
+        function = 'count'
+
+    grouped = frame.groupby(list(keys), observed=True, sort=True, dropna=True)[value_columns]
+    if function == 'quantile':
+        result = grouped.quantile(quantile)
+    else:
+        result = grouped.agg(function)
+
+    if series is not None:
+        result = result.unstack('__series')
+    if fold_x and OTHER_LABEL in result.index:
+        # Keep "Other" last rather than wherever it sorts
+        result = result.reindex([*result.index.drop(OTHER_LABEL), OTHER_LABEL])
+
+    names = [str(column) for column in ys] or ['count']
+    output = []
+    for key in result.columns:
+        if series is None:
+            name = names[value_columns.index(key)]
+        else:
+            value_key, series_value = key
+            name = str(series_value) if len(names) == 1 else f"{names[value_columns.index(value_key)]} ({series_value})"
+        output.append({'name': name, 'data': _plain(result[key].to_numpy())})
+
+    x_values = result.index.to_numpy()
+    return {
+        'x': x_values.tolist(),
+        'series': output,
+        'input_rows': int(len(df)),
+        'groups': int(len(x_values))
+    }
@@ -0,0 +1,140 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+import logging
+
+from .chart_aggregation import aggregate_label
+from .downsampling import (DEFAULT_MAX_CATEGORIES, DEFAULT_POINT_BUDGET, SCATTER_POINT_THRESHOLD,
+                           heatmap_bins, histogram_bins)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.getenv('CHART_CACHE_ENTRIES', '256'))
+
+
+def normalize_spec(config: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a chart request that determine its data.
+
+    Defaults are filled in and aggregate aliases resolved, so equivalent
+    requests share an entry; the title is left out and applied per request.
+    Bins are resolved the way the chart type uses them and left out for
+    chart types that have none.
+    """
+    chart_type = str(config.get('chart_type') or 'line')
+    if chart_type == 'histogram':
+        bins = [histogram_bins(config.get('bins'))]
+    elif chart_type in ('scatter', 'heatmap', 'hexbin'):
+        bins = list(heatmap_bins(config.get('bins')))
+    else:
+        bins = None
+    y = config.get('y')
+    if isinstance(y, (list, tuple)):
+        y = [str(column) for column in y]
+    elif y is not None:
+        y = [str(y)]
+    return {
+        'chart_type': chart_type,
+        'x': None if config.get('x') is None else str(config['x']),
+        'y': y,
+        'agg': aggregate_label(config.get('agg')),
+        'series': None if config.get('series') is None else str(config['series']),
+        'point_budget': int(config.get('point_budget') or DEFAULT_POINT_BUDGET),
+        'max_categories': int(config.get('max_categories') or DEFAULT_MAX_CATEGORIES),
+        'bins': bins,
+        'scatter_threshold': int(config.get('scatter_threshold') or SCATTER_POINT_THRESHOLD),
+    }
+
+
+class ChartCache:
+    """LRU of computed chart configs keyed by dataset fingerprint and chart spec."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Initialize the chart cache."""
+        self.max_entries = max_entries
+        self._charts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_fingerprint: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(fingerprint: str, config: Dict[str, Any]) -> str:
+        """Cache key for a chart of a dataset."""
+        spec = json.dumps(normalize_spec(config), sort_keys=True)
+        return f"{fingerprint}:{hashlib.sha256(spec.encode()).hexdigest()}"
+
+    def get(self, fingerprint: Optional[str], config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached chart, titled for this request, if any."""
+        if not fingerprint:
+            return None
+        key = self.key(fingerprint, config)
+        with self._lock:
+            chart = self._charts.get(key)
+            if chart is None:
+                self.misses += 1
+                return None
+            self._charts.move_to_end(key)
+            self.hits += 1
+        chart = copy.deepcopy(chart)
+        chart['config']['title']['text'] = config.get('title', 'Data Visualization')
+        return chart
+
+    def set(self, fingerprint: Optional[str], config: Dict[str, Any], chart: Dict[str, Any]) -> None:
+        """Store a chart, evicting the least recently used one if full."""
+        if not fingerprint or chart is None:
+            return
+        key = self.key(fingerprint, config)
+        with self._lock:
+            self._charts[key] = copy.deepcopy(chart)
+            self._charts.move_to_end(key)
+            self._by_fingerprint.setdefault(fingerprint, set()).add(key)
+            while len(self._charts) > self.max_entries:
+                oldest, _ = self._charts.popitem(last=False)
+                self._forget(oldest)
+
+    def invalidate(self, fingerprint: str) -> int:
+        """Drop every chart of a dataset and return how many were dropped."""
+        with self._lock:
+            keys = self._by_fingerprint.pop(fingerprint, set())
+            for key in keys:
+                self._charts.pop(key, None)
+            self.invalidations += len(keys)
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cached charts for dataset {fingerprint}")
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop all cached charts."""
+        with self._lock:
+            self._charts.clear()
+            self._by_fingerprint.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return occupancy and hit-rate counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._charts),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+    def _forget(self, key: str) -> None:
+        """Remove an evicted key from the fingerprint index; the caller must hold the lock."""
+        fingerprint = key.split(':', 1)[0]
+        keys = self._by_fingerprint.get(fingerprint)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_fingerprint[fingerprint]
+
+
+chart_cache = ChartCache()
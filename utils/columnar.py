@@ -0,0 +1,248 @@
+import json
+import struct
+from typing import Any, Dict, List, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_JSON_MIMETYPE = 'application/vnd.datalens.columnar+json'
+COLUMNAR_BINARY_MIMETYPE = 'application/vnd.datalens.columnar'
+
+BINARY_MAGIC = b'DLC1'
+BINARY_ALIGNMENT = 8
+
+# Strings are dictionary-encoded when distinct values are at most this share of rows
+DICTIONARY_MAX_RATIO = 0.5
+
+_INT_DTYPES = [np.int8, np.int16, np.int32]
+
+
+def is_columnar(payload: Any) -> bool:
+    """Check whether a payload is a columnar-encoded dataset."""
+    return isinstance(payload, dict) and payload.get('format') == 'columnar'
+
+
+def _dictionary_parts(series: pd.Series):
+    """Return (codes, dictionary) for a categorical or string column."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    return codes, uniques
+
+
+def _smallest_int_dtype(values: np.ndarray, allow_negative_one: bool = False):
+    """Pick the narrowest signed integer dtype JS typed arrays can read."""
+    if len(values) == 0:
+        return np.int8
+    low = min(int(values.min()), -1 if allow_negative_one else 0)
+    high = int(values.max())
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return None
+
+
+def _column_kind(series: pd.Series) -> str:
+    """Classify a column for encoding."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if isinstance(dtype, pd.CategoricalDtype):
+        return 'dictionary'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'string'
+    return 'dictionary'
+
+
+def _nullable_list(values: np.ndarray, mask: np.ndarray) -> List[Any]:
+    """Convert an array to a list with None where the mask is set."""
+    if not mask.any():
+        return values.tolist()
+    out = values.astype(object)
+    out[mask] = None
+    return out.tolist()
+
+
+def encode_columnar(df: pd.DataFrame) -> Dict[str, Any]:
+    """Encode a frame as JSON column arrays with dictionary-encoded strings."""
+    length = len(df)
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        kind = _column_kind(series)
+        column = {'name': str(name), 'type': kind}
+
+        if kind == 'dictionary':
+            codes, uniques = _dictionary_parts(series)
+            if length and len(uniques) > DICTIONARY_MAX_RATIO * length \
+                    and not isinstance(series.dtype, pd.CategoricalDtype):
+                column['type'] = 'string'
+                column['values'] = _nullable_list(series.to_numpy(dtype=object),
+                                                  series.isna().to_numpy())
+            else:
+                column['dictionary'] = [str(v) for v in uniques]
+                column['codes'] = codes.tolist()
+        elif kind == 'string':
+            formatted = series.astype(str).to_numpy(dtype=object)
+            column['values'] = _nullable_list(formatted, series.isna().to_numpy())
+        elif kind in ('int', 'bool'):
+            mask = series.isna().to_numpy()
+            column['values'] = _nullable_list(series.to_numpy(dtype=object), mask)
+        else:
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            column['values'] = _nullable_list(values, ~np.isfinite(values))
+
+        columns.append(column)
+
+    return {'format': 'columnar', 'length': length, 'columns': columns}
+
+
+def decode_columnar(payload: Dict[str, Any]) -> pd.DataFrame:
+    """Rebuild a frame from the JSON columnar encoding."""
+    data = {}
+    for column in payload.get('columns', []):
+        if 'codes' in column:
+            codes = np.asarray(column['codes'], dtype=np.int64)
+            dictionary = np.asarray(column['dictionary'], dtype=object)
+            values = np.empty(len(codes), dtype=object)
+            valid = codes >= 0
+            values[valid] = dictionary[codes[valid]]
+            values[~valid] = None
+            data[column['name']] = values
+        else:
+            data[column['name']] = column.get('values', [])
+    return pd.DataFrame(data)
+
+
+def to_dataframe(data: Any) -> pd.DataFrame:
+    """Build a frame from row records, a columnar payload or an existing frame."""
+    if isinstance(data, pd.DataFrame):
+        return data
+    if is_columnar(data):
+        return decode_columnar(data)
+    return pd.DataFrame(data)
+
+
+def session_to_columnar(session_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-encode the row lists stored in a saved session as column arrays."""
+    converted = dict(session_data)
+    if isinstance(converted.get('data'), list) and converted['data']:
+        converted['data'] = encode_columnar(pd.DataFrame.from_records(converted['data']))
+    current = converted.get('currentData')
+    if isinstance(current, dict) and isinstance(current.get('data'), list) and current['data']:
+        converted['currentData'] = dict(
+            current, data=encode_columnar(pd.DataFrame.from_records(current['data'])))
+    return converted
+
+
+def _pad(length: int) -> int:
+    """Bytes needed to align a length to the buffer alignment."""
+    return (-length) % BINARY_ALIGNMENT
+
+
+def encode_columnar_binary(df: pd.DataFrame,
+                           metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """Encode a frame as little-endian typed buffers behind a JSON header.
+
+    Layout: ``DLC1``, a uint32 header length, the UTF-8 JSON header padded to
+    8 bytes, then one 8-byte aligned buffer per column. Buffer offsets in the
+    header are relative to the end of the header, so every buffer can be
+    viewed directly as a JS typed array.
+    """
+    buffers = []
+    columns = []
+    offset = 0
+    for name in df.columns:
+        series = df[name]
+        kind = _column_kind(series)
+        column = {'name': str(name)}
+
+        if kind == 'bool':
+            mask = series.isna().to_numpy()
+            array = np.where(mask, -1, series.fillna(False).astype(np.int8)).astype('<i1')
+            column.update({'type': 'bool', 'dtype': 'int8', 'null': -1})
+        elif kind == 'int' and not series.isna().any():
+            values = series.to_numpy()
+            dtype = _smallest_int_dtype(values)
+            if dtype is None:
+                array = values.astype('<f8')
+                column.update({'type': 'int', 'dtype': 'float64'})
+            else:
+                array = values.astype(np.dtype(dtype).newbyteorder('<'))
+                column.update({'type': 'int', 'dtype': np.dtype(dtype).name})
+        elif kind in ('int', 'float'):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            if series.dtype == np.float32:
+                array = values.astype('<f4')
+                column.update({'type': 'float', 'dtype': 'float32'})
+            else:
+                array = values.astype('<f8')
+                column.update({'type': 'float', 'dtype': 'float64'})
+        else:
+            if kind == 'string':
+                series = series.astype(str).where(series.notna(), None)
+            codes, uniques = _dictionary_parts(series)
+            dtype = _smallest_int_dtype(codes, allow_negative_one=True) or np.int32
+            array = codes.astype(np.dtype(dtype).newbyteorder('<'))
+            column.update({
+                'type': 'dictionary',
+                'dtype': np.dtype(dtype).name,
+                'null': -1,
+                'dictionary': [str(v) for v in uniques]
+            })
+
+        raw = array.tobytes()
+        column['offset'] = offset
+        column['byte_length'] = len(raw)
+        buffers.append(raw + b'\x00' * _pad(len(raw)))
+        offset += len(raw) + _pad(len(raw))
+        columns.append(column)
+
+    header = {'length': len(df), 'columns': columns}
+    if metadata is not None:
+        header['metadata'] = metadata
+    header_bytes = json.dumps(header, separators=(',', ':'), default=str).encode('utf-8')
+    # Pad so the buffer section starts 8-byte aligned after the 8-byte preamble
+    header_bytes += b' ' * _pad(len(header_bytes))
+
+    return b''.join([BINARY_MAGIC, struct.pack('<I', len(header_bytes)),
+                     header_bytes, *buffers])
+
+
+def decode_columnar_binary(payload: bytes) -> pd.DataFrame:
+    """Rebuild a frame from the binary columnar encoding."""
+    if payload[:4] != BINARY_MAGIC:
+        raise ValueError("Not a columnar binary payload")
+    header_length = struct.unpack('<I', payload[4:8])[0]
+    header = json.loads(payload[8:8 + header_length])
+    body = memoryview(payload)[8 + header_length:]
+
+    data = {}
+    for column in header['columns']:
+        dtype = np.dtype(column['dtype']).newbyteorder('<')
+        start = column['offset']
+        array = np.frombuffer(body[start:start + column['byte_length']], dtype=dtype)
+        if column['type'] == 'dictionary':
+            dictionary = np.asarray(column['dictionary'], dtype=object)
+            values = np.empty(len(array), dtype=object)
+            valid = array >= 0
+            values[valid] = dictionary[array[valid]]
+            values[~valid] = None
+            data[column['name']] = values
+        elif column['type'] == 'bool':
+            values = array.astype(object)
+            values[array < 0] = None
+            values[array == 0] = False
+            values[array == 1] = True
+            data[column['name']] = values
+        else:
+            data[column['name']] = array.copy()
+    return pd.DataFrame(data)
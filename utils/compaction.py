@@ -0,0 +1,89 @@
+from typing import Any, Dict, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Text columns with at most this share of distinct values become categories
+CATEGORY_MAX_RATIO = 0.5
+CATEGORY_MAX_UNIQUES = 10000
+
+
+def _compact_text(series: pd.Series) -> pd.Series:
+    """Turn a text column into bool or category when that is lossless."""
+    non_null = series.dropna()
+    if len(non_null) == len(series) and len(series) > 0:
+        # Only genuine Python/numpy booleans become bool; 'yes'/'no' text stays text
+        if non_null.map(type).isin([bool, np.bool_]).all():
+            return series.astype(bool)
+
+    uniques = series.nunique(dropna=True)
+    if uniques <= CATEGORY_MAX_UNIQUES and uniques <= CATEGORY_MAX_RATIO * len(series):
+        return series.astype('category')
+    return series
+
+
+def _compact_integer(series: pd.Series) -> pd.Series:
+    """Downcast an integer column to the smallest dtype holding its range."""
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _compact_float(series: pd.Series) -> pd.Series:
+    """Downcast floats to float32 only when every value survives the round trip."""
+    values = series.to_numpy()
+    narrowed = values.astype(np.float32)
+    with np.errstate(invalid='ignore'):
+        same = (narrowed.astype(np.float64) == values) | (np.isnan(values) & np.isnan(narrowed))
+    if same.all():
+        return pd.Series(narrowed, index=series.index, name=series.name)
+    return series
+
+
+def compact_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Shrink a frame's memory footprint without changing its values.
+
+    Low-cardinality text columns become ``category``, columns holding only
+    booleans become ``bool``, and integers and floats are downcast to the
+    smallest dtype that represents every value exactly. Returns the compact
+    frame and a report with memory usage before and after.
+    """
+    memory_before = int(df.memory_usage(deep=True).sum())
+    compacted = {}
+    conversions = {}
+
+    for column in df.columns:
+        series = df[column]
+        dtype = series.dtype
+        try:
+            if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+                result = series
+            elif pd.api.types.is_integer_dtype(dtype):
+                result = _compact_integer(series)
+            elif pd.api.types.is_float_dtype(dtype):
+                result = _compact_float(series)
+            elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+                result = _compact_text(series)
+            else:
+                result = series
+        except Exception as e:
+            logger.warning(f"Error compacting column {column}: {str(e)}")
+            result = series
+
+        compacted[column] = result
+        if result.dtype != dtype:
+            conversions[column] = f"{dtype} -> {result.dtype}"
+
+    compact_df = pd.DataFrame(compacted, index=df.index)
+    memory_after = int(compact_df.memory_usage(deep=True).sum())
+
+    report = {
+        'memory_before': memory_before,
+        'memory_after': memory_after,
+        'memory_usage_before': f"{memory_before / 1024 / 1024:.2f} MB",
+        'memory_usage_after': f"{memory_after / 1024 / 1024:.2f} MB",
+        'conversions': conversions
+    }
+    logger.info(f"Compacted frame from {report['memory_usage_before']} to {report['memory_usage_after']}")
+    return compact_df, report
@@ -1,56 +1,170 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import io
 import logging
 import re
 import json
-from openai import OpenAI
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
 import os
+from .streaming_stats import ColumnAccumulator, summarize_frame, merge_summaries
+from .parallel_profile import DEFAULT_WORKERS, parallel_summarize
+from .compaction import compact_dataframe
+from .llm_client import get_llm_client
+from .schema_inference import NUMERIC_THRESHOLD, encoded_numeric_ratio, schema_cache
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
-def analyze_column_with_ai(column_name: str, sample_values: List[Any]) -> Dict[str, Any]:
-    """Use AI to analyze column type and format."""
-    try:
-        # Prepare sample data for AI analysis
-        samples = str(sample_values[:10])  # Convert first 10 values to string
-        
-        prompt = f"""Analyze column '{column_name}' with samples: {samples}
-Provide comprehensive analysis including:
+# Columns packed into one structured request, and batches in flight at once
+AI_COLUMN_BATCH_SIZE = int(os.getenv('AI_COLUMN_BATCH_SIZE', '8'))
+AI_COLUMN_CONCURRENCY = int(os.getenv('AI_COLUMN_CONCURRENCY', '4'))
+AI_SAMPLE_VALUES = 10
+UNKNOWN_ANALYSIS = {'type': 'unknown', 'format': None, 'cleaning_strategy': None}
+
+
+class ColumnAnalysisCache:
+    """LRU of AI column analyses keyed by column name and sample-value hash."""
+
+    def __init__(self, max_entries: int = 2048):
+        """Initialize the column analysis cache."""
+        self.max_entries = max_entries
+        self._analyses: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(column_name: str, sample_values: List[Any]) -> str:
+        """Cache key for a column: its name plus a hash of its sample values."""
+        digest = hashlib.sha256(json.dumps(sample_values, default=str).encode()).hexdigest()
+        return f"{column_name}:{digest}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a memoized analysis, if any."""
+        with self._lock:
+            analysis = self._analyses.get(key)
+            if analysis is None:
+                self.misses += 1
+                return None
+            self._analyses.move_to_end(key)
+            self.hits += 1
+            return dict(analysis)
+
+    def set(self, key: str, analysis: Dict[str, Any]) -> None:
+        """Store an analysis, evicting the least recently used one if full."""
+        with self._lock:
+            self._analyses[key] = dict(analysis)
+            self._analyses.move_to_end(key)
+            while len(self._analyses) > self.max_entries:
+                self._analyses.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all memoized analyses."""
+        with self._lock:
+            self._analyses.clear()
+
+
+column_analysis_cache = ColumnAnalysisCache()
+
+
+def _column_batch_prompt(samples: Dict[str, List[Any]]) -> str:
+    """One prompt asking for the analysis of every column in a batch."""
+    listing = '\n'.join(f"- {json.dumps(str(name))}: {str(values[:AI_SAMPLE_VALUES])}"
+                         for name, values in samples.items())
+    return f"""Analyze each of these columns, given as name: sample values:
+{listing}
+
+For every column provide comprehensive analysis including:
 1. Data Type: Precise classification (numeric-continuous, numeric-discrete, categorical-nominal, categorical-ordinal, datetime, text-structured, text-unstructured)
-2. Statistical Properties: Distribution type, range, central tendency
-3. Quality Metrics: Missing values, outliers, inconsistencies
-4. Format Patterns: Regular expressions, standardization rules
-5. Semantic Context: Business meaning, typical usage, common patterns
-6. Cleaning Recommendations: Specific steps for data normalization
-7. Relationship Potential: Suggested correlations with other columns
-
-Return structured JSON with detailed analysis metrics."""
-
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a data analysis expert. Respond in JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0,
-            response_format={ "type": "json_object" }
-        )
-
-        analysis = json.loads(response.choices[0].message.content)
-        return {
-            'type': analysis.get('data_type', 'unknown'),
-            'format': analysis.get('format_pattern', None),
-            'cleaning_strategy': analysis.get('cleaning_strategy', None)
-        }
+2. Format Patterns: Regular expressions, standardization rules
+3. Cleaning Recommendations: Specific steps for data normalization
+
+Return a JSON object of the form {{"columns": {{"<column name>": {{"data_type": ..., "format_pattern": ..., "cleaning_strategy": ...}}}}}} with one entry per column, keyed by the exact column name."""
+
+
+async def _analyze_column_batch(samples: Dict[str, List[Any]],
+                                semaphore: asyncio.Semaphore) -> Dict[str, Dict[str, Any]]:
+    """Analyze a batch of columns in one request; failed columns come back unknown."""
+    try:
+        async with semaphore:
+            response = await get_llm_client().create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": "You are a data analysis expert. Respond in JSON only."},
+                    {"role": "user", "content": _column_batch_prompt(samples)}
+                ],
+                temperature=0,
+                response_format={"type": "json_object"}
+            )
+        analyses = json.loads(response.choices[0].message.content).get('columns', {})
     except Exception as e:
-        logger.error(f"AI analysis failed for column {column_name}: {str(e)}")
-        return {'type': 'unknown', 'format': None, 'cleaning_strategy': None}
+        logger.error(f"AI analysis failed for columns {list(samples)}: {str(e)}")
+        return {}
+
+    results = {}
+    for column_name in samples:
+        analysis = analyses.get(str(column_name))
+        if isinstance(analysis, dict):
+            results[column_name] = {
+                'type': analysis.get('data_type', 'unknown'),
+                'format': analysis.get('format_pattern', None),
+                'cleaning_strategy': analysis.get('cleaning_strategy', None)
+            }
+    return results
+
+
+async def analyze_columns_with_ai(samples: Dict[str, List[Any]],
+                                  batch_size: int = AI_COLUMN_BATCH_SIZE,
+                                  concurrency: int = AI_COLUMN_CONCURRENCY) -> Dict[str, Dict[str, Any]]:
+    """Use AI to analyze the type and format of many columns at once.
+
+    ``samples`` maps column names to sample values. Memoized columns are
+    answered from ``column_analysis_cache``; the rest are packed
+    ``batch_size`` to a request, with at most ``concurrency`` requests in
+    flight. Columns the model could not analyze come back as unknown and
+    are not memoized.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    keys: Dict[str, str] = {}
+    pending: Dict[str, List[Any]] = {}
+    for column_name, values in samples.items():
+        values = list(values[:AI_SAMPLE_VALUES])
+        keys[column_name] = ColumnAnalysisCache.key(str(column_name), values)
+        cached = column_analysis_cache.get(keys[column_name])
+        if cached is not None:
+            results[column_name] = cached
+        else:
+            pending[column_name] = values
+
+    if pending:
+        names = list(pending)
+        batches = [{name: pending[name] for name in names[i:i + batch_size]}
+                   for i in range(0, len(names), batch_size)]
+        semaphore = asyncio.Semaphore(concurrency)
+        logger.info(f"Analyzing {len(names)} columns with AI in {len(batches)} requests")
+        for batch_results in await asyncio.gather(
+                *[_analyze_column_batch(batch, semaphore) for batch in batches]):
+            for column_name, analysis in batch_results.items():
+                column_analysis_cache.set(keys[column_name], analysis)
+                results[column_name] = analysis
+
+    return {column_name: results.get(column_name, dict(UNKNOWN_ANALYSIS)) for column_name in samples}
+
+
+def analyze_dataframe_with_ai(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Analyze every column of a frame with AI from synchronous code."""
+    samples = {column: df[column].dropna().head(AI_SAMPLE_VALUES).tolist() for column in df.columns}
+    return get_llm_client().run_sync(analyze_columns_with_ai(samples))
+
+
+def analyze_column_with_ai(column_name: str, sample_values: List[Any]) -> Dict[str, Any]:
+    """Use AI to analyze column type and format."""
+    return get_llm_client().run_sync(
+        analyze_columns_with_ai({column_name: sample_values}))[column_name]
 
 def clean_value_based_on_strategy(value: Any, strategy: Dict[str, Any]) -> Any:
     """Clean a value based on the AI-determined strategy."""
@@ -136,12 +250,81 @@ def calculate_statistics(values: np.ndarray) -> Dict[str, float]:
             'null_count': len(values)
         }
 
-def process_data(df: pd.DataFrame) -> Dict[str, Any]:
-    """Process data with improved numeric handling."""
+def _numeric_values(series: pd.Series) -> pd.Series:
+    """Coerce a column to numbers, parsing each distinct text value once."""
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return pd.to_numeric(series, errors='coerce')
+    if not (pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)
+            or isinstance(series.dtype, pd.CategoricalDtype)):
+        return pd.to_numeric(series, errors='coerce')
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    _, unique_numeric = encoded_numeric_ratio(codes, uniques)
+    values = np.full(len(codes), np.nan)
+    present = codes >= 0
+    values[present] = unique_numeric[codes[present]]
+    return pd.Series(values, index=series.index, name=series.name)
+
+def _categorical_column(series: pd.Series) -> Tuple[Dict[str, Any], pd.Series]:
+    """Profile and clean a categorical column from one factorization.
+
+    Value counts, the null count and the stripped text values are all
+    derived from the distinct values instead of separate full-column passes.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    unique_series = pd.Series(uniques, dtype=object)
+    null_mask = unique_series.isna().to_numpy()
+    for position in np.flatnonzero(null_mask):
+        # factorize turns None into NaN; keep the column's own missing marker
+        unique_series.iloc[position] = series.iloc[int(np.argmax(codes == position))]
+    counts = pd.Series(np.bincount(codes, minlength=len(uniques)), index=unique_series)
+    value_counts = counts.sort_values(ascending=False, kind='stable')
+
+    column_stats = {
+        'type': 'categorical',
+        'unique_values': int(len(value_counts)),
+        'top_values': convert_to_native_types(value_counts.head(10).to_dict()),
+        'null_count': int(counts.to_numpy()[null_mask].sum())
+    }
+
+    cleaned_uniques = unique_series.astype(str).str.strip()
+    cleaned = pd.Series(cleaned_uniques.to_numpy().take(codes), index=series.index,
+                        name=series.name, dtype=cleaned_uniques.dtype)
+    return column_stats, cleaned
+
+def _profile_statistics(description: Dict[str, Any], rows: int) -> Dict[str, float]:
+    """The ``calculate_statistics`` result read from a precomputed column profile."""
+    return {
+        'mean': description['mean'],
+        'median': description['quantiles']['p50'],
+        'std': description['std'],
+        'min': description['min'],
+        'max': description['max'],
+        'valid_count': description['valid_count'],
+        'null_count': int(rows - description['valid_count'])
+    }
+
+def process_data(df: pd.DataFrame, fingerprint: Optional[str] = None,
+                 compact: bool = False, analyze_with_ai: bool = False,
+                 profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Process data with improved numeric handling.
+
+    Column types come from ``schema_cache``: pass the dataset fingerprint to
+    reuse a schema inferred earlier instead of classifying every column again.
+    With ``compact`` the frame is first shrunk by ``compact_dataframe`` and
+    the summary reports memory usage before and after. With
+    ``analyze_with_ai`` every column is also analyzed by the model, in
+    batched concurrent requests, under ``ai_column_analysis``. Numeric
+    statistics are read from the dataset ``profile`` (from
+    ``dataset_profile``) when it covers the column.
+    """
     
     try:
         # Clean column names
         df.columns = df.columns.str.strip()
+        schema = schema_cache.get_or_infer(df, fingerprint)
+        compaction = None
+        if compact:
+            df, compaction = compact_dataframe(df)
         
         # Initialize stats dictionary
         stats = {
@@ -155,19 +338,30 @@ def process_data(df: pd.DataFrame) -> Dict[str, Any]:
             'column_stats': {},
             'columns': list(df.columns)
         }
+        if compaction is not None:
+            stats['summary']['memory_usage_before'] = compaction['memory_usage_before']
+            stats['summary']['dtype_conversions'] = compaction['conversions']
         
         # Process each column
         processed_df = df.copy()
         for column in df.columns:
             try:
-                # Convert to numeric, handling errors
-                numeric_values = pd.to_numeric(df[column], errors='coerce')
-                non_null_ratio = numeric_values.notna().sum() / len(df)
+                is_numeric = schema[column]['type'] == 'numeric'
+                if is_numeric:
+                    numeric_values = _numeric_values(df[column])
+                    # Confirm on the converted values, which are needed anyway
+                    if numeric_values.notna().sum() / len(df) <= NUMERIC_THRESHOLD:
+                        is_numeric = False
+                        schema_cache.update_column(fingerprint, column, 'categorical')
                 
-                if non_null_ratio > 0.5:  # More than 50% numeric values
-                    # Convert to numpy array for calculations
-                    values = numeric_values.to_numpy()
-                    column_stats = calculate_statistics(values)
+                if is_numeric:  # More than 50% numeric values
+                    described = (profile or {}).get('column_descriptions', {}).get(column) or {}
+                    if described.get('type') == 'numeric' and described.get('valid_count'):
+                        column_stats = _profile_statistics(described, len(df))
+                    else:
+                        # Convert to numpy array for calculations
+                        values = numeric_values.to_numpy()
+                        column_stats = calculate_statistics(values)
                     
                     stats['column_stats'][column] = {
                         'type': 'numeric',
@@ -178,17 +372,10 @@ def process_data(df: pd.DataFrame) -> Dict[str, Any]:
                     processed_df[column] = numeric_values
                     
                 else:
-                    # Handle as categorical
-                    value_counts = df[column].value_counts(dropna=False)
-                    stats['column_stats'][column] = {
-                        'type': 'categorical',
-                        'unique_values': int(len(value_counts)),
-                        'top_values': convert_to_native_types(value_counts.head(10).to_dict()),
-                        'null_count': int(df[column].isna().sum())
-                    }
+                    # Handle as categorical and clean categorical values
+                    column_stats, processed_df[column] = _categorical_column(df[column])
+                    stats['column_stats'][column] = column_stats
                     stats['summary']['categorical_columns'] += 1
-                    # Clean categorical values
-                    processed_df[column] = df[column].astype(str).str.strip()
                     
             except Exception as e:
                 logger.warning(f"Error processing column {column}: {str(e)}")
@@ -197,22 +384,30 @@ def process_data(df: pd.DataFrame) -> Dict[str, Any]:
                     'error': str(e)
                 }
 
-        # Add preview data (first 5 rows)
-        preview_df = processed_df.head(5).copy()
-        stats['preview'] = convert_to_native_types(preview_df.to_dict('records'))
-        
-        # Add full processed dataset
-        stats['data'] = convert_to_native_types(processed_df.to_dict('records'))
+        if analyze_with_ai:
+            stats['ai_column_analysis'] = analyze_dataframe_with_ai(df)
+
+        stats = convert_to_native_types(stats)
+
+        # Preview and full data stay frames; the JSON provider encodes them in bulk
+        stats['preview'] = processed_df.head(5)
+        stats['data'] = processed_df
         
-        return convert_to_native_types(stats)
+        return stats
         
     except Exception as e:
         logger.exception("Error processing data")
         raise ValueError(f"Error processing data: {str(e)}")
 
 def convert_to_native_types(obj: Any) -> Any:
-    """Convert numpy/pandas types to Python native types."""
-    if isinstance(obj, dict):
+    """Convert numpy/pandas types to Python native types.
+
+    Meant for small nested structures such as statistics. DataFrames are
+    returned unchanged for the JSON provider to encode in bulk.
+    """
+    if isinstance(obj, pd.DataFrame):
+        return obj
+    elif isinstance(obj, dict):
         return {key: convert_to_native_types(value) for key, value in obj.items()}
     elif isinstance(obj, list):
         return [convert_to_native_types(item) for item in obj]
@@ -230,76 +425,141 @@ def convert_to_native_types(obj: Any) -> Any:
         return None
     return obj
 
-def chunk_process_data(df: pd.DataFrame, chunk_size: int = 10000) -> Dict[str, Any]:
-    """Process large datasets in chunks with robust error handling."""
+def _finalize_stats(columns: List[str], accumulators: Dict[str, ColumnAccumulator],
+                    total_rows: int, memory_bytes: int, chunks_processed: int) -> Dict[str, Any]:
+    """Turn merged column summaries into the process_data stats layout."""
+    stats = {
+        'summary': {
+            'rows': int(total_rows),
+            'columns': int(len(columns)),
+            'numeric_columns': 0,
+            'categorical_columns': 0,
+            'memory_usage': f"{float(memory_bytes) / 1024 / 1024:.2f} MB",
+            'chunks_processed': chunks_processed
+        },
+        'column_stats': {},
+        'columns': columns
+    }
+
+    for column in columns:
+        try:
+            column_stats = accumulators[column].result()
+            stats['column_stats'][column] = column_stats
+            if column_stats['type'] == 'numeric':
+                stats['summary']['numeric_columns'] += 1
+            else:
+                stats['summary']['categorical_columns'] += 1
+        except Exception as e:
+            logger.warning(f"Error finalizing column {column}: {str(e)}")
+            stats['column_stats'][column] = {
+                'type': 'error',
+                'error': str(e)
+            }
+
+    return stats
+
+def _apply_column_types(df: pd.DataFrame, column_stats: Dict[str, Any]) -> pd.DataFrame:
+    """Clean a frame using the column types decided by the statistics."""
+    processed = df.copy()
+    for column, column_info in column_stats.items():
+        if column not in processed.columns:
+            continue
+        if column_info.get('type') == 'numeric':
+            processed[column] = _numeric_values(processed[column])
+        elif column_info.get('type') == 'categorical':
+            processed[column] = processed[column].astype(str).str.strip()
+    return processed
+
+def stream_process_csv(file_path: str, chunk_size: int = 100000, **read_csv_kwargs) -> Dict[str, Any]:
+    """Profile a CSV in bounded memory by streaming it in chunks.
+
+    Produces the same ``summary`` and ``column_stats`` layout as
+    ``process_data`` without materializing the whole file, so the full
+    processed ``data`` list is not included. Medians, distinct counts and
+    top values come from mergeable sketches and are exact for small columns;
+    approximated entries carry ``approximate: True``.
+    """
+    try:
+        read_csv_kwargs.setdefault('encoding', 'utf-8')
+        accumulators: Dict[str, ColumnAccumulator] = {}
+        columns: List[str] = []
+        preview_df = None
+        total_rows = 0
+        memory_bytes = 0
+        chunks_processed = 0
+
+        with pd.read_csv(file_path, chunksize=chunk_size, **read_csv_kwargs) as reader:
+            for chunk in reader:
+                chunk.columns = chunk.columns.str.strip()
+                if not columns:
+                    columns = list(chunk.columns)
+                    accumulators = {col: ColumnAccumulator(col) for col in columns}
+                    preview_df = chunk.head(5).copy()
+
+                for column in columns:
+                    try:
+                        accumulators[column].update(chunk[column])
+                    except Exception as e:
+                        logger.warning(f"Error streaming column {column}: {str(e)}")
+
+                total_rows += len(chunk)
+                memory_bytes += int(chunk.memory_usage(deep=True).sum())
+                chunks_processed += 1
+
+        stats = _finalize_stats(columns, accumulators, total_rows, memory_bytes, chunks_processed)
+
+        stats = convert_to_native_types(stats)
+        stats['preview'] = (_apply_column_types(preview_df, stats['column_stats'])
+                            if preview_df is not None else [])
+
+        return stats
+
+    except Exception as e:
+        logger.exception("Error streaming data")
+        raise ValueError(f"Error streaming data: {str(e)}")
+
+def chunk_process_data(df: pd.DataFrame, chunk_size: int = 10000,
+                       workers: Optional[int] = None, include_data: bool = True) -> Dict[str, Any]:
+    """Process large datasets in chunks with robust error handling.
+
+    Each chunk yields a mergeable partial summary, and the partials are
+    combined exactly (moments) or with bounded error (median, distinct
+    counts, top values), so results do not depend on the chunk size.
+    With more than one worker (``workers``, or ``DEFAULT_WORKERS`` from
+    ``PROFILE_WORKERS`` when None, which defaults to one) the chunks are
+    summarized in a process pool that reads columns from shared memory,
+    no larger than the chunk count.
+    Pass ``include_data=False`` to skip building the full processed row list.
+    """
     
     try:
+        df.columns = df.columns.str.strip()
         total_rows = len(df)
-        chunks = []
-        chunk_stats = []
-        processed_chunks = []
-        
-        # Process data in chunks
-        for i in range(0, total_rows, chunk_size):
-            chunk = df.iloc[i:i + chunk_size].copy()
-            chunk_result = process_data(chunk)
-            chunk_stats.append(chunk_result)
-            # Store the processed data from each chunk
-            processed_chunks.extend(chunk_result['data'])
-        
-        # Combine chunk statistics
-        combined_stats = {
-            'summary': {
-                'rows': int(total_rows),
-                'columns': int(len(df.columns)),
-                'numeric_columns': 0,
-                'categorical_columns': 0,
-                'memory_usage': f"{float(df.memory_usage(deep=True).sum()) / 1024 / 1024:.2f} MB",
-                'chunks_processed': len(chunk_stats)
-            },
-            'column_stats': {},
-            'preview': convert_to_native_types(df.head(5).to_dict('records')),
-            'columns': list(df.columns),
-            # Add the full processed dataset
-            'data': processed_chunks
-        }
-        
-        # Merge column statistics
-        for col in df.columns:
-            try:
-                numeric_chunks = [
-                    chunk['column_stats'][col]
-                    for chunk in chunk_stats
-                    if chunk['column_stats'].get(col, {}).get('type') == 'numeric'
-                ]
-                
-                if numeric_chunks:
-                    # Combine numeric statistics
-                    combined_stats['column_stats'][col] = {
-                        'type': 'numeric',
-                        'mean': float(np.nanmean([chunk['mean'] for chunk in numeric_chunks])),
-                        'median': float(np.nanmedian([chunk['median'] for chunk in numeric_chunks])),
-                        'std': float(np.nanstd([chunk['std'] for chunk in numeric_chunks])),
-                        'min': float(np.nanmin([chunk['min'] for chunk in numeric_chunks])),
-                        'max': float(np.nanmax([chunk['max'] for chunk in numeric_chunks]))
-                    }
-                    combined_stats['summary']['numeric_columns'] += 1
-                else:
-                    # Use categorical statistics from first chunk
-                    combined_stats['column_stats'][col] = convert_to_native_types(
-                        chunk_stats[0]['column_stats'][col]
-                    )
-                    if chunk_stats[0]['column_stats'][col]['type'] == 'categorical':
-                        combined_stats['summary']['categorical_columns'] += 1
-                        
-            except Exception as e:
-                logger.warning(f"Error combining statistics for column {col}: {str(e)}")
-                combined_stats['column_stats'][col] = {
-                    'type': 'error',
-                    'error': str(e)
-                }
-        
-        return convert_to_native_types(combined_stats)
+        chunk_count = -(-total_rows // chunk_size)
+        workers = min(DEFAULT_WORKERS if workers is None else workers, chunk_count)
+
+        if workers > 1:
+            merged, chunks_processed = parallel_summarize(df, chunk_size, workers)
+        else:
+            # Summarize each chunk independently, then merge the partials
+            partials = [
+                summarize_frame(df.iloc[i:i + chunk_size])
+                for i in range(0, total_rows, chunk_size)
+            ]
+            merged = merge_summaries(partials)
+            chunks_processed = len(partials)
+
+        combined_stats = _finalize_stats(
+            list(df.columns), merged, total_rows,
+            int(df.memory_usage(deep=True).sum()), chunks_processed)
+        combined_stats = convert_to_native_types(combined_stats)
+        combined_stats['preview'] = df.head(5)
+
+        if include_data:
+            # Add the full processed dataset, cleaned once using the merged types
+            combined_stats['data'] = _apply_column_types(df, combined_stats['column_stats'])
+
+        return combined_stats
         
     except Exception as e:
         logger.exception("Error in chunk processing")
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetLoadError(Exception):
+    pass
+
+
+class DatasetEntry:
+    """A parsed dataset together with its pre-encoded /upload response."""
+
+    def __init__(self, fingerprint: str, path: str, df: pd.DataFrame,
+                 metadata: Dict[str, Any], body: bytes):
+        self.fingerprint = fingerprint
+        self.path = os.path.abspath(path)
+        self.df = df
+        self.metadata = metadata
+        self.body = body
+        self._sort_orders: Dict[str, np.ndarray] = {}
+        self._encodings: Dict[str, bytes] = {}
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag for the encoded response."""
+        return self.fingerprint
+
+    def encoded(self, name: str, build: Callable[[], bytes]) -> bytes:
+        """Return a memoized alternative encoding of the full dataset."""
+        body = self._encodings.get(name)
+        if body is None:
+            body = build()
+            self._encodings[name] = body
+        return body
+
+    def sort_order(self, column: str) -> np.ndarray:
+        """Return the memoized argsort of a column, used for keyset paging."""
+        order = self._sort_orders.get(column)
+        if order is None:
+            order = np.argsort(self.df[column].to_numpy(), kind='stable')
+            self._sort_orders[column] = order
+        return order
+
+
+class DatasetCache:
+    """In-process cache of parsed datasets keyed by path, mtime and size."""
+
+    def __init__(self, max_entries: int = 4):
+        """Initialize the dataset cache."""
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, DatasetEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(file_path: str) -> str:
+        """Build a fingerprint from the file's path, mtime and size."""
+        stat = os.stat(file_path)
+        raw = f"{os.path.abspath(file_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+        return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+    def get(self, fingerprint: str) -> Optional[DatasetEntry]:
+        """Return the cached entry for a fingerprint, if any."""
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                self._entries.move_to_end(fingerprint)
+            return entry
+
+    def get_or_load(self, file_path: str,
+                    loader: Callable[[str, str], DatasetEntry]) -> DatasetEntry:
+        """Return the cached entry for a file, loading it on a miss."""
+        fingerprint = self.fingerprint(file_path)
+        entry = self.get(fingerprint)
+        if entry is not None:
+            return entry
+
+        logger.info(f"Dataset cache miss for {file_path}, loading")
+        entry = loader(file_path, fingerprint)
+
+        with self._lock:
+            # Drop stale versions of the same file before storing the new one
+            stale = [
+                key for key, cached in self._entries.items()
+                if cached.path == entry.path
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._entries[fingerprint] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        """Drop all cached datasets."""
+        with self._lock:
+            self._entries.clear()
+
+
+dataset_cache = DatasetCache()
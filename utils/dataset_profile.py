@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .cache_backends import FileCacheBackend
+from .downsampling import DEFAULT_HISTOGRAM_BINS
+from .fingerprint import dataframe_fingerprint
+from .row_pager import frame_records
+from .schema_inference import encoded_numeric_ratio, schema_cache, schema_columns
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_ROWS = 3
+# Fixed bins per numeric histogram and most frequent values kept per column
+HISTOGRAM_BINS = DEFAULT_HISTOGRAM_BINS
+TOP_K = int(os.getenv('PROFILE_TOP_K', '20'))
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+PROFILE_DIR = os.getenv('PROFILE_DIR', '.cache/profiles')
+# Profile files older than this, then the oldest over the size cap, are swept on write
+PROFILE_TTL = float(os.getenv('PROFILE_TTL_SECONDS', str(7 * 24 * 3600)))
+PROFILE_MAX_DISK_BYTES = int(os.getenv('PROFILE_DISK_MB', '256')) * 1024 * 1024
+# Numeric columns (in order) paired in the profile's correlation matrix
+CORRELATION_COLUMNS = int(os.getenv('PROFILE_CORRELATION_COLUMNS', '20'))
+# Bumped whenever the profile layout changes, so older files are rebuilt
+PROFILE_VERSION = 2
+
+
+def _native(value: Any) -> Any:
+    """Convert a numpy scalar to a JSON-friendly Python value."""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _weighted_quantile(values: np.ndarray, counts: np.ndarray, q: float) -> float:
+    """Linear-interpolated quantile of sorted distinct values with counts.
+
+    Matches ``np.quantile`` over the expanded values without expanding them.
+    """
+    cumulative = np.cumsum(counts)
+    position = q * (cumulative[-1] - 1)
+    lower = int(np.floor(position))
+    low = values[np.searchsorted(cumulative, lower, side='right')]
+    high = values[np.searchsorted(cumulative, min(lower + 1, cumulative[-1] - 1), side='right')]
+    return float(low + (high - low) * (position - lower))
+
+
+def _numeric_profile(unique_numeric: np.ndarray, counts: np.ndarray) -> Dict[str, Any]:
+    """Moments, quantiles and a fixed-bin histogram from distinct values and their counts."""
+    finite = np.isfinite(unique_numeric)
+    values, weights = unique_numeric[finite], counts[finite]
+    valid_count = int(weights.sum())
+    if valid_count == 0:
+        return {'valid_count': 0, 'min': None, 'max': None, 'mean': None, 'std': None,
+                'skewness': None, 'kurtosis': None, 'zero_count': 0, 'outlier_count': 0,
+                'quantiles': {}, 'histogram': None}
+
+    order = np.argsort(values, kind='stable')
+    values, weights = values[order], weights[order]
+    mean = float(np.dot(values, weights) / valid_count)
+    variance = float(np.dot(weights, (values - mean) ** 2) / (valid_count - 1)) if valid_count > 1 else 0.0
+    std = float(np.sqrt(variance))
+    if std > 0:
+        standardized = (values - mean) / std
+        skewness = float(np.dot(weights, standardized ** 3) / valid_count)
+        kurtosis = float(np.dot(weights, standardized ** 4) / valid_count - 3)
+    else:
+        skewness = kurtosis = 0.0
+    quantiles = {f"p{q * 100:g}": _weighted_quantile(values, weights, q) for q in QUANTILES}
+    # Values outside the 1.5 IQR fences around the quartiles
+    q1, q3 = _weighted_quantile(values, weights, 0.25), _weighted_quantile(values, weights, 0.75)
+    fences = (q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))
+    outliers = (values < fences[0]) | (values > fences[1])
+    histogram, edges = np.histogram(values, bins=HISTOGRAM_BINS, weights=weights)
+    return {
+        'valid_count': valid_count,
+        'min': float(values[0]),
+        'max': float(values[-1]),
+        'mean': mean,
+        'std': std,
+        'skewness': skewness,
+        'kurtosis': kurtosis,
+        'zero_count': int(weights[values == 0].sum()),
+        'outlier_count': int(weights[outliers].sum()),
+        'quantiles': quantiles,
+        'histogram': {
+            'edges': edges.tolist(),
+            'counts': histogram.astype(np.int64).tolist()
+        }
+    }
+
+
+def profile_column(series: pd.Series, numeric: bool) -> Dict[str, Any]:
+    """Profile one column from a single factorization.
+
+    Null and distinct counts and the ``TOP_K`` most frequent values come
+    from the codes; numeric columns also get min, max, mean, std,
+    ``QUANTILES`` and a ``HISTOGRAM_BINS`` histogram, all computed over
+    the distinct values weighted by their counts, along with skewness,
+    excess kurtosis, and counts of zeros and of 1.5 IQR outliers.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    null_count = int(len(codes) - counts.sum())
+    top = np.argsort(-counts, kind='stable')[:TOP_K]
+
+    column = {
+        'dtype': str(series.dtype),
+        'type': 'numeric' if numeric else 'categorical',
+        'null_count': null_count,
+        'unique_values': int(len(uniques)) + (1 if null_count else 0),
+        'top_values': [{'value': _native(uniques[i]), 'count': int(counts[i])} for i in top]
+    }
+    if numeric:
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            unique_numeric = np.asarray(uniques, dtype=np.float64)
+        else:
+            _, unique_numeric = encoded_numeric_ratio(codes, uniques)
+        column.update(_numeric_profile(unique_numeric, counts))
+    return column
+
+
+def correlation_matrix(df: pd.DataFrame, columns: List[Any]) -> Dict[str, Any]:
+    """Pairwise Pearson correlations of the first ``CORRELATION_COLUMNS`` numeric columns.
+
+    Columns stored as text (encoded numbers) are left out, and pairs
+    without variance are None.
+    """
+    columns = [col for col in columns
+               if pd.api.types.is_numeric_dtype(df[col].dtype)
+               and not pd.api.types.is_bool_dtype(df[col].dtype)][:CORRELATION_COLUMNS]
+    matrix = df[columns].astype(np.float64).corr().to_numpy()
+    return {
+        'columns': columns,
+        'matrix': [[float(value) if np.isfinite(value) else None for value in row] for row in matrix]
+    }
+
+
+def build_profile(df: pd.DataFrame, schema_key: Optional[str] = None) -> Dict[str, Any]:
+    """Describe a dataset for prompt construction, charts and the /profile endpoint.
+
+    Holds the row count, column split from the inferred schema, sample rows,
+    the numeric ``correlation_matrix`` and, per column, the
+    ``profile_column`` statistics plus sample values, all as plain Python
+    values.
+    """
+    schema = schema_cache.get_or_infer(df, schema_key)
+    numeric_columns = schema_columns(schema, 'numeric')
+    sample = frame_records(df.head(SAMPLE_ROWS))
+    return {
+        'version': PROFILE_VERSION,
+        'total_rows': len(df),
+        'columns': list(df.columns),
+        'numeric_columns': numeric_columns,
+        'categorical_columns': schema_columns(schema, 'categorical'),
+        'sample_data': sample,
+        'correlations': correlation_matrix(df, numeric_columns),
+        'column_descriptions': {col: {
+            **profile_column(df[col], col in numeric_columns),
+            'sample_values': [row.get(col) for row in sample]
+        } for col in df.columns}
+    }
+
+
+class ProfileCache:
+    """Bounded LRU of dataset profiles keyed by content fingerprint.
+
+    Profiles are also written to ``profile_dir``, one JSON file per
+    fingerprint, so a restarted process reuses them instead of rescanning.
+    Each write sweeps that directory, dropping files older than ``ttl`` and
+    then the oldest ones until it fits in ``max_disk_bytes``.
+    """
+
+    def __init__(self, max_entries: int = 32, profile_dir: Optional[str] = PROFILE_DIR,
+                 ttl: float = PROFILE_TTL, max_disk_bytes: int = PROFILE_MAX_DISK_BYTES):
+        """Initialize the profile cache."""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.store = FileCacheBackend(profile_dir) if profile_dir else None
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return a profile from memory or disk, if one was built."""
+        with self._lock:
+            profile = self._profiles.get(fingerprint)
+            if profile is not None:
+                self._profiles.move_to_end(fingerprint)
+                return profile
+
+        record = self.store.read(fingerprint) if self.store else None
+        if record is None or record[1].get('version') != PROFILE_VERSION:
+            return None
+        profile = record[1]
+        self._remember(fingerprint, profile)
+        return profile
+
+    def get_or_build(self, df: pd.DataFrame, fingerprint: Optional[str] = None,
+                     schema_key: Optional[str] = None) -> Dict[str, Any]:
+        """Return the memoized profile of a frame, building it on a miss.
+
+        Without a fingerprint the frame's content is hashed first, which is
+        still much cheaper than profiling it again.
+        """
+        fingerprint = fingerprint or dataframe_fingerprint(df)
+        profile = self.get(fingerprint)
+        if profile is not None:
+            return profile
+
+        profile = build_profile(df, schema_key or fingerprint)
+        self._remember(fingerprint, profile)
+        if self.store:
+            try:
+                self.store.write(fingerprint, time.time(), profile)
+                self.store.sweep(self.ttl, self.max_disk_bytes)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Could not persist profile {fingerprint}: {str(e)}")
+        return profile
+
+    def clear(self) -> None:
+        """Drop all profiles held in memory."""
+        with self._lock:
+            self._profiles.clear()
+
+    def _remember(self, fingerprint: str, profile: Dict[str, Any]) -> None:
+        """Keep a profile in memory, evicting the least recently used one if full."""
+        with self._lock:
+            self._profiles[fingerprint] = profile
+            self._profiles.move_to_end(fingerprint)
+            while len(self._profiles) > self.max_entries:
+                self._profiles.popitem(last=False)
+
+
+profile_cache = ProfileCache()
@@ -0,0 +1,115 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import logging
+
+import pandas as pd
+
+from .chart_cache import chart_cache
+from .fingerprint import dataframe_fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = int(os.getenv('DATASET_REGISTRY_MAX_MB', '512')) * 1024 * 1024
+
+
+class DatasetRegistry:
+    """Server-side registry of parsed DataFrames with a memory-budgeted LRU."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initialize the registry."""
+        self.max_bytes = max_bytes
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._total_bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def register(self, df: pd.DataFrame, dataset_id: Optional[str] = None) -> str:
+        """Store a frame and return its dataset id.
+
+        The frame's content fingerprint is computed once here so later
+        lookups can key caches by content without rehashing the data.
+        Re-registering an id with different content drops the charts
+        cached for the old content.
+        """
+        dataset_id = dataset_id or uuid.uuid4().hex
+        with self._lock:
+            if dataset_id in self._frames and self._frames[dataset_id] is df:
+                self._frames.move_to_end(dataset_id)
+                return dataset_id
+
+        size = int(df.memory_usage(deep=True).sum())
+        fingerprint = dataframe_fingerprint(df)
+
+        with self._lock:
+            replaced = self._fingerprints.get(dataset_id)
+            self._discard(dataset_id)
+            self._frames[dataset_id] = df
+            self._sizes[dataset_id] = size
+            self._fingerprints[dataset_id] = fingerprint
+            self._total_bytes += size
+
+            # Evict least recently used frames, but never the one just added
+            while self._total_bytes > self.max_bytes and len(self._frames) > 1:
+                oldest = next(iter(self._frames))
+                self._discard(oldest)
+                self._evictions += 1
+                logger.info(f"Evicted dataset {oldest} from registry")
+            # Charts of content no longer registered under any id are stale
+            stale = self._unreferenced(replaced)
+
+        if stale:
+            chart_cache.invalidate(stale)
+        return dataset_id
+
+    def get(self, dataset_id: str) -> Optional[pd.DataFrame]:
+        """Return a registered frame and mark it as recently used."""
+        with self._lock:
+            df = self._frames.get(dataset_id)
+            if df is not None:
+                self._frames.move_to_end(dataset_id)
+            return df
+
+    def fingerprint(self, dataset_id: str) -> Optional[str]:
+        """Return the content fingerprint of a registered frame."""
+        with self._lock:
+            return self._fingerprints.get(dataset_id)
+
+    def remove(self, dataset_id: str) -> None:
+        """Drop a frame from the registry and the charts computed from it."""
+        with self._lock:
+            fingerprint = self._fingerprints.get(dataset_id)
+            self._discard(dataset_id)
+            stale = self._unreferenced(fingerprint)
+        if stale:
+            chart_cache.invalidate(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return registry occupancy counters."""
+        with self._lock:
+            return {
+                'datasets': len(self._frames),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self._evictions
+            }
+
+    def _unreferenced(self, fingerprint: Optional[str]) -> Optional[str]:
+        """The fingerprint if no registered dataset still has it; the caller must hold the lock."""
+        if fingerprint and fingerprint not in self._fingerprints.values():
+            return fingerprint
+        return None
+
+    def _discard(self, dataset_id: str) -> None:
+        """Remove an entry; the caller must hold the lock."""
+        if dataset_id in self._frames:
+            del self._frames[dataset_id]
+            self._total_bytes -= self._sizes.pop(dataset_id, 0)
+            self._fingerprints.pop(dataset_id, None)
+
+
+dataset_registry = DatasetRegistry()
@@ -0,0 +1,173 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Most points a chart series is sent with
+DEFAULT_POINT_BUDGET = int(os.getenv('CHART_POINT_BUDGET', '2000'))
+# Most slices or bars before the smallest are folded into "Other"
+DEFAULT_MAX_CATEGORIES = int(os.getenv('CHART_MAX_CATEGORIES', '12'))
+OTHER_LABEL = 'Other'
+# Scatter plots with more rows than this are drawn as a density heatmap
+SCATTER_POINT_THRESHOLD = int(os.getenv('SCATTER_POINT_THRESHOLD', '5000'))
+# Heatmap bins per axis, by default and at most
+DEFAULT_HEATMAP_BINS = int(os.getenv('HEATMAP_BINS', '50'))
+MAX_HEATMAP_BINS = 200
+# Histogram bins, by default (as precomputed in dataset profiles) and at most
+DEFAULT_HISTOGRAM_BINS = int(os.getenv('PROFILE_HISTOGRAM_BINS', '20'))
+MAX_HISTOGRAM_BINS = 200
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    The first and last points are always kept. The rest are split into
+    ``threshold - 2`` buckets, and from each the point forming the largest
+    triangle with the previously kept point and the next bucket's mean is
+    chosen. Buckets are evaluated with numpy; only the walk over buckets
+    is a Python loop. ``x`` must be sorted and NaNs in ``y`` count as 0.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    bounds = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    # Mean of every bucket, used as the third vertex for the bucket before it
+    counts = np.diff(bounds)
+    mean_x = np.add.reduceat(x[1:n - 1], bounds[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], bounds[:-1] - 1) / counts
+    mean_x = np.append(mean_x, x[n - 1])
+    mean_y = np.append(mean_y, y[n - 1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = mean_x[bucket + 1], mean_y[bucket + 1]
+        areas = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample_series(x: Optional[np.ndarray], columns: List[np.ndarray],
+                      budget: int = DEFAULT_POINT_BUDGET) -> np.ndarray:
+    """Row indices to plot several series sharing one x axis within a budget.
+
+    Each series gets an equal share of the budget through LTTB and the
+    union of the kept rows is returned in order, so every series keeps its
+    own peaks and the series stay aligned on a category axis.
+    """
+    n = len(columns[0]) if columns else 0
+    if n <= budget:
+        return np.arange(n)
+    positions = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    share = max(budget // max(len(columns), 1), 3)
+    kept = np.unique(np.concatenate([lttb_indices(positions, values, share) for values in columns]))
+    return kept
+
+
+def sample_indices(n: int, budget: int = DEFAULT_POINT_BUDGET, seed: int = 0) -> np.ndarray:
+    """Sorted row indices of a uniform sample of at most ``budget`` rows.
+
+    The sample is seeded, so the same rows are drawn for the same frame
+    and cached charts stay reproducible.
+    """
+    if n <= budget:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n, size=max(budget, 1), replace=False))
+
+
+def heatmap_bins(bins: Any = None) -> Tuple[int, int]:
+    """Resolve a bin spec (one count or an [x, y] pair) to bounded bin counts."""
+    if bins is None:
+        bins = DEFAULT_HEATMAP_BINS
+    if isinstance(bins, (list, tuple)) and len(bins) == 2:
+        x_bins, y_bins = bins
+    else:
+        x_bins = y_bins = bins
+    return (min(max(int(x_bins), 1), MAX_HEATMAP_BINS),
+            min(max(int(y_bins), 1), MAX_HEATMAP_BINS))
+
+
+def histogram_bins(bins: Any = None) -> int:
+    """Resolve a histogram bin spec (a count, or a list whose first entry is used) to a bounded count."""
+    if isinstance(bins, (list, tuple)):
+        bins = bins[0] if bins else None
+    if bins is None:
+        bins = DEFAULT_HISTOGRAM_BINS
+    return min(max(int(bins), 1), MAX_HISTOGRAM_BINS)
+
+
+def histogram_2d(x: np.ndarray, y: np.ndarray, bins: Tuple[int, int]) -> Dict[str, Any]:
+    """Count points per cell of an x/y grid with ``numpy.histogram2d``.
+
+    Returns the bin edges, ``[x_bin, y_bin, count]`` for every non-empty
+    cell and the largest count. Rows with a NaN coordinate are ignored.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    if len(x) == 0:
+        return {'x_edges': [], 'y_edges': [], 'cells': [], 'max': 0}
+
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    x_bin, y_bin = np.nonzero(counts)
+    cells = np.column_stack([x_bin, y_bin, counts[x_bin, y_bin]]).astype(np.int64)
+    return {
+        'x_edges': x_edges,
+        'y_edges': y_edges,
+        'cells': cells.tolist(),
+        'max': int(counts.max())
+    }
+
+
+def bin_labels(edges: np.ndarray) -> List[str]:
+    """Axis labels for histogram bins: each bin's center, compactly formatted."""
+    edges = np.asarray(edges, dtype=np.float64)
+    return [f"{center:.4g}" for center in (edges[:-1] + edges[1:]) / 2]
+
+
+def aggregate_top_n(keys: Any, columns: List[Any],
+                    max_categories: int = DEFAULT_MAX_CATEGORIES,
+                    other_label: str = OTHER_LABEL) -> Tuple[List[Any], List[List[float]]]:
+    """Sum each column per key, keeping the largest keys and folding the rest into "Other".
+
+    Keys are ranked by the first column's total. When there are no more
+    than ``max_categories`` keys they keep their order of first appearance;
+    otherwise the largest ``max_categories - 1`` are returned in descending
+    order followed by one "Other" entry. Rows with a missing key are
+    ignored and NaN values count as 0.
+    """
+    codes, uniques = pd.factorize(np.asarray(keys))
+    valid = codes >= 0
+    codes = codes[valid]
+    sums = [np.bincount(codes, weights=np.nan_to_num(np.asarray(column, dtype=np.float64)[valid]),
+                        minlength=len(uniques)) for column in columns]
+    labels = np.asarray(uniques, dtype=object)
+    if len(labels) <= max_categories:
+        return labels.tolist(), [total.tolist() for total in sums]
+
+    order = np.argsort(-sums[0], kind='stable')
+    keep, rest = order[:max_categories - 1], order[max_categories - 1:]
+    return (labels[keep].tolist() + [other_label],
+            [total[keep].tolist() + [float(total[rest].sum())] for total in sums])
+
+
+def sampling_report(method: str, input_points: int, output_points: int) -> Dict[str, Any]:
+    """Describe how a chart's data was reduced."""
+    if method != 'none':
+        logger.info(f"Downsampled chart data with {method}: {input_points} -> {output_points} points")
+    return {'method': method, 'input_points': int(input_points), 'output_points': int(output_points)}
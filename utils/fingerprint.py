@@ -0,0 +1,30 @@
+import hashlib
+from typing import Any
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _column_bytes(series: pd.Series) -> Any:
+    """Bytes that identify a column's values, hashed without Python loops."""
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_extension_array_dtype(series.dtype):
+        return np.ascontiguousarray(series.to_numpy()).data
+    return pd.util.hash_pandas_object(series, index=False).to_numpy().data
+
+
+def dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a frame's column names, dtypes and values.
+
+    Column buffers are fed to one streaming hash, so the cost is a single
+    vectorized pass and equal data always yields the same fingerprint.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"{len(df)}:{len(df.columns)}".encode())
+    for column in df.columns:
+        series = df[column]
+        hasher.update(f"\x00{column}\x00{series.dtype}\x00".encode())
+        hasher.update(_column_bytes(series))
+    return hasher.hexdigest()
@@ -0,0 +1,172 @@
+import json
+import uuid
+from typing import Any, Dict, List
+import logging
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _is_bulk(obj: Any) -> bool:
+    """True for objects serialized by pandas instead of element by element."""
+    return (isinstance(obj, (pd.DataFrame, pd.Series, pd.Index))
+            or (isinstance(obj, np.ndarray) and obj.ndim == 1))
+
+
+def _frame_json(obj: Any, sort_keys: bool) -> str:
+    """Serialize a DataFrame as records, or a 1-D array as a value list, in C."""
+    if isinstance(obj, np.ndarray):
+        obj = pd.Series(obj)
+    if isinstance(obj, pd.DataFrame):
+        if sort_keys:
+            try:
+                obj = obj[sorted(obj.columns)]
+            except TypeError:
+                pass  # Mixed-type column names keep their original order
+        return obj.to_json(orient='records', date_format='iso', double_precision=15)
+    if isinstance(obj, pd.Index):
+        obj = obj.to_series()
+    return obj.to_json(orient='values', date_format='iso', double_precision=15)
+
+
+def _native_value(obj: Any) -> Any:
+    """Convert scalars that neither encoder handles natively."""
+    if obj is pd.NaT or obj is None:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, (pd.Timedelta, np.timedelta64)):
+        return str(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return None if np.isnan(obj) else float(obj)
+    if isinstance(obj, np.datetime64):
+        return None if np.isnat(obj) else pd.Timestamp(obj).isoformat()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError
+
+
+class DataJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes numpy and pandas objects in bulk.
+
+    DataFrames, Series and Index objects are written by pandas' C encoder
+    and spliced into the output without building per-row Python dicts.
+    When orjson is installed it encodes everything else as well; otherwise
+    the standard library encoder is used. Frames are encoded the same way
+    on both paths.
+    """
+
+    use_orjson = orjson is not None
+
+    def default(self, obj: Any) -> Any:
+        """Convert numpy/pandas scalars and arrays for the stdlib encoder."""
+        try:
+            return _native_value(obj)
+        except TypeError:
+            return DefaultJSONProvider.default(obj)
+
+    def dumps_bytes(self, obj: Any, **kwargs: Any) -> bytes:
+        """Serialize ``obj`` to UTF-8 JSON bytes."""
+        if self.use_orjson:
+            return self._dumps_orjson(obj, **kwargs)
+        return self._dumps_stdlib(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize ``obj`` to a JSON string."""
+        if self.use_orjson:
+            return self._dumps_orjson(obj, **kwargs).decode('utf-8')
+        return self._dumps_stdlib(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        """Build a JSON response without a str round trip."""
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args: Dict[str, Any] = {}
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args['indent'] = 2
+        else:
+            dump_args['separators'] = (',', ':')
+        return self._app.response_class(self.dumps_bytes(obj, **dump_args), mimetype=self.mimetype)
+
+    def _dumps_orjson(self, obj: Any, **kwargs: Any) -> bytes:
+        """Encode with orjson, splicing frames in after encoding."""
+        sort_keys = kwargs.get('sort_keys', self.sort_keys)
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            options |= orjson.OPT_INDENT_2
+
+        splicer = _FrameSplicer(sort_keys, self.default)
+        return splicer.splice(orjson.dumps(obj, default=splicer.default, option=options))
+
+    def _dumps_stdlib(self, obj: Any, **kwargs: Any) -> str:
+        """Encode with the json module, splicing frames in after encoding."""
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        splicer = _FrameSplicer(kwargs['sort_keys'], self.default)
+        kwargs['default'] = splicer.default
+        kwargs['allow_nan'] = False
+        try:
+            encoded = json.dumps(obj, **kwargs)
+        except ValueError:
+            # Float subclasses such as np.float64 bypass ``default``; write
+            # their NaN/inf as null, as orjson does
+            splicer.fragments.clear()
+            encoded = json.dumps(_finite(obj), **kwargs)
+        return splicer.splice(encoded.encode('utf-8')).decode('utf-8')
+
+
+def _finite(obj: Any) -> Any:
+    """Copy containers, replacing non-finite floats with None."""
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+class _FrameSplicer:
+    """Swap frames for placeholders while encoding, then splice in pandas' JSON.
+
+    Each frame becomes a unique placeholder string in the encoder's output
+    and is replaced afterwards by the output of ``DataFrame.to_json``.
+    """
+
+    def __init__(self, sort_keys: bool, fallback: Any):
+        self.sort_keys = sort_keys
+        self.fallback = fallback
+        self.token = uuid.uuid4().hex
+        self.fragments: List[bytes] = []
+
+    def default(self, value: Any) -> Any:
+        """Encoder hook: defer bulk objects, convert everything else."""
+        if _is_bulk(value):
+            self.fragments.append(_frame_json(value, self.sort_keys).encode('utf-8'))
+            return f"__frame_{self.token}_{len(self.fragments) - 1}__"
+        return self.fallback(value)
+
+    def splice(self, encoded: bytes) -> bytes:
+        """Replace each placeholder with its pre-encoded frame."""
+        if not self.fragments:
+            return encoded
+        parts = encoded.split(f'"__frame_{self.token}_'.encode())
+        output = [parts[0]]
+        for part in parts[1:]:
+            index, rest = part.split(b'__"', 1)
+            output.append(self.fragments[int(index)])
+            output.append(rest)
+        return b''.join(output)
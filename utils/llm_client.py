@@ -0,0 +1,187 @@
+import asyncio
+import os
+import random
+import threading
+from typing import Any, AsyncIterator, Optional
+import logging
+
+import httpx
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+DEFAULT_TIMEOUT = float(os.getenv('LLM_TIMEOUT_SECONDS', '60'))
+DEFAULT_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 8.0
+
+# Errors worth another attempt; anything else is returned to the caller at once
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+class LLMClient:
+    """Async chat-completions client shared by every request thread.
+
+    One ``AsyncOpenAI`` client with a pooled HTTP connection lives on a
+    dedicated event-loop thread, so routes running on their own per-thread
+    loops share connections without holding an OS thread per completion.
+    A semaphore bounds in-flight requests; each attempt has a timeout and
+    transient failures are retried with full-jitter exponential backoff.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF):
+        """Configure the client; the connection pool is created on first use."""
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Start the background loop and HTTP client once."""
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-client", daemon=True)
+                thread.start()
+                asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+                self._loop = loop
+            return self._loop
+
+    async def _setup(self) -> None:
+        """Create the pooled client and semaphore on the background loop."""
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        self._client = AsyncOpenAI(
+            api_key=self.api_key or os.getenv('OPENAI_API_KEY'),
+            base_url=self.base_url or os.getenv('OPENAI_BASE_URL') or None,
+            timeout=self.timeout,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(limits=limits, timeout=self.timeout))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _backoff(self, attempt: int, error: Exception) -> None:
+        """Sleep a full-jitter exponential delay before the next attempt."""
+        delay = random.uniform(0, min(MAX_BACKOFF, self.backoff * 2 ** attempt))
+        logger.warning(f"LLM request failed ({type(error).__name__}), retry {attempt + 1} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    async def _with_retries(self, call) -> Any:
+        """Run one request under the semaphore, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    return await asyncio.wait_for(call(), self.timeout)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                await self._backoff(attempt, e)
+
+    async def _pump_stream(self, params: dict, put) -> None:
+        """Stream a completion on the background loop, handing chunks to ``put``.
+
+        The semaphore is held for the whole stream. Failures are retried
+        only before the first chunk, so callers never see repeated tokens.
+        """
+        emitted = False
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    stream = await asyncio.wait_for(
+                        self._client.chat.completions.create(stream=True, **params), self.timeout)
+                    async for chunk in stream:
+                        emitted = True
+                        put(('chunk', chunk))
+                put(('end', None))
+                return
+            except RETRYABLE_ERRORS as e:
+                if emitted or attempt == self.max_retries:
+                    put(('error', e))
+                    return
+                await self._backoff(attempt, e)
+            except Exception as e:
+                put(('error', e))
+                return
+
+    async def _create(self, params: dict) -> Any:
+        """Chat completion on the background loop."""
+        return await self._with_retries(lambda: self._client.chat.completions.create(**params))
+
+    async def create(self, **params: Any) -> Any:
+        """Create a chat completion from any event loop."""
+        loop = self._ensure_started()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._create(params), loop))
+
+    async def stream(self, **params: Any) -> AsyncIterator[Any]:
+        """Stream chat completion chunks into the calling event loop."""
+        loop = self._ensure_started()
+        caller = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def put(item) -> None:
+            caller.call_soon_threadsafe(queue.put_nowait, item)
+
+        pump = asyncio.run_coroutine_threadsafe(self._pump_stream(params, put), loop)
+        try:
+            while True:
+                kind, item = await queue.get()
+                if kind == 'end':
+                    return
+                if kind == 'error':
+                    raise item
+                yield item
+        finally:
+            # Stops the upstream request if the consumer goes away early
+            pump.cancel()
+
+    def create_sync(self, **params: Any) -> Any:
+        """Create a chat completion from synchronous code."""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self._create(params), loop).result()
+
+    def run_sync(self, coro: Any) -> Any:
+        """Run a coroutine that makes several requests on the background loop and wait for it."""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def close(self) -> None:
+        """Close the connection pool and stop the background loop."""
+        with self._start_lock:
+            if self._loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+            self._client = None
+
+
+_llm_client = LLMClient()
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client."""
+    return _llm_client
+
+
+def set_llm_client(client: LLMClient) -> LLMClient:
+    """Replace the process-wide LLM client, e.g. to target a local stand-in server."""
+    global _llm_client
+    previous, _llm_client = _llm_client, client
+    return previous
@@ -0,0 +1,424 @@
+import re
+from html import escape
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Questions mentioning these need the model: charts, explanations, open-ended analysis
+DEFER_PATTERN = re.compile(
+    r'\b(chart|plot|graph|visuali[sz]\w*|draw|trend\w*|correlat\w*|why|explain\w*|insight\w*|'
+    r'predict\w*|forecast\w*|recommend\w*|suggest\w*|summar\w*|describe|analy[sz]\w*|relationship)\b')
+MAX_QUESTION_LENGTH = 200
+
+AGGREGATE_WORDS = {
+    'mean': r'average|mean|avg',
+    'median': r'median',
+    'min': r'minimum|min|lowest|smallest|youngest|least',
+    'max': r'maximum|max|highest|largest|biggest|oldest',
+    'sum': r'total|sum',
+}
+AGGREGATE_LABELS = {'mean': 'average', 'median': 'median', 'min': 'minimum',
+                    'max': 'maximum', 'sum': 'total', 'count': 'count'}
+COUNT_PATTERN = re.compile(r'\b(how many|number of|count)\b')
+DISTINCT_PATTERN = re.compile(r'\b(unique|distinct|different)\b')
+SHARE_PATTERN = re.compile(r'\b(percent|percentage|share|proportion|fraction|ratio|rate)\b|%')
+TOP_PATTERN = re.compile(r'\btop\s+(\d+)\b|\bmost (common|frequent|popular)\b')
+GROUP_PATTERN = r'\b(?:by|per|for each|each|across|grouped by)\s+'
+NEGATION_WORDS = r"no|not|without|don't|doesn't|didn't|never|non"
+# Words allowed between a negation and the column it negates ("without a loan")
+NEGATION_BRIDGE = r"have|has|having|had|a|an|any"
+# Numeric conditions are beyond the router; such questions go to the model
+CONDITION_PATTERN = re.compile(
+    r'\b(over|under|above|below|greater|less|more than|fewer|at least|at most|between|'
+    r'older than|younger than|after|before|since|until|except|excluding)\b|[<>=]')
+
+# Words that carry no qualifier; anything else the router did not parse sends
+# the question to the model ("how many people are in their thirties")
+FILLER_WORDS = {
+    'a', 'an', 'the', 'of', 'in', 'on', 'to', 'and', 'with', 'who', 'that', 'which', 'whose',
+    'what', "what's", 'whats', 'is', 'are', 'was', 'were', 'be', 'there', 'do', 'does', 'did',
+    'have', 'has', 'had', 'having', 'we', 'i', 'you', 'me', 'it', 'its', 'can', 'please',
+    'show', 'tell', 'give', 'list', 'find', 'get', 'calculate', 'compute', 'overall', 'all',
+    'dataset', 'data', 'table', 'file', 'row', 'rows', 'record', 'records', 'entry', 'entries',
+    'people', 'person', 'persons', 'customer', 'customers', 'client', 'clients', 'value', 'values',
+    'how', 'many', 'number', 'count', 'unique', 'distinct', 'different', 'percent', 'percentage',
+    'share', 'proportion', 'fraction', 'ratio', 'rate', 'top', 'most', 'common', 'frequent',
+    'popular', 'by', 'per', 'for', 'each', 'across', 'grouped', 'yes',
+} | {word for words in AGGREGATE_WORDS.values() for word in words.split('|')}
+
+YES_VALUES = {'yes', 'y', 'true', '1'}
+NO_VALUES = {'no', 'n', 'false', '0'}
+# Categorical values are only matched in columns with at most this many of them
+MAX_VALUE_MATCH_UNIQUES = 100
+DEFAULT_TOP_N = 5
+MAX_TABLE_ROWS = 20
+
+
+def _normalize(text: Any) -> str:
+    """Lowercase text with underscores and dashes turned into spaces."""
+    return ' '.join(re.sub(r'[_\-]+', ' ', str(text).lower()).split())
+
+
+def _word_pattern(phrase: str) -> str:
+    """Regex matching a phrase as whole words, allowing a plural 's'."""
+    return r'(?<![\w])' + re.escape(phrase) + r'(?:s|es)?(?![\w])'
+
+
+def find_columns(question: str, columns: List[Any]) -> List[Any]:
+    """Columns named in a normalized question, in order of mention.
+
+    Longer names win over shorter ones they overlap, so ``customer id``
+    is not also read as ``customer``.
+    """
+    matches = []
+    for column in columns:
+        name = _normalize(column)
+        if not name:
+            continue
+        for match in re.finditer(_word_pattern(name), question):
+            matches.append((match.start(), -len(name), match.end(), column))
+
+    found: List[Any] = []
+    taken_until = -1
+    for start, _, end, column in sorted(matches):
+        if start < taken_until or column in found:
+            continue
+        found.append(column)
+        taken_until = end
+    return found
+
+
+def _aggregates_in(question: str) -> List[str]:
+    """The aggregates a question asks for, in order of mention."""
+    found = []
+    for name, words in AGGREGATE_WORDS.items():
+        match = re.search(rf'\b({words})\b', question)
+        if match:
+            found.append((match.start(), name))
+    return [name for _, name in sorted(found)]
+
+
+def _aggregate_in(question: str) -> Optional[str]:
+    """The first aggregate the question asks for, if any."""
+    aggregates = _aggregates_in(question)
+    return aggregates[0] if aggregates else None
+
+
+def _is_yes_no(series: pd.Series) -> bool:
+    """True for columns holding only yes/no-style values."""
+    uniques = series.dropna().unique()
+    return 0 < len(uniques) <= 2 and {_normalize(value) for value in uniques} <= YES_VALUES | NO_VALUES
+
+
+def _yes_mask(series: pd.Series) -> pd.Series:
+    """Rows whose yes/no value is affirmative."""
+    return series.map(lambda value: _normalize(value) in YES_VALUES if pd.notna(value) else False)
+
+
+class _Deferred(Exception):
+    """Raised when a question turns out to need the model after all."""
+
+
+def find_values(question: str, df: pd.DataFrame, columns: List[Any]) -> List[Tuple[Any, Any]]:
+    """(column, value) pairs whose categorical values are named in the question.
+
+    Yes/no values are skipped since they say nothing about which column
+    is meant. Where matches overlap the longest wins; a name matching
+    values of several columns is returned once per column.
+    """
+    matches = []
+    for column in columns:
+        series = df[column]
+        uniques = series.dropna().unique()
+        if len(uniques) > MAX_VALUE_MATCH_UNIQUES or _is_yes_no(series):
+            continue
+        for value in uniques:
+            name = _normalize(value)
+            if len(name) < 2 or name in YES_VALUES | NO_VALUES or name == 'unknown':
+                continue
+            for match in re.finditer(_word_pattern(name), question):
+                matches.append((match.start(), -len(name), match.end(), column, value))
+
+    found: List[Tuple[Any, Any]] = []
+    taken = (-1, -1)
+    for start, _, end, column, value in sorted(matches, key=lambda m: m[:3]):
+        if start < taken[1] and (start, end) != taken:
+            continue
+        found.append((column, value))
+        taken = (start, end)
+    return found
+
+
+def _single_value(question: str, df: pd.DataFrame, columns: List[Any]) -> Optional[Tuple[Any, Any]]:
+    """The one categorical value named in the question; several defer to the model."""
+    values = find_values(question, df, columns)
+    if len(values) > 1:
+        raise _Deferred(f"several values named: {values}")
+    return values[0] if values else None
+
+
+def _numbers(series: pd.Series) -> pd.Series:
+    """A column as floats, with unparseable values as NaN."""
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.astype(np.float64)
+    return pd.to_numeric(series.astype(object), errors='coerce').astype(np.float64)
+
+
+def _format(value: Any) -> str:
+    """Render a number compactly: integers plainly, others to two decimals."""
+    if isinstance(value, (int, np.integer)):
+        return f"{int(value):,}"
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return 'n/a'
+        if float(value).is_integer():
+            return f"{int(value):,}"
+        return f"{float(value):,.2f}"
+    return escape(str(value))
+
+
+def _html(text: str, headers: Optional[List[str]] = None,
+          rows: Optional[List[Tuple[Any, Any]]] = None) -> str:
+    """Wrap an answer and optional two-column table in the app's HTML layout."""
+    parts = ['<div style="max-width: 300px;">', f'<p>{text}</p>']
+    if rows:
+        cell = 'style="padding: 2px 8px; text-align: left;"'
+        parts.append('<table style="font-size: 12px; border-collapse: collapse;">')
+        parts.append('<tr>' + ''.join(f'<th {cell}>{escape(str(h))}</th>' for h in headers) + '</tr>')
+        for label, value in rows:
+            parts.append(f'<tr><td {cell}>{_format(label)}</td><td {cell}>{_format(value)}</td></tr>')
+        parts.append('</table>')
+    parts.append('</div>')
+    return ''.join(parts)
+
+
+def _envelope(answer: str, intent: str) -> Dict[str, Any]:
+    """The same response shape as a model answer."""
+    logger.info(f"Answered locally with intent '{intent}'")
+    return {'answer': answer, 'visualization': None, 'web_search_used': False}
+
+
+def _negation_pattern(column: Any) -> str:
+    """Regex for a negation word directly in front of a column's name."""
+    return (rf"\b(?:{NEGATION_WORDS})(?=\s+(?:(?:{NEGATION_BRIDGE})\s+)*"
+            + _word_pattern(_normalize(column)) + ')')
+
+
+def _negated(text: str, column: Any) -> bool:
+    """Whether a negation directly precedes a yes/no column ("without a loan")."""
+    return bool(re.search(_negation_pattern(column), text))
+
+
+def _unparsed_words(text: str, columns: List[Any], values: List[Tuple[Any, Any]],
+                    yes_no: List[Any]) -> List[str]:
+    """Words of the question that are not column names, values, intents or filler.
+
+    A negation only counts as parsed when it precedes a yes/no column.
+    """
+    for column in yes_no:
+        text = re.sub(_negation_pattern(column), ' ', text)
+    known = set(FILLER_WORDS)
+    for name in [_normalize(column) for column in columns] + [_normalize(value) for _, value in values]:
+        known.update(name.split())
+    unparsed = []
+    for word in re.findall(r"[a-z0-9']+", text):
+        singular = {word, word[:-1] if word.endswith('s') else word, word[:-2] if word.endswith('es') else word}
+        if not word.isdigit() and not singular & known:
+            unparsed.append(word)
+    return unparsed
+
+
+def _conditions(text: str, df: pd.DataFrame, categorical_columns: List[Any],
+                yes_no: List[Any], exclude: List[Any]) -> Tuple[Optional[pd.Series], List[str]]:
+    """Row filter for a named categorical value and mentioned yes/no columns.
+
+    Returns the boolean mask (None when nothing filters) and a readable
+    description of each condition.
+    """
+    mask = None
+    described: List[str] = []
+    value = _single_value(text, df, [c for c in categorical_columns if c not in exclude])
+    if value is not None:
+        column, label = value
+        mask = df[column] == label
+        described.append(f"{escape(str(column))} = {escape(str(label))}")
+    for column in yes_no:
+        if column in exclude:
+            continue
+        negated = _negated(text, column)
+        yes = _yes_mask(df[column])
+        condition = (~yes & df[column].notna()) if negated else yes
+        mask = condition if mask is None else mask & condition
+        described.append(f"{escape(str(column))} = {'no' if negated else 'yes'}")
+    return mask, described
+
+
+def _scope(described: List[str]) -> str:
+    """Suffix naming the filter an answer was computed under."""
+    return f" (where {' and '.join(described)})" if described else ''
+
+
+def _group_by(text: str, df: pd.DataFrame, categorical_columns: List[Any], categorical: List[Any],
+              yes_no: List[Any], numeric: List[Any], top_n: Optional[int]) -> Optional[Dict[str, Any]]:
+    """Aggregate a numeric column per category, or count rows per category."""
+    group = None
+    for column in categorical:
+        if re.search(GROUP_PATTERN + _word_pattern(_normalize(column)), text):
+            group = column
+            break
+    if group is None and top_n is not None:
+        group = next((column for column in categorical if column not in yes_no), None)
+    if group is None:
+        return None
+
+    mask, described = _conditions(text, df, categorical_columns, yes_no, [group])
+    subset = df if mask is None else df[mask]
+    keys = subset[group]
+    if numeric:
+        column = numeric[0]
+        agg = _aggregate_in(text) or 'mean'
+        if agg in ('min', 'max') and top_n is not None:
+            agg = 'mean'  # "top 5 jobs by highest balance" ranks by average
+        values = _numbers(subset[column]).groupby(keys, observed=True, sort=False).agg(agg)
+        label = f"{AGGREGATE_LABELS[agg]} {column}"
+    else:
+        values = keys.value_counts(sort=False)
+        label = 'count'
+    values = values.dropna().sort_values(ascending=False, kind='stable')
+    if values.empty:
+        return None
+
+    limit = top_n or MAX_TABLE_ROWS
+    shown = values.head(limit)
+    if top_n is not None:
+        heading = f"Top {len(shown)} {escape(str(group))} by {escape(label)}"
+    else:
+        heading = f"{escape(label.capitalize())} by {escape(str(group))}"
+        if len(values) > limit:
+            heading += f", top {limit} of {len(values)} groups"
+    heading += _scope(described) + ':'
+    return _envelope(_html(heading, [str(group), label], list(shown.items())),
+                     'top_n' if top_n is not None else 'group_by')
+
+
+def answer_locally(question: str, df: pd.DataFrame,
+                   numeric_columns: Optional[List[Any]] = None,
+                   categorical_columns: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+    """Answer simple aggregate questions with pandas instead of the model.
+
+    Recognizes row counts, averages/medians/minimums/maximums/totals of a
+    column, group-bys over a categorical column, top-N rankings and the
+    share of yes/no answers, optionally restricted to one categorical value
+    and one yes/no column named in the question. Returns the usual answer
+    envelope, or None when the question should go to the model: whenever
+    it names several values or yes/no columns, or has words the router
+    cannot place.
+    """
+    if df is None or df.empty or len(question) > MAX_QUESTION_LENGTH:
+        return None
+    text = _normalize(question)
+    top = TOP_PATTERN.search(text)
+    # Numbers other than a top-N size usually mean a numeric condition
+    bare = TOP_PATTERN.sub(' ', text)
+    if DEFER_PATTERN.search(text) or CONDITION_PATTERN.search(bare) or re.search(r'\d', bare):
+        return None
+
+    if numeric_columns is None:
+        numeric_columns = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c].dtype)
+                           and not pd.api.types.is_bool_dtype(df[c].dtype)]
+    if categorical_columns is None:
+        categorical_columns = [c for c in df.columns if c not in numeric_columns]
+
+    mentioned = find_columns(text, list(df.columns))
+    numeric = [c for c in mentioned if c in numeric_columns]
+    categorical = [c for c in mentioned if c in categorical_columns]
+    yes_no = [c for c in categorical if _is_yes_no(df[c])]
+
+    try:
+        # "housing loan": which yes/no column is the subject or filter is ambiguous
+        if len(yes_no) > 1:
+            return None
+        unparsed = _unparsed_words(text, mentioned, find_values(text, df, categorical_columns), yes_no)
+        if unparsed:
+            logger.info(f"Deferring to the model, unparsed words: {unparsed}")
+            return None
+
+        if top:
+            top_n = int(top.group(1)) if top.group(1) else DEFAULT_TOP_N
+            return _group_by(text, df, categorical_columns, categorical, yes_no, numeric,
+                             max(1, min(top_n, MAX_TABLE_ROWS)))
+
+        if SHARE_PATTERN.search(text):
+            if yes_no:
+                target = yes_no[-1]
+                mask, described = _conditions(text, df, categorical_columns, yes_no, [target])
+                subset = df if mask is None else df[mask]
+                if subset.empty:
+                    return None
+                negated = _negated(text, target)
+                share = float(_yes_mask(subset[target]).mean())
+                share = 1 - share if negated else share
+                answer = (f"{share:.1%} of rows have <b>{'no' if negated else 'yes'}</b> "
+                          f"for {escape(str(target))}{_scope(described)}.")
+                return _envelope(_html(answer), 'share')
+            value = _single_value(text, df, categorical_columns)
+            if value is None:
+                return None
+            column, label = value
+            share = float((df[column] == label).mean())
+            answer = f"{share:.1%} of rows have {escape(str(column))} = <b>{escape(str(label))}</b>."
+            return _envelope(_html(answer), 'share')
+
+        if COUNT_PATTERN.search(text):
+            if re.search(GROUP_PATTERN, text) and categorical:
+                return _group_by(text, df, categorical_columns, categorical, yes_no, [], None)
+            if DISTINCT_PATTERN.search(text) and mentioned:
+                column = mentioned[0]
+                mask, described = _conditions(text, df, categorical_columns, yes_no, [column])
+                values = df[column] if mask is None else df.loc[mask, column]
+                answer = (f"There are {_format(int(values.nunique()))} distinct values "
+                          f"of {escape(str(column))}{_scope(described)}.")
+                return _envelope(_html(answer), 'count_distinct')
+
+            mask, described = _conditions(text, df, categorical_columns, yes_no, [])
+            if mask is not None:
+                answer = (f"{_format(int(mask.sum()))} of {_format(len(df))} rows match"
+                          f"{_scope(described)}.")
+                return _envelope(_html(answer), 'count_rows')
+            if not mentioned:
+                return _envelope(_html(f"The dataset has {_format(len(df))} rows."), 'count_rows')
+            if categorical and not numeric:
+                column = categorical[0]
+                answer = (f"There are {_format(int(df[column].nunique()))} distinct values "
+                          f"of {escape(str(column))}.")
+                return _envelope(_html(answer), 'count_distinct')
+            return None
+
+        aggregates = _aggregates_in(text)
+        if not aggregates or not numeric:
+            return None
+        if re.search(GROUP_PATTERN, text) and categorical:
+            return _group_by(text, df, categorical_columns, categorical, yes_no, numeric, None)
+
+        mask, described = _conditions(text, df, categorical_columns, yes_no, [])
+        subset = df if mask is None else df[mask]
+        if subset.empty:
+            return None
+        lines = []
+        for column in numeric:
+            values = _numbers(subset[column])
+            for agg in aggregates:
+                lines.append(f"the {AGGREGATE_LABELS[agg]} {escape(str(column))} is "
+                             f"<b>{_format(getattr(values, agg)())}</b>")
+        answer = '; '.join(lines) + _scope(described) + '.'
+        return _envelope(_html(answer[0].upper() + answer[1:]), 'aggregate')
+    except _Deferred as e:
+        logger.info(f"Deferring to the model: {str(e)}")
+        return None
+    except Exception as e:
+        logger.warning(f"Local analytics failed, deferring to the model: {str(e)}")
+        return None
@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .sketches import hash_values
+from .streaming_stats import ColumnAccumulator, merge_summaries
+
+logger = logging.getLogger(__name__)
+
+# Profiling stays in-process unless PROFILE_WORKERS opts in; 0 means one per CPU
+DEFAULT_WORKERS = int(os.getenv('PROFILE_WORKERS', '1')) or os.cpu_count() or 1
+
+# Column buffers attached in each worker process, set by _init_worker
+_worker_columns: Dict[str, Dict[str, Any]] = {}
+_worker_segments: List[shared_memory.SharedMemory] = []
+
+
+def _share_array(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """Copy an array into a new shared memory segment."""
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+    view[:] = array
+    return segment, {'name': segment.name, 'dtype': array.dtype.str, 'length': len(array)}
+
+
+def share_columns(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[shared_memory.SharedMemory]]:
+    """Place each column in shared memory as a flat numeric or code buffer.
+
+    Numeric columns are shared as-is. Other columns are factorized once in
+    the parent: their int32 codes go to shared memory, while the distinct
+    values travel to each worker once through the pool initializer.
+    """
+    specs = []
+    segments = []
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            segment, buffer = _share_array(series.to_numpy(dtype=np.float64, na_value=np.nan))
+            specs.append({'column': column, 'kind': 'numeric', 'buffer': buffer})
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            segment, buffer = _share_array(codes.astype(np.int32))
+            specs.append({
+                'column': column,
+                'kind': 'codes',
+                'buffer': buffer,
+                'uniques': np.asarray(uniques, dtype=object)
+            })
+        segments.append(segment)
+    return specs, segments
+
+
+def _init_worker(specs: List[Dict[str, Any]]) -> None:
+    """Attach shared column buffers and precompute per-value lookups."""
+    _worker_columns.clear()
+    for spec in specs:
+        segment = shared_memory.SharedMemory(name=spec['buffer']['name'])
+        _worker_segments.append(segment)
+        array = np.ndarray((spec['buffer']['length'],), dtype=np.dtype(spec['buffer']['dtype']),
+                           buffer=segment.buf)
+        column = {'kind': spec['kind'], 'array': array}
+        if spec['kind'] == 'codes':
+            uniques = spec['uniques']
+            column['uniques'] = uniques
+            column['unique_numeric'] = pd.to_numeric(
+                pd.Series(uniques, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+            column['unique_hashes'] = hash_values(pd.Series(uniques, dtype=object))
+            column['null_hash'] = hash_values(pd.Series([np.nan], dtype=object))[0]
+        _worker_columns[spec['column']] = column
+
+
+def _summarize_range(start: int, stop: int) -> Dict[str, ColumnAccumulator]:
+    """Summarize rows [start, stop) of every shared column."""
+    summaries = {}
+    for name, column in _worker_columns.items():
+        accumulator = ColumnAccumulator(name)
+        values = column['array'][start:stop]
+        if column['kind'] == 'numeric':
+            accumulator.update(pd.Series(values))
+        else:
+            accumulator.update_encoded(values, column['uniques'], column['unique_numeric'],
+                                       column['unique_hashes'], column['null_hash'])
+        summaries[name] = accumulator
+    return summaries
+
+
+def parallel_summarize(df: pd.DataFrame, chunk_size: int,
+                       workers: Optional[int] = None) -> Tuple[Dict[str, ColumnAccumulator], int]:
+    """Summarize a frame's chunks across a process pool.
+
+    Workers read rows from shared memory and return only the compact
+    mergeable summaries. Returns the merged summaries and the chunk count.
+    """
+    workers = workers or DEFAULT_WORKERS
+    ranges = [(start, min(start + chunk_size, len(df))) for start in range(0, len(df), chunk_size)]
+    specs, segments = share_columns(df)
+    try:
+        # Spawned, not forked: the server process runs cache and client threads
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(specs,),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            partials = list(executor.map(_summarize_range,
+                                         [start for start, _ in ranges],
+                                         [stop for _, stop in ranges]))
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    logger.info(f"Summarized {len(ranges)} chunks with {workers} workers")
+    return merge_summaries(partials), len(ranges)
@@ -0,0 +1,352 @@
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a character heuristic if tiktoken is missing
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o"
+# Total input tokens for the system prompt, history and question
+DEFAULT_PROMPT_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '8000'))
+# Share of the tokens left after the static prefix and question that the data profile may take
+PROFILE_SHARE = 0.4
+# Longest single history message kept verbatim
+MAX_MESSAGE_TOKENS = int(os.getenv('PROMPT_MAX_MESSAGE_TOKENS', '1000'))
+# Most frequent values listed per categorical column in the data profile
+PROFILE_TOP_VALUES = 3
+# Length of each older turn's line in the history summary
+SUMMARY_SNIPPET_TOKENS = 40
+# Chat-format framing tokens added per message
+MESSAGE_OVERHEAD = 4
+# Average characters per token when no tiktoken encoding is available
+CHARS_PER_TOKEN = 4
+
+# Identical on every request and placed first, so the provider's prompt
+# cache can reuse it; anything per-request must go after it.
+STATIC_SYSTEM_PROMPT = """You are a versatile data analysis assistant that output HTML. You can:
+1. Have normal conversations without creating visualizations
+2. Analyze data and provide insights when asked
+3. Create visualizations only when explicitly requested or when it would significantly enhance the answer
+
+For each user message:
+- If it's a casual conversation (like greetings, general questions), respond naturally without data analysis
+- If it's a question about the data, provide a clear textual analysis using the available data
+- Only create visualizations if:
+  a) The user explicitly requests one
+  b) The question is specifically about trends, patterns, or comparisons that would be clearer with a visual
+  c) The data analysis would be significantly enhanced by a visualization
+
+When creating visualizations:
+- For time series or trends: Use line charts
+- For comparisons between categories: Use bar charts
+- For relationships between numeric variables: Use scatter plots
+- For part-to-whole relationships: Use pie charts
+
+You will respond in clean, proper HTML so the application can render it straight away. Normal text will be wrapped in a <p> tag. You will format the links as html links with an <a> tag. Links will have yellow font. Use divs and headings to properly separate different sections. Make sure text doesn't overlap and there is adequate line spacing. You will only output pure HTML. No markdown. All answers, titles, lists, headers, paragraphs - reply in fully styled HTML as the app will render and parse your responses as you reply. Only if you are asked about some programming problem that requires to send a code, you will use white font for only the code part, explanation part would be normal. Don't use ```html at the start and do not end with ``` anywhere. Do not output any text afterwards.
+DO NOT USE CANVAS TO OUTPUT CHARTS. MAKE SURE ALL CONTENT YOU OUTPUT IS IN A DIV THAT HAS MAX WIDTH 300px. MAKE SURE TO KEEP ANY LEGENDS SMALL.
+DO NOT OUTPUT ANY MARKDOWN. ONLY OUTPUT HTML. 
+
+EXAMPLE HTML FOR CHARTS:
+
+<div style="width: 300px; margin-bottom: 40px;">
+        <div style="text-align: center; margin-bottom: 10px; font-weight: bold; font-size: 14px;">Pie Chart</div>
+        <div style="width: 200px; height: 200px; border-radius: 50%; background: conic-gradient(#3498db 0deg 90deg, #e74c3c 90deg 180deg, #2ecc71 180deg 270deg, #f1c40f 270deg 360deg); margin: 0 auto; position: relative;">
+            <div class="hover-area" data-label="Category A" data-value="25%" style="position: absolute; width: 50%; height: 50%; top: 0; left: 50%; transform-origin: 0% 100%; transform: rotate(0deg) skew(0deg);"></div>
+            <div class="hover-area" data-label="Category B" data-value="25%" style="position: absolute; width: 50%; height: 50%; top: 0; left: 50%; transform-origin: 0% 100%; transform: rotate(90deg) skew(0deg);"></div>
+            <div class="hover-area" data-label="Category C" data-value="25%" style="position: absolute; width: 50%; height: 50%; top: 0; left: 50%; transform-origin: 0% 100%; transform: rotate(180deg) skew(0deg);"></div>
+            <div class="hover-area" data-label="Category D" data-value="25%" style="position: absolute; width: 50%; height: 50%; top: 0; left: 50%; transform-origin: 0% 100%; transform: rotate(270deg) skew(0deg);"></div>
+        </div>
+        <div style="display: flex; justify-content: center; flex-wrap: wrap; margin-top: 10px; font-size: 12px;">
+            <div style="display: flex; align-items: center; margin: 0 5px;">
+                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #3498db;"></div>
+                <span>Category A</span>
+            </div>
+            <div style="display: flex; align-items: center; margin: 0 5px;">
+                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #e74c3c;"></div>
+                <span>Category B</span>
+            </div>
+            <div style="display: flex; align-items: center; margin: 0 5px;">
+                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #2ecc71;"></div>
+                <span>Category C</span>
+            </div>
+            <div style="display: flex; align-items: center; margin: 0 5px;">
+                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #f1c40f;"></div>
+                <span>Category D</span>
+            </div>
+        </div>
+    </div>
+
+    <div style="width: 300px; margin-bottom: 40px;">
+        <div style="text-align: center; margin-bottom: 10px; font-weight: bold; font-size: 14px;">Bar Chart</div>
+        <div style="width: 300px; height: 200px; border-bottom: 2px solid white; border-left: 2px solid white; margin: 0 auto; position: relative; display: flex; align-items: flex-end; justify-content: space-around;">
+            <div class="hover-area" data-label="A" data-value="60%" style="width: 40px; background-color: #3498db; height: 60%;"></div>
+            <div class="hover-area" data-label="B" data-value="80%" style="width: 40px; background-color: #3498db; height: 80%;"></div>
+            <div class="hover-area" data-label="C" data-value="40%" style="width: 40px; background-color: #3498db; height: 40%;"></div>
+            <div class="hover-area" data-label="D" data-value="100%" style="width: 40px; background-color: #3498db; height: 100%;"></div>
+            <div class="hover-area" data-label="E" data-value="70%" style="width: 40px; background-color: #3498db; height: 70%;"></div>
+            <div style="position: absolute; color: white; font-size: 10px; bottom: -20px; left: 50%; transform: translateX(-50%);">Categories</div>
+            <div style="position: absolute; color: white; font-size: 10px; top: 50%; left: -20px; transform: translateY(-50%) rotate(-90deg);">Value</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 10%;">A</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 30%;">B</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 50%;">C</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 70%;">D</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 90%;">E</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 0;">0</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 25%;">25</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 50%;">50</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 75%;">75</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -20px; bottom: 100%;">100</div>
+        </div>
+        <div style="display: flex; justify-content: center; flex-wrap: wrap; margin-top: 10px; font-size: 12px;">
+            <div style="display: flex; align-items: center; margin: 0 10px;">
+                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #3498db;"></div>
+                <span>Data Series</span>
+            </div>
+        </div>
+    </div>
+
+    <div style="width: 300px; margin-bottom: 40px;">
+        <div style="text-align: center; margin-bottom: 10px; font-weight: bold; font-size: 14px;">Scatter Plot</div>
+        <div style="width: 300px; height: 200px; border-bottom: 2px solid white; border-left: 2px solid white; margin: 0 auto; position: relative;">
+            <div class="hover-area" data-label="Point 1" data-value="(20, 30)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 20%; bottom: 30%;"></div>
+            <div class="hover-area" data-label="Point 2" data-value="(40, 70)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 40%; bottom: 70%;"></div>
+            <div class="hover-area" data-label="Point 3" data-value="(60, 50)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 60%; bottom: 50%;"></div>
+            <div class="hover-area" data-label="Point 4" data-value="(80, 20)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 80%; bottom: 20%;"></div>
+            <div class="hover-area" data-label="Point 5" data-value="(30, 60)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 30%; bottom: 60%;"></div>
+            <div class="hover-area" data-label="Point 6" data-value="(70, 80)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 70%; bottom: 80%;"></div>
+            <div class="hover-area" data-label="Point 7" data-value="(50, 40)" style="width: 8px; height: 8px; background-color: #3498db; border-radius: 50%; position: absolute; left: 50%; bottom: 40%;"></div>
+            <div style="position: absolute; color: white; font-size: 10px; bottom: -20px; left: 50%; transform: translateX(-50%);">X Axis</div>
+            <div style="position: absolute; color: white; font-size: 10px; top: 50%; left: -20px; transform: translateY(-50%) rotate(-90deg);">Y Axis</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 0;">0</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 25%;">25</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 50%;">50</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; left: 75%;">75</div>
+            <div style="position: absolute; color: white; font-size: 8px; bottom: -15px; right: -5px;">100</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 0;">0</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 25%;">25</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 50%;">50</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -15px; bottom: 75%;">75</div>
+            <div style="position: absolute; color: white; font-size: 8px; left: -20px; bottom: 100%;">100</div>
+        </div>
+        <div style="display: flex; justify-content: center; flex-wrap: wrap; margin-top: 10px; font-size: 12px;">
+            <div style="display: flex; align-items: center; margin: 0 10px;">
+                <div style="width: 10px; height: 10px; margin-right: 3px; background-color: #3498db;"></div>
+                <span>Data Points</span>
+            </div>
+        </div>
+    </div>
+
+    <div id="tooltip" style="position: fixed; background-color: rgba(255,255,255,0.9); color: black; padding: 5px 10px; border-radius: 5px; font-size: 12px; pointer-events: none; display: none;"></div>
+
+
+Remember: Not every data-related question needs a visualization. You can output these visualizations directly in vanilla HTML and CSS and the frontend will render them"""
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """tiktoken encoding for a model, defaulting to the newest one.
+
+    None when tiktoken is missing or cannot load the encoding file (it is
+    downloaded on first use), in which case token counts are estimated.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding for {model}, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """Count tokens locally, exactly with tiktoken or approximately without."""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_MODEL) -> str:
+    """Cut text to at most ``max_tokens`` tokens, marking the cut with an ellipsis."""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ''
+    encoding = _encoding(model)
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens - 1]) + '…'
+    return text[:(max_tokens - 1) * CHARS_PER_TOKEN] + '…'
+
+
+@lru_cache(maxsize=8)
+def static_prefix_tokens(model: str = DEFAULT_MODEL) -> int:
+    """Token count of the static prefix, computed once per model."""
+    return count_tokens(STATIC_SYSTEM_PROMPT, model)
+
+
+def message_tokens(message: Dict[str, Any], model: str = DEFAULT_MODEL) -> int:
+    """Tokens a chat message costs, including its framing."""
+    return count_tokens(str(message.get('content') or ''), model) + MESSAGE_OVERHEAD
+
+
+def _name_list(names: List[str], limit: int) -> str:
+    """Join up to ``limit`` column names, noting how many were left out."""
+    names = [str(name) for name in names]
+    if len(names) <= limit:
+        return ', '.join(names)
+    return ', '.join(names[:limit]) + f" (+{len(names) - limit} more)"
+
+
+def _column_line(name: Any, description: Dict[str, Any]) -> str:
+    """One line summarizing a column from its precomputed profile."""
+    missing = f", {description['null_count']} missing" if description.get('null_count') else ""
+    if description.get('type') == 'numeric' and description.get('valid_count'):
+        quantiles = description.get('quantiles', {})
+        return (f"- {name}: numeric, min {description['min']:.4g}, median {quantiles.get('p50', 0):.4g}, "
+                f"max {description['max']:.4g}, mean {description['mean']:.4g}{missing}")
+    top = ', '.join(f"{entry['value']} ({entry['count']})"
+                    for entry in description.get('top_values', [])[:PROFILE_TOP_VALUES])
+    return f"- {name}: {description.get('unique_values', 0)} distinct, top: {top}{missing}"
+
+
+def format_data_profile(data_info: Dict[str, Any], max_tokens: int,
+                        model: str = DEFAULT_MODEL) -> str:
+    """Render the dataset summary within ``max_tokens``.
+
+    Per-column lines come from the profile's ``column_descriptions``, so no
+    rows are read. When the text is too long the column lines are dropped
+    from the end first, then the column lists are shortened.
+    """
+    descriptions = data_info.get('column_descriptions') or {}
+    longest = max(len(data_info['columns']), 1)
+    limit = longest
+    detail = len(descriptions)
+    while True:
+        text = (f"Current Data Summary:\n"
+                f"- Total rows: {data_info['total_rows']}\n"
+                f"- Columns: {_name_list(data_info['columns'], limit)}\n"
+                f"- Numeric columns: {_name_list(data_info['numeric_columns'], limit)}\n"
+                f"- Categorical columns: {_name_list(data_info['categorical_columns'], limit)}")
+        if detail:
+            lines = [_column_line(name, description)
+                     for name, description in list(descriptions.items())[:detail]]
+            text += "\nColumn profiles:\n" + "\n".join(lines)
+        if limit == 0 or count_tokens(text, model) <= max_tokens:
+            return text
+        if detail:
+            detail //= 2
+        else:
+            limit //= 2
+
+
+def _snippet(message: Dict[str, Any], model: str) -> str:
+    """One summary line for an older turn: its role and opening words."""
+    text = re.sub(r'<[^>]+>', ' ', str(message.get('content') or ''))
+    text = ' '.join(text.split())
+    return f"- {message.get('role', 'user')}: {truncate_to_tokens(text, SUMMARY_SNIPPET_TOKENS, model)}"
+
+
+def compact_history(messages: List[Dict[str, Any]], max_tokens: int,
+                    model: str = DEFAULT_MODEL) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Fit conversation history into ``max_tokens`` by size, newest turns first.
+
+    Recent turns are kept verbatim (each capped at ``MAX_MESSAGE_TOKENS``)
+    while they fit. The turns before them are folded into one summary
+    message with a short line per turn, newest first, and whatever does not
+    fit in the summary either is dropped.
+    """
+    kept: List[Dict[str, Any]] = []
+    used = 0
+    cut = 0
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        content = truncate_to_tokens(str(message.get('content') or ''), MAX_MESSAGE_TOKENS, model)
+        message = {**message, 'content': content}
+        cost = message_tokens(message, model)
+        if used + cost > max_tokens:
+            cut = index + 1
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+
+    older = messages[:cut]
+    summarized = 0
+    if older:
+        header = "Summary of earlier conversation:"
+        lines: List[str] = []
+        summary_used = count_tokens(header, model) + MESSAGE_OVERHEAD
+        for message in reversed(older):
+            line = _snippet(message, model)
+            cost = count_tokens(line, model) + 1
+            if used + summary_used + cost > max_tokens:
+                break
+            lines.append(line)
+            summary_used += cost
+        if lines:
+            summarized = len(lines)
+            kept.insert(0, {'role': 'system', 'content': '\n'.join([header] + lines[::-1])})
+            used += summary_used
+
+    return kept, {
+        'history_kept': len(messages) - len(older),
+        'history_summarized': summarized,
+        'history_dropped': len(older) - summarized,
+        'history': used
+    }
+
+
+def build_prompt(question: str, data_info: Dict[str, Any],
+                 history: Optional[List[Dict[str, Any]]] = None,
+                 budget: int = DEFAULT_PROMPT_BUDGET,
+                 model: str = DEFAULT_MODEL) -> Dict[str, Any]:
+    """Assemble the system prompt and history for a question within a token budget.
+
+    The system prompt is the static prefix followed by the data profile.
+    The question and static prefix are always sent; the profile may take up
+    to ``PROFILE_SHARE`` of the remaining budget and history gets the rest.
+    Returns the ``system_prompt``, ``previous_messages`` and a per-stage
+    ``tokens`` report.
+    """
+    history = list(history or [])
+    # The current question is sent as the final message, not as history
+    if history and history[-1].get('role') == 'user' and history[-1].get('content') == question:
+        history.pop()
+
+    static_tokens = static_prefix_tokens(model) + MESSAGE_OVERHEAD
+    question_tokens = count_tokens(question, model) + MESSAGE_OVERHEAD
+    remaining = max(budget - static_tokens - question_tokens, 0)
+
+    profile = format_data_profile(data_info, int(remaining * PROFILE_SHARE), model)
+    profile_tokens = count_tokens(profile, model) + 2
+    previous_messages, history_report = compact_history(
+        history, max(remaining - profile_tokens, 0), model)
+
+    total = static_tokens + profile_tokens + history_report['history'] + question_tokens
+    report = {
+        'budget': budget,
+        'static_prefix': static_tokens,
+        'data_profile': profile_tokens,
+        'question': question_tokens,
+        **history_report,
+        'total': total,
+        'over_budget': total > budget,
+        'exact': _encoding(model) is not None
+    }
+    return {
+        'system_prompt': f"{STATIC_SYSTEM_PROMPT}\n\n{profile}",
+        'previous_messages': previous_messages,
+        'tokens': report
+    }
@@ -0,0 +1,113 @@
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+DEFAULT_STREAM_BATCH_SIZE = 1000
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a frame slice to JSON-safe records in one bulk pass."""
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def offset_page(df: pd.DataFrame, offset: int, limit: int) -> Dict[str, Any]:
+    """Return one page of rows using offset/limit paging."""
+    total = len(df)
+    offset = min(max(offset, 0), total)
+    rows = frame_records(df.iloc[offset:offset + limit])
+    next_offset = offset + len(rows)
+    return {
+        'rows': rows,
+        'page': {
+            'offset': offset,
+            'limit': limit,
+            'total': total,
+            'next_offset': next_offset if next_offset < total else None
+        }
+    }
+
+
+def _coerce_key(value: str, dtype: np.dtype) -> Any:
+    """Convert a keyset cursor from the query string to the key column's type."""
+    if pd.api.types.is_numeric_dtype(dtype):
+        return float(value)
+    return value
+
+
+def keyset_page(df: pd.DataFrame, key: str, after: Optional[str],
+                limit: int, order: np.ndarray,
+                after_row: Optional[int] = None) -> Dict[str, Any]:
+    """Return the rows whose (key, row position) sorts after the cursor.
+
+    ``order`` is the stable argsort of the key column, so each page is a
+    binary search plus a slice rather than a scan of the frame. Rows with
+    equal keys are ordered by their position, which ``after_row`` resumes from.
+    """
+    if key not in df.columns:
+        raise ValueError(f"Unknown key column: {key}")
+
+    sorted_keys = df[key].to_numpy()[order]
+    start = 0
+    if after is not None:
+        cursor = _coerce_key(after, df[key].dtype)
+        if after_row is None:
+            start = int(np.searchsorted(sorted_keys, cursor, side='right'))
+        else:
+            # Within a run of equal keys the stable sort keeps row order
+            lo = int(np.searchsorted(sorted_keys, cursor, side='left'))
+            hi = int(np.searchsorted(sorted_keys, cursor, side='right'))
+            start = lo + int(np.searchsorted(order[lo:hi], after_row, side='right'))
+
+    positions = order[start:start + limit]
+    rows = frame_records(df.iloc[positions])
+    end = start + len(positions)
+    next_after = None
+    next_after_row = None
+    if end < len(df) and len(positions) > 0:
+        last = sorted_keys[end - 1]
+        next_after = last.item() if hasattr(last, 'item') else last
+        next_after_row = int(positions[-1])
+    return {
+        'rows': rows,
+        'page': {
+            'key': key,
+            'after': after,
+            'after_row': after_row,
+            'limit': limit,
+            'total': len(df),
+            'next_after': next_after,
+            'next_after_row': next_after_row
+        }
+    }
+
+
+def iter_frame_batches(df: pd.DataFrame,
+                       batch_size: int) -> Iterator[pd.DataFrame]:
+    """Yield successive row slices of an in-memory frame."""
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start:start + batch_size]
+
+
+def iter_csv_batches(file_path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    """Yield row batches straight from a CSV without loading it whole."""
+    with pd.read_csv(file_path, encoding='utf-8', chunksize=batch_size) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def iter_ndjson(batches: Iterator[pd.DataFrame]) -> Iterator[bytes]:
+    """Encode row batches as newline-delimited JSON, one batch at a time."""
+    for batch in batches:
+        if batch.empty:
+            continue
+        payload = batch.to_json(orient='records', lines=True, date_format='iso')
+        if not payload.endswith('\n'):
+            payload += '\n'
+        yield payload.encode('utf-8')
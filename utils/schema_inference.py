@@ -0,0 +1,183 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Share of parsed values above which a column is treated as numeric
+NUMERIC_THRESHOLD = 0.5
+DEFAULT_SAMPLE_SIZE = int(os.getenv('SCHEMA_SAMPLE_SIZE', '1000'))
+# Sample ratios this close to the threshold are re-checked on the full column
+SAMPLE_MARGIN = 0.15
+# Columns with at most this many distinct values are confirmed exactly
+EXACT_CONFIRM_MAX_UNIQUES = 50000
+
+
+def stratified_sample(series: pd.Series, size: int = DEFAULT_SAMPLE_SIZE, seed: int = 0) -> pd.Series:
+    """Draw one row from each of ``size`` equal-width strata of the column.
+
+    Sorted or clustered files are still covered end to end, unlike a head
+    sample.
+    """
+    if len(series) <= size:
+        return series
+    bounds = np.linspace(0, len(series), size + 1).astype(np.int64)
+    rng = np.random.default_rng(seed)
+    positions = bounds[:-1] + (rng.random(size) * (bounds[1:] - bounds[:-1])).astype(np.int64)
+    return series.iloc[positions]
+
+
+def numeric_ratio(series: pd.Series) -> float:
+    """Share of values that parse as numbers, counting nulls as non-numeric."""
+    if len(series) == 0:
+        return 0.0
+    return float(pd.to_numeric(series, errors='coerce').notna().sum()) / len(series)
+
+
+def encoded_numeric_ratio(codes: np.ndarray, uniques: Any) -> Tuple[float, np.ndarray]:
+    """Exact numeric share of a factorized column, parsing each value once.
+
+    Returns the ratio and the numeric value of every unique.
+    """
+    unique_numeric = pd.to_numeric(pd.Series(uniques, dtype=object),
+                                   errors='coerce').to_numpy(dtype=np.float64)
+    if len(codes) == 0:
+        return 0.0, unique_numeric
+    present = codes >= 0
+    parsed = np.zeros(len(codes), dtype=bool)
+    parsed[present] = ~np.isnan(unique_numeric[codes[present]])
+    return float(parsed.sum()) / len(codes), unique_numeric
+
+
+def infer_column(series: pd.Series, sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict[str, Any]:
+    """Classify a column as numeric or categorical.
+
+    Numeric dtypes are decided from the dtype alone. Text columns are
+    classified from a stratified sample and then confirmed: low-cardinality
+    columns exactly over their distinct values, high-cardinality ones on
+    the full column only when the sample is too close to call.
+    """
+    dtype = series.dtype
+    schema = {'source_dtype': str(dtype)}
+
+    if pd.api.types.is_numeric_dtype(dtype):
+        schema.update({'type': 'numeric', 'method': 'dtype'})
+        return schema
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Compacted columns: parse each category once and weight by its codes
+        ratio, _ = encoded_numeric_ratio(series.cat.codes.to_numpy(), series.cat.categories)
+        schema.update({'type': 'numeric' if ratio > NUMERIC_THRESHOLD else 'categorical',
+                       'method': 'confirmed'})
+        return schema
+
+    if not (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)):
+        # Datetimes and other extension types: fall back to the full check
+        ratio = numeric_ratio(series)
+        schema.update({'type': 'numeric' if ratio > NUMERIC_THRESHOLD else 'categorical',
+                       'method': 'full'})
+        return schema
+
+    sample_ratio = numeric_ratio(stratified_sample(series, sample_size))
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if len(uniques) <= EXACT_CONFIRM_MAX_UNIQUES:
+        ratio, _ = encoded_numeric_ratio(codes, uniques)
+        method = 'confirmed'
+    elif abs(sample_ratio - NUMERIC_THRESHOLD) > SAMPLE_MARGIN:
+        ratio = sample_ratio
+        method = 'sample'
+    else:
+        ratio = numeric_ratio(series)
+        method = 'full'
+
+    schema.update({
+        'type': 'numeric' if ratio > NUMERIC_THRESHOLD else 'categorical',
+        'method': method,
+        'sample_numeric_ratio': round(sample_ratio, 4)
+    })
+    return schema
+
+
+def infer_schema(df: pd.DataFrame, sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict[str, Dict[str, Any]]:
+    """Infer the numeric/categorical schema of every column."""
+    schema = {}
+    for column in df.columns:
+        try:
+            schema[column] = infer_column(df[column], sample_size)
+        except Exception as e:
+            logger.warning(f"Error inferring type of column {column}: {str(e)}")
+            schema[column] = {'type': 'categorical', 'source_dtype': str(df[column].dtype),
+                              'method': 'error'}
+    return schema
+
+
+class SchemaCache:
+    """LRU cache of inferred schemas keyed by dataset fingerprint."""
+
+    def __init__(self, max_entries: int = 64):
+        """Initialize the schema cache."""
+        self.max_entries = max_entries
+        self._schemas: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint: Optional[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Return the cached schema for a fingerprint, if any."""
+        if not fingerprint:
+            return None
+        with self._lock:
+            schema = self._schemas.get(fingerprint)
+            if schema is not None:
+                self._schemas.move_to_end(fingerprint)
+            return schema
+
+    def set(self, fingerprint: str, schema: Dict[str, Dict[str, Any]]) -> None:
+        """Store a schema, evicting the least recently used one if full."""
+        with self._lock:
+            self._schemas[fingerprint] = schema
+            self._schemas.move_to_end(fingerprint)
+            while len(self._schemas) > self.max_entries:
+                self._schemas.popitem(last=False)
+
+    def update_column(self, fingerprint: Optional[str], column: str, column_type: str) -> None:
+        """Correct one column's type after a full pass disagreed with it."""
+        if not fingerprint:
+            return
+        with self._lock:
+            schema = self._schemas.get(fingerprint)
+            if schema is not None and column in schema:
+                schema[column] = {**schema[column], 'type': column_type, 'method': 'full'}
+
+    def get_or_infer(self, df: pd.DataFrame, fingerprint: Optional[str] = None,
+                     sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict[str, Dict[str, Any]]:
+        """Return the cached schema for a dataset, inferring it on a miss.
+
+        A cached schema is only reused when it covers every column of ``df``.
+        Without a fingerprint the schema is inferred and not stored.
+        """
+        schema = self.get(fingerprint)
+        if schema is not None and all(column in schema for column in df.columns):
+            return schema
+
+        schema = infer_schema(df, sample_size)
+        if fingerprint:
+            self.set(fingerprint, schema)
+        return schema
+
+    def clear(self) -> None:
+        """Drop all cached schemas."""
+        with self._lock:
+            self._schemas.clear()
+
+
+schema_cache = SchemaCache()
+
+
+def schema_columns(schema: Dict[str, Dict[str, Any]], column_type: str) -> List[str]:
+    """List the columns of a schema with the given type, in order."""
+    return [column for column, info in schema.items() if info.get('type') == column_type]
@@ -0,0 +1,204 @@
+from typing import Any, Dict, List, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin-Lang-Liberty).
+
+    Level ``h`` holds items of weight ``2**h``. Rank error is roughly
+    ``1.7 / k`` with high probability. Up to ``exact_limit`` values are kept
+    verbatim, so quantiles of small columns are exact.
+    """
+
+    def __init__(self, k: int = 400, exact_limit: int = 10000, seed: int = 0):
+        self.k = k
+        self.exact_limit = exact_limit
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        """Capacity of a level; lower levels shrink geometrically."""
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2.0 / 3.0) ** depth)), 2)
+
+    def update(self, values: np.ndarray) -> None:
+        """Add a chunk of finite values."""
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values.astype(np.float64)])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Fold another sketch into this one."""
+        self.count += other.count
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self) -> None:
+        """Compact overfull levels by keeping every other sorted item."""
+        if self.exact and self.count <= self.exact_limit:
+            return
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            items = np.sort(items)
+            # An odd item out stays behind so total weight is preserved
+            leftover = items[:len(items) % 2]
+            paired = items[len(items) % 2:]
+            offset = int(self._rng.integers(2))
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], paired[offset::2]])
+            self.levels[level] = leftover
+            # Capacities depend on the depth, so re-check from the bottom
+            level = 0
+
+    @property
+    def exact(self) -> bool:
+        """True while no compaction has happened."""
+        return len(self.levels) == 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile of the values seen."""
+        if self.count == 0:
+            return 0.0
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level_items), 2 ** level, dtype=np.float64)
+            for level, level_items in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        target = q * cumulative[-1]
+        index = min(int(np.searchsorted(cumulative, target, side='left')), len(order) - 1)
+        return float(items[order][index])
+
+
+def hash_values(values: Any) -> np.ndarray:
+    """Hash a column's values to uint64 consistently across chunks."""
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        array = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        array = series.astype(str).to_numpy(dtype=object)
+    return pd.util.hash_array(array)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch with ``2**p`` registers."""
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values: Any) -> None:
+        """Add a chunk of raw values."""
+        if len(values) == 0:
+            return
+        self.update_hashes(hash_values(values))
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """Add a chunk of precomputed uint64 value hashes."""
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - self.p)) - 1)
+
+        # Position of the leftmost set bit within the remaining 64 - p bits
+        bit_length = np.frexp(remainder.astype(np.float64))[1].astype(np.int64)
+        # Float rounding can overshoot by one just below a power of two
+        shift = np.maximum(bit_length - 1, 0).astype(np.uint64)
+        bit_length = np.where((remainder >> shift) == 0, bit_length - 1, bit_length)
+        rank = np.where(remainder == 0, 64 - self.p + 1, 64 - self.p - bit_length + 1)
+
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Fold another sketch with the same precision into this one."""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        """Estimate the number of distinct values seen."""
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros > 0:
+            # Linear counting is more accurate for small cardinalities
+            return float(self.m * np.log(self.m / zeros))
+        return float(raw)
+
+
+class SpaceSaving:
+    """Mergeable heavy-hitters summary keeping at most ``capacity`` counters.
+
+    Counts are upper bounds. ``floor`` bounds the count of any value not
+    kept; while it is zero every count is exact.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.floor = 0
+
+    def update(self, values: pd.Series) -> None:
+        """Add a chunk of raw values."""
+        if len(values) == 0:
+            return
+        self.update_counts(values.value_counts(dropna=False))
+
+    def update_counts(self, counts: pd.Series) -> None:
+        """Add exact value counts computed elsewhere."""
+        self._combine(counts.astype(np.int64), 0)
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """Fold another summary into this one."""
+        self._combine(other.counts, other.floor)
+
+    def _combine(self, counts: pd.Series, floor: int) -> None:
+        """Add two summaries, charging each side's floor for values it lacks."""
+        if len(self.counts) == 0 and self.floor == 0:
+            combined = counts.copy()
+        else:
+            index = self.counts.index.union(counts.index)
+            combined = (self.counts.reindex(index, fill_value=self.floor)
+                        + counts.reindex(index, fill_value=floor))
+        new_floor = self.floor + floor
+        if len(combined) > self.capacity:
+            combined = combined.sort_values(ascending=False, kind='stable')
+            new_floor = max(new_floor, int(combined.iloc[self.capacity]))
+            combined = combined.iloc[:self.capacity]
+        self.counts = combined
+        self.floor = new_floor
+
+    @property
+    def exact(self) -> bool:
+        """True while every distinct value is tracked with an exact count."""
+        return self.floor == 0
+
+    def top(self, n: int = 10) -> Dict[Any, int]:
+        """Return the n most frequent values and their counts."""
+        top = self.counts.sort_values(ascending=False, kind='stable').head(n)
+        return {_native_key(key): int(count) for key, count in top.items()}
+
+
+def _native_key(key: Any) -> Optional[Any]:
+    """Convert a value-count label to a JSON-friendly Python value."""
+    if pd.isna(key):
+        return None
+    return key.item() if hasattr(key, 'item') else key
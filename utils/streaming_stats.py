@@ -0,0 +1,187 @@
+from typing import Any, Dict, List
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .sketches import KLLSketch, HyperLogLog, SpaceSaving
+
+logger = logging.getLogger(__name__)
+
+# Sketch sizes; larger values trade memory for accuracy
+QUANTILE_SKETCH_K = 400
+HEAVY_HITTER_CAPACITY = 1024
+HLL_PRECISION = 14
+
+
+class RunningMoments:
+    """Online count, mean, variance, min and max over finite values."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold a chunk of finite values into the running moments."""
+        n = len(values)
+        if n == 0:
+            return
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        self._combine(n, chunk_mean, chunk_m2,
+                      float(values.min()), float(values.max()))
+
+    def merge(self, other: "RunningMoments") -> None:
+        """Fold another set of moments into this one."""
+        if other.count == 0:
+            return
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, n: int, mean: float, m2: float,
+                 low: float, high: float) -> None:
+        """Combine another set of moments using the parallel update rule."""
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    def std(self, ddof: int = 1) -> float:
+        """Standard deviation of the values seen so far."""
+        if self.count <= ddof:
+            return 0.0
+        return float(np.sqrt(self.m2 / (self.count - ddof)))
+
+
+class ColumnAccumulator:
+    """Mergeable one-pass statistics for a single column.
+
+    Each chunk can be summarized independently and the partial summaries
+    merged in any order: moments merge exactly, the median comes from a KLL
+    sketch, distinct counts from HyperLogLog and top values from
+    Space-Saving. Small columns stay exact throughout.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.null_count = 0
+        self.moments = RunningMoments()
+        self.quantiles = KLLSketch(QUANTILE_SKETCH_K)
+        self.distinct = HyperLogLog(HLL_PRECISION)
+        self.heavy_hitters = SpaceSaving(HEAVY_HITTER_CAPACITY)
+
+    def update(self, series: pd.Series) -> None:
+        """Fold one chunk of the column into the accumulator."""
+        self.rows += len(series)
+        self.null_count += int(series.isna().sum())
+
+        numeric = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+        finite = numeric[np.isfinite(numeric)]
+        self.moments.update(finite)
+        self.quantiles.update(finite)
+
+        self.distinct.update(series)
+        self.heavy_hitters.update(series)
+
+    def update_encoded(self, codes: np.ndarray, uniques: np.ndarray,
+                       unique_numeric: np.ndarray, unique_hashes: np.ndarray,
+                       null_hash: np.uint64) -> None:
+        """Fold one chunk given as factorized codes into the accumulator.
+
+        ``uniques`` and their numeric coercions and hashes are computed once
+        per column, so a chunk costs only integer gathers and a bincount.
+        Code -1 marks a missing value.
+        """
+        if len(uniques) == 0:
+            # Entirely missing column; give the gathers a placeholder to index
+            unique_numeric = np.array([np.nan])
+            unique_hashes = np.array([null_hash], dtype=np.uint64)
+
+        self.rows += len(codes)
+        missing = codes < 0
+        self.null_count += int(missing.sum())
+
+        numeric = np.where(missing, np.nan, unique_numeric[np.where(missing, 0, codes)])
+        finite = numeric[np.isfinite(numeric)]
+        self.moments.update(finite)
+        self.quantiles.update(finite)
+
+        self.distinct.update_hashes(np.where(missing, null_hash, unique_hashes[np.where(missing, 0, codes)]))
+
+        present = np.bincount(codes[~missing], minlength=len(uniques))
+        nonzero = np.flatnonzero(present)
+        counts = pd.Series(present[nonzero], index=pd.Index(uniques[nonzero], dtype=object))
+        null_total = int(missing.sum())
+        if null_total:
+            counts = pd.concat([counts, pd.Series([null_total], index=pd.Index([np.nan], dtype=object))])
+        self.heavy_hitters.update_counts(counts)
+
+    def merge(self, other: "ColumnAccumulator") -> None:
+        """Fold another partial summary of the same column into this one."""
+        self.rows += other.rows
+        self.null_count += other.null_count
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+        self.heavy_hitters.merge(other.heavy_hitters)
+
+    def is_numeric(self) -> bool:
+        """Apply the same >50% numeric rule as process_data."""
+        return self.rows > 0 and self.moments.count / self.rows > 0.5
+
+    def result(self) -> Dict[str, Any]:
+        """Return column statistics in the process_data layout."""
+        if self.is_numeric():
+            stats = {
+                'type': 'numeric',
+                'mean': float(self.moments.mean),
+                'median': self.quantiles.quantile(0.5),
+                'std': self.moments.std(ddof=1),
+                'min': float(self.moments.min),
+                'max': float(self.moments.max),
+                'valid_count': int(self.moments.count),
+                'null_count': int(self.rows - self.moments.count)
+            }
+            if not self.quantiles.exact:
+                stats['approximate'] = True
+            return stats
+
+        exact = self.heavy_hitters.exact
+        stats = {
+            'type': 'categorical',
+            'unique_values': int(len(self.heavy_hitters.counts)) if exact
+            else int(round(self.distinct.estimate())),
+            'top_values': self.heavy_hitters.top(10),
+            'null_count': int(self.null_count)
+        }
+        if not exact:
+            stats['approximate'] = True
+        return stats
+
+
+def summarize_frame(df: pd.DataFrame) -> Dict[str, ColumnAccumulator]:
+    """Build a partial summary for every column of a chunk."""
+    summaries = {}
+    for column in df.columns:
+        accumulator = ColumnAccumulator(column)
+        accumulator.update(df[column])
+        summaries[column] = accumulator
+    return summaries
+
+
+def merge_summaries(parts: List[Dict[str, ColumnAccumulator]]) -> Dict[str, ColumnAccumulator]:
+    """Merge per-chunk partial summaries column by column."""
+    merged: Dict[str, ColumnAccumulator] = {}
+    for part in parts:
+        for column, accumulator in part.items():
+            if column in merged:
+                merged[column].merge(accumulator)
+            else:
+                merged[column] = accumulator
+    return merged